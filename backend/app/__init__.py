@@ -15,7 +15,8 @@ def create_app():
         r"/api/v1/*": {
             "origins": "*",
             "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-            "allow_headers": ["Content-Type", "Authorization"]
+            "allow_headers": ["Content-Type", "Authorization", "If-None-Match", "If-Modified-Since"],
+            "expose_headers": ["ETag", "Last-Modified", "X-DB-Queries"]
         }
     })
     
@@ -28,6 +29,11 @@ def create_app():
     # Configure the app
     app.config.from_object(Config)
     
+    # Trust X-Forwarded-For from our own proxies so request.remote_addr is the client
+    if app.config['PROXY_FIX_X_FOR']:
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR'])
+    
     # Configure logging
     import logging
     logging.basicConfig(
@@ -41,6 +47,42 @@ def create_app():
     # Set custom JSON encoder
     app.json_encoder = CustomJSONEncoder
     
+    # Shared MySQL connection pool used by all blueprints
+    from .utils.db import init_db
+    pool = init_db(app)
+    
+    # Optional write-behind queue for scan records
+    from .utils.scan_writer import init_scan_writer
+    init_scan_writer(app, pool)
+    
+    # Token and role caches used by require_auth
+    from .utils.auth import init_auth
+    init_auth(app)
+    
+    # Bounded credential checks and login rate limiting
+    from .utils.login import init_login
+    init_login(app)
+    
+    # In-memory barcode -> device index
+    from .utils.device_cache import init_device_cache
+    init_device_cache(app)
+    
+    # Prefix cache and request coalescing for /devices/suggest
+    from .utils.suggest import init_suggest
+    init_suggest(app)
+    
+    # Label image cache and label sheet process pool
+    from .utils.labels import init_labels
+    init_labels(app)
+    
+    # Process pool for decoding uploaded camera frames
+    from .utils.decode import init_decode
+    init_decode(app)
+    
+    # Cached dashboard/report responses with ETag support
+    from .utils.response_cache import init_response_cache
+    init_response_cache(app)
+    
     # Load and register blueprints
     from .routes.auth import auth_bp
     from .routes.jobs import jobs_bp
@@ -57,4 +99,8 @@ def create_app():
     app.register_blueprint(devices_bp, url_prefix='/api/v1/devices')
     app.register_blueprint(reports_bp, url_prefix='/api/v1/reports')
     
+    # Maintenance commands (flask rollups backfill, ...)
+    from .cli import register_cli
+    register_cli(app)
+    
     return app
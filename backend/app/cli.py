@@ -0,0 +1,127 @@
+import os
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from .utils.db import get_pool
+from .utils.rollups import rebuild_rollups
+from .utils.device_status import repair_device_status
+from .utils.dates import parse_day
+from .utils.scan_history import (
+    NotPartitioned, archive_partitions, ensure_partitions, list_partitions, max_scan_history, trim_scan_history
+)
+
+rollups_cli = AppGroup('rollups', help='Maintain the scan rollup tables.')
+device_status_cli = AppGroup('device-status', help='Maintain the device_status table.')
+scans_cli = AppGroup('scans', help='Maintain scan partitions, retention and archives.')
+
+
+@rollups_cli.command('backfill')
+@click.option('--start', 'start_date', help='First day to rebuild (YYYY-MM-DD), default: first scan')
+@click.option('--end', 'end_date', help='Last day to rebuild (YYYY-MM-DD), default: last scan')
+def backfill_rollups(start_date, end_date):
+    """Rebuild scan_daily_stats and device_daily_stats from the scans table"""
+    conn = get_pool().acquire()
+    try:
+        days = rebuild_rollups(conn, parse_day(start_date), parse_day(end_date))
+    finally:
+        conn.close()
+    click.echo(f"Rebuilt rollups for {days} day(s)")
+
+
+@device_status_cli.command('repair')
+@click.option('--batch-size', default=500, show_default=True, help='Devices per transaction')
+def repair_status(batch_size):
+    """Recompute device_status from job_devices and scans"""
+    conn = get_pool().acquire()
+    try:
+        devices = repair_device_status(conn, batch_size)
+    finally:
+        conn.close()
+    click.echo(f"Repaired status of {devices} device(s)")
+
+
+@scans_cli.command('partitions')
+@click.option('--ahead', type=int, help='Months to create ahead, default: SCAN_PARTITIONS_AHEAD')
+def add_partitions(ahead):
+    """Create the monthly scans partitions up to a few months ahead"""
+    if ahead is None:
+        ahead = current_app.config['SCAN_PARTITIONS_AHEAD']
+    conn = get_pool().acquire()
+    try:
+        names = ensure_partitions(conn, ahead)
+    except NotPartitioned as e:
+        raise click.ClickException(str(e))
+    finally:
+        conn.close()
+    click.echo(f"Added {len(names)} partition(s)")
+
+
+@scans_cli.command('archive')
+@click.option('--keep-months', type=int, help='Months kept in MySQL, default: SCAN_ARCHIVE_AFTER_MONTHS')
+def archive_scans(keep_months):
+    """Move old monthly partitions into gzipped CSV files"""
+    config = current_app.config
+    if keep_months is None:
+        keep_months = config['SCAN_ARCHIVE_AFTER_MONTHS']
+    conn = get_pool().acquire()
+    try:
+        archived = archive_partitions(
+            conn, os.path.abspath(config['SCAN_ARCHIVE_DIR']), keep_months, config['EXPORT_CHUNK_SIZE']
+        )
+    except NotPartitioned as e:
+        raise click.ClickException(str(e))
+    finally:
+        conn.close()
+    for name, count in archived:
+        click.echo(f"Archived {name}: {count} scan(s)")
+    click.echo(f"Archived {len(archived)} partition(s)")
+
+
+@scans_cli.command('trim')
+@click.option('--max-per-device', type=int, help='Scans kept per device, default: the max_scan_history setting')
+def trim_scans(max_per_device):
+    """Delete the oldest scans of devices over their history limit"""
+    conn = get_pool().acquire()
+    try:
+        if max_per_device is None:
+            cursor = conn.cursor()
+            max_per_device = max_scan_history(cursor)
+            cursor.close()
+        deleted = trim_scan_history(conn, max_per_device, current_app.config['SCAN_RETENTION_BATCH_SIZE'])
+    finally:
+        conn.close()
+    click.echo(f"Deleted {deleted} scan(s)")
+
+
+@scans_cli.command('maintain')
+@click.pass_context
+def maintain_scans(ctx):
+    """Add partitions, archive old months and trim per-device history (for cron)"""
+    ctx.invoke(add_partitions)
+    ctx.invoke(archive_scans)
+    ctx.invoke(trim_scans)
+
+
+@scans_cli.command('status')
+def scan_partitions():
+    """List the scans partitions with their estimated row counts"""
+    conn = get_pool().acquire()
+    try:
+        cursor = conn.cursor()
+        partitions = list_partitions(cursor)
+        cursor.close()
+    except NotPartitioned as e:
+        raise click.ClickException(str(e))
+    finally:
+        conn.close()
+    for name, _, rows in partitions:
+        click.echo(f"{name}\t~{rows} row(s)")
+
+
+def register_cli(app):
+    """Attach the maintenance commands to `flask`"""
+    app.cli.add_command(rollups_cli)
+    app.cli.add_command(device_status_cli)
+    app.cli.add_command(scans_cli)
@@ -1,79 +1,17 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 import jwt
 import datetime
-import os
 import mysql.connector
-import hashlib
 import logging
+from ..utils.auth import decode_token, get_bearer_token, get_cached_user_permissions
+from ..utils.login import get_credential_verifier, get_login_limiters, LoginBusy
 
 auth_bp = Blueprint('auth', __name__)
 
-def get_db_connection():
-    """Get database connection"""
-    try:
-        return mysql.connector.connect(
-            host=os.getenv('MYSQL_HOST'),
-            user=os.getenv('MYSQL_USER'),
-            password=os.getenv('MYSQL_PASSWORD'),
-            database=os.getenv('MYSQL_DATABASE'),
-            connect_timeout=10,
-            autocommit=True
-        )
-    except Exception as e:
-        logging.error(f"Database connection failed: {e}")
-        raise
-
 def verify_mysql_credentials(username, password):
     """Verify credentials against MySQL user table"""
-    try:
-        # Try to connect to MySQL with provided credentials
-        test_conn = mysql.connector.connect(
-            host=os.getenv('MYSQL_HOST'),
-            user=username,
-            password=password,
-            database=os.getenv('MYSQL_DATABASE'),
-            connect_timeout=5
-        )
-        test_conn.close()
-        return True
-    except mysql.connector.Error:
-        return False
-
-def get_user_permissions(username):
-    """Get user permissions from MySQL"""
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        # Check if user exists in mysql.user table
-        cursor.execute("""
-            SELECT User, Host, 
-                   CASE 
-                       WHEN Super_priv = 'Y' THEN 'admin'
-                       WHEN Select_priv = 'Y' AND Insert_priv = 'Y' AND Update_priv = 'Y' AND Delete_priv = 'Y' THEN 'manager'
-                       WHEN Select_priv = 'Y' THEN 'viewer'
-                       ELSE 'limited'
-                   END as role
-            FROM mysql.user 
-            WHERE User = %s
-            LIMIT 1
-        """, (username,))
-        
-        user_info = cursor.fetchone()
-        cursor.close()
-        conn.close()
-        
-        if user_info:
-            return {
-                'username': user_info['User'],
-                'host': user_info['Host'],
-                'role': user_info['role']
-            }
-        return None
-        
-    except Exception as e:
-        logging.error(f"Error getting user permissions: {e}")
-        return None
+    # Runs on a bounded worker pool with a short-lived positive-result cache
+    return get_credential_verifier().verify(username, password)
 
 @auth_bp.route('/login', methods=['POST'])
 def login():
@@ -90,12 +28,30 @@ def login():
         if not username or not password:
             return jsonify({'error': 'Username and password required'}), 400
         
+        # Only failed attempts count, so a crew logging in behind one NAT
+        # address is not throttled, and the per-user limit is kept per
+        # address so nobody can lock a user out from elsewhere.
+        # Credentials verified moments ago skip the limiters entirely.
+        verifier = get_credential_verifier()
+        user_limiter, ip_limiter = get_login_limiters()
+        user_key = (username.lower(), request.remote_addr)
+        if not verifier.is_cached(username, password):
+            retry_after = max(
+                ip_limiter.check(request.remote_addr),
+                user_limiter.check(user_key)
+            )
+            if retry_after:
+                logging.warning(f"Login rate limited: {username} from {request.remote_addr}")
+                return jsonify({'error': 'Too many login attempts'}), 429, {'Retry-After': str(int(retry_after) + 1)}
+        
         # Verify credentials against MySQL
         if not verify_mysql_credentials(username, password):
+            ip_limiter.hit(request.remote_addr)
+            user_limiter.hit(user_key)
             return jsonify({'error': 'Invalid MySQL credentials'}), 401
         
         # Get user permissions
-        user_info = get_user_permissions(username)
+        user_info = get_cached_user_permissions(username)
         if not user_info:
             return jsonify({'error': 'Unable to determine user permissions'}), 401
         
@@ -109,7 +65,7 @@ def login():
         
         token = jwt.encode(
             token_payload,
-            os.getenv('JWT_SECRET_KEY', 'change-this-in-production'),
+            current_app.config['JWT_SECRET_KEY'],
             algorithm='HS256'
         )
         
@@ -123,6 +79,9 @@ def login():
             'message': 'Login successful'
         })
         
+    except LoginBusy as e:
+        logging.warning(f"Login rejected: {e}")
+        return jsonify({'error': 'Login service busy, please retry'}), 503, {'Retry-After': '2'}
     except mysql.connector.Error as e:
         logging.error(f"MySQL error during login: {e}")
         return jsonify({'error': 'Database connection failed'}), 500
@@ -134,21 +93,13 @@ def login():
 def verify_token():
     """Verify JWT token"""
     try:
-        token = request.headers.get('Authorization')
+        token = get_bearer_token()
         
         if not token:
-            return jsonify({'error': 'No token provided'}), 401
-            
-        # Remove Bearer prefix if present
-        if token.startswith('Bearer '):
-            token = token[7:]
+            return jsonify({'error': 'No valid token provided'}), 401
             
-        # Decode and verify token
-        decoded = jwt.decode(
-            token, 
-            os.getenv('JWT_SECRET_KEY', 'change-this-in-production'), 
-            algorithms=['HS256']
-        )
+        # Decode and verify token (memoized until it expires)
+        decoded = decode_token(token)
         
         return jsonify({
             'valid': True, 
@@ -170,15 +121,10 @@ def logout():
     """Logout endpoint"""
     try:
         # Get user from token for logging
-        token = request.headers.get('Authorization')
-        if token and token.startswith('Bearer '):
-            token = token[7:]
+        token = get_bearer_token()
+        if token:
             try:
-                decoded = jwt.decode(
-                    token, 
-                    os.getenv('JWT_SECRET_KEY', 'change-this-in-production'), 
-                    algorithms=['HS256']
-                )
+                decoded = decode_token(token)
                 logging.info(f"User logout: {decoded['user']}")
             except:
                 pass
@@ -192,20 +138,15 @@ def logout():
 def get_profile():
     """Get user profile information"""
     try:
-        token = request.headers.get('Authorization')
+        token = get_bearer_token()
         
-        if not token or not token.startswith('Bearer '):
+        if not token:
             return jsonify({'error': 'No valid token provided'}), 401
             
-        token = token[7:]
-        decoded = jwt.decode(
-            token, 
-            os.getenv('JWT_SECRET_KEY', 'change-this-in-production'), 
-            algorithms=['HS256']
-        )
+        decoded = decode_token(token)
         
-        # Get fresh user info from database
-        user_info = get_user_permissions(decoded['user'])
+        # Get user info (cached briefly to spare the mysql.user lookup)
+        user_info = get_cached_user_permissions(decoded['user'])
         
         if user_info:
             return jsonify({
@@ -1,35 +1,26 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, send_file, g
+import io
 import mysql.connector
-import os
 from datetime import datetime
 import logging
+from ..utils.db import get_db_connection, fetch_result_sets, placeholders
+from ..utils.auth import require_auth
+from ..utils.response_cache import cached_response, invalidate_responses
+from ..utils.pagination import get_page_size, encode_cursor, decode_cursor, page_body, InvalidCursor
+from ..utils.scans import write_scans
+from ..utils.device_cache import get_device_cache
+from ..utils.device_search import find_devices
+from ..utils.suggest import get_suggester
+from ..utils.labels import LABEL_FORMATS, LABEL_SIZES, build_label_sheet, get_label_cache, get_label_workers
+from ..utils.workers import WorkersBusy
+from ..utils.decode import decode_frames, get_decode_workers, parse_roi
+from ..utils.scan_writer import get_scan_writer, ScanQueueFull
+from ..utils.assignments import assign_devices, return_devices, JobNotFound, InvalidItem
+from ..utils.device_status import STATUS_SELECT
 
 devices_bp = Blueprint('devices', __name__)
 
-def get_db_connection():
-    """Get database connection"""
-    try:
-        return mysql.connector.connect(
-            host=os.getenv('MYSQL_HOST'),
-            user=os.getenv('MYSQL_USER'),
-            password=os.getenv('MYSQL_PASSWORD'),
-            database=os.getenv('MYSQL_DATABASE'),
-            connect_timeout=10,
-            autocommit=True
-        )
-    except Exception as e:
-        logging.error(f"Database connection failed: {e}")
-        raise
-
-def require_auth(f):
-    """Decorator to require authentication"""
-    def decorated_function(*args, **kwargs):
-        token = request.headers.get('Authorization')
-        if not token or not token.startswith('Bearer '):
-            return jsonify({'error': 'Authentication required'}), 401
-        return f(*args, **kwargs)
-    decorated_function.__name__ = f.__name__
-    return decorated_function
+BARCODE_MAX_LENGTH = 255  # width of devices.barcode / scans.barcode
 
 @devices_bp.route('/', methods=['GET'])
 @require_auth
@@ -42,10 +33,10 @@ def get_devices():
         # Get query parameters
         device_type = request.args.get('type')
         status = request.args.get('status')
-        limit = request.args.get('limit', type=int)
-        offset = request.args.get('offset', 0, type=int)
+        limit = get_page_size()
+        cursor_param = request.args.get('cursor')
         
-        # Build query
+        # Build query (keyset pagination on name, id)
         query = "SELECT * FROM devices"
         params = []
         conditions = []
@@ -58,28 +49,34 @@ def get_devices():
             conditions.append("status = %s")
             params.append(status)
         
+        if cursor_param:
+            try:
+                name, last_id = decode_cursor(cursor_param, 2)
+            except InvalidCursor:
+                cursor.close()
+                conn.close()
+                return jsonify({'error': 'Invalid cursor'}), 400
+            conditions.append("(name > %s OR (name = %s AND id > %s))")
+            params.extend([name, name, last_id])
+        
         if conditions:
             query += " WHERE " + " AND ".join(conditions)
             
-        query += " ORDER BY name"
-        
-        if limit:
-            query += " LIMIT %s OFFSET %s"
-            params.extend([limit, offset])
+        query += " ORDER BY name, id LIMIT %s"
+        params.append(limit + 1)
         
         cursor.execute(query, params)
         devices = cursor.fetchall()
         
-        # Convert datetime objects to ISO format
-        for device in devices:
-            for key, value in device.items():
-                if isinstance(value, datetime):
-                    device[key] = value.isoformat()
+        next_cursor = None
+        if len(devices) > limit:
+            devices = devices[:limit]
+            next_cursor = encode_cursor(devices[-1]['name'], devices[-1]['id'])
         
         cursor.close()
         conn.close()
         
-        return jsonify(devices)
+        return jsonify(page_body(devices, next_cursor))
         
     except mysql.connector.Error as e:
         logging.error(f"Database error in get_devices: {e}")
@@ -100,11 +97,6 @@ def get_device(device_id):
         device = cursor.fetchone()
         
         if device:
-            # Convert datetime objects to ISO format
-            for key, value in device.items():
-                if isinstance(value, datetime):
-                    device[key] = value.isoformat()
-            
             cursor.close()
             conn.close()
             return jsonify(device)
@@ -120,6 +112,268 @@ def get_device(device_id):
         logging.error(f"Error in get_device: {e}")
         return jsonify({'error': 'Failed to fetch device'}), 500
 
+@devices_bp.route('/status', methods=['GET'])
+@require_auth
+def get_device_statuses():
+    """Get devices with their current job and scan activity"""
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+
+        device_type = request.args.get('type')
+        status = request.args.get('status')
+        job_id = request.args.get('job_id', type=int)
+        limit = get_page_size()
+        cursor_param = request.args.get('cursor')
+
+        # Reads the maintained device_status table (keyset pagination on name, id)
+        query = STATUS_SELECT
+        params = []
+        conditions = []
+
+        if device_type:
+            conditions.append("d.type = %s")
+            params.append(device_type)
+
+        if status:
+            conditions.append("d.status = %s")
+            params.append(status)
+
+        if job_id is not None:
+            conditions.append("ds.current_job_id = %s")
+            params.append(job_id)
+
+        if cursor_param:
+            try:
+                name, last_id = decode_cursor(cursor_param, 2)
+            except InvalidCursor:
+                cursor.close()
+                conn.close()
+                return jsonify({'error': 'Invalid cursor'}), 400
+            conditions.append("(d.name > %s OR (d.name = %s AND d.id > %s))")
+            params.extend([name, name, last_id])
+
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+
+        query += " ORDER BY d.name, d.id LIMIT %s"
+        params.append(limit + 1)
+
+        cursor.execute(query, params)
+        devices = cursor.fetchall()
+
+        next_cursor = None
+        if len(devices) > limit:
+            devices = devices[:limit]
+            next_cursor = encode_cursor(devices[-1]['name'], devices[-1]['id'])
+
+        cursor.close()
+        conn.close()
+
+        return jsonify(page_body(devices, next_cursor))
+
+    except mysql.connector.Error as e:
+        logging.error(f"Database error in get_device_statuses: {e}")
+        return jsonify({'error': 'Database error occurred'}), 500
+    except Exception as e:
+        logging.error(f"Error in get_device_statuses: {e}")
+        return jsonify({'error': 'Failed to fetch device status'}), 500
+
+@devices_bp.route('/<int:device_id>/status', methods=['GET'])
+@require_auth
+def get_device_status(device_id):
+    """Get one device with its current job and scan activity"""
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+
+        cursor.execute(STATUS_SELECT + " WHERE d.id = %s", (device_id,))
+        device = cursor.fetchone()
+
+        cursor.close()
+        conn.close()
+
+        if not device:
+            return jsonify({'error': 'Device not found'}), 404
+        return jsonify(device)
+
+    except mysql.connector.Error as e:
+        logging.error(f"Database error in get_device_status: {e}")
+        return jsonify({'error': 'Database error occurred'}), 500
+    except Exception as e:
+        logging.error(f"Error in get_device_status: {e}")
+        return jsonify({'error': 'Failed to fetch device status'}), 500
+
+@devices_bp.route('/<int:device_id>/label.<fmt>', methods=['GET'])
+@require_auth
+def get_device_label(device_id, fmt):
+    """Barcode label of a device as PNG or SVG (?size=small|medium|large)"""
+    try:
+        if fmt not in LABEL_FORMATS:
+            return jsonify({'error': f'Unsupported format: {fmt}'}), 404
+        
+        size = request.args.get('size', current_app.config['LABEL_DEFAULT_SIZE'])
+        if size not in LABEL_SIZES:
+            return jsonify({'error': f'Unknown label size: {size}'}), 400
+        
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("SELECT barcode FROM devices WHERE id = %s", (device_id,))
+        device = cursor.fetchone()
+        cursor.close()
+        conn.close()
+        
+        if not device:
+            return jsonify({'error': 'Device not found'}), 404
+        
+        key, path = get_label_cache().fetch(device['barcode'], fmt, size)
+        
+        # Content-addressed: the same barcode, format and size never change
+        return send_file(
+            path,
+            mimetype=LABEL_FORMATS[fmt],
+            download_name=f"{device['barcode']}.{fmt}",
+            conditional=True,
+            etag=key,
+            max_age=current_app.config['LABEL_MAX_AGE']
+        )
+        
+    except ValueError as e:
+        return jsonify({'error': f'Barcode cannot be encoded: {e}'}), 422
+    except ImportError:
+        logging.error("Label requested but python-barcode/Pillow is not installed")
+        return jsonify({'error': 'Label rendering is not available'}), 501
+    except mysql.connector.Error as e:
+        logging.error(f"Database error in get_device_label: {e}")
+        return jsonify({'error': 'Database error occurred'}), 500
+    except Exception as e:
+        logging.error(f"Error in get_device_label: {e}")
+        return jsonify({'error': 'Failed to render label'}), 500
+
+@devices_bp.route('/qrcode/<int:device_id>', methods=['GET'])
+@require_auth
+def get_device_qrcode(device_id):
+    """QR code of a device as PNG or SVG (?format=, ?size=).
+    
+    Encodes the device's barcode, or ``DEVICE:<id>`` with
+    ``?payload=device``. Images come from the in-memory LRU, then the
+    disk cache, and are only encoded once per payload, format and size.
+    """
+    try:
+        fmt = request.args.get('format', 'png').lower()
+        if fmt not in LABEL_FORMATS:
+            return jsonify({'error': f'Unsupported format: {fmt}'}), 400
+        
+        size = request.args.get('size', current_app.config['LABEL_DEFAULT_SIZE'])
+        if size not in LABEL_SIZES:
+            return jsonify({'error': f'Unknown label size: {size}'}), 400
+        
+        payload_type = request.args.get('payload', 'barcode')
+        if payload_type not in ('barcode', 'device'):
+            return jsonify({'error': f'Unknown payload: {payload_type}'}), 400
+        
+        device_cache = get_device_cache()
+        hit, device = device_cache.peek_id(device_id)
+        if not hit:
+            conn = get_db_connection()
+            cursor = conn.cursor(dictionary=True)
+            device = device_cache.find_by_id(cursor, device_id)
+            cursor.close()
+            conn.close()
+        
+        if not device:
+            return jsonify({'error': 'Device not found'}), 404
+        
+        payload = device['barcode'] if payload_type == 'barcode' else f"DEVICE:{device_id}"
+        key, data = get_label_cache().load(payload, fmt, size, kind='qrcode')
+        
+        response = current_app.response_class(data, mimetype=LABEL_FORMATS[fmt])
+        response.set_etag(key)
+        response.cache_control.private = True
+        response.cache_control.max_age = current_app.config['LABEL_MAX_AGE']
+        response.headers['Content-Disposition'] = f'inline; filename="qr_device_{device_id}.{fmt}"'
+        return response.make_conditional(request)
+        
+    except ImportError:
+        logging.error("QR code requested but qrcode/Pillow is not installed")
+        return jsonify({'error': 'QR code rendering is not available'}), 501
+    except mysql.connector.Error as e:
+        logging.error(f"Database error in get_device_qrcode: {e}")
+        return jsonify({'error': 'Database error occurred'}), 500
+    except Exception as e:
+        logging.error(f"Error in get_device_qrcode: {e}")
+        return jsonify({'error': 'Failed to render QR code'}), 500
+
+@devices_bp.route('/labels.pdf', methods=['POST'])
+@require_auth
+def get_label_sheet():
+    """Printable A4 sheets with one label per device in ``device_ids``"""
+    try:
+        data = request.get_json()
+        
+        device_ids = data.get('device_ids') if isinstance(data, dict) else None
+        if not isinstance(device_ids, list) or not device_ids:
+            return jsonify({'error': 'No device_ids provided'}), 400
+        if not all(isinstance(device_id, int) for device_id in device_ids):
+            return jsonify({'error': 'device_ids must be integers'}), 400
+        
+        max_labels = current_app.config['LABEL_PDF_MAX_LABELS']
+        if len(device_ids) > max_labels:
+            return jsonify({'error': f'Too many labels (max {max_labels})'}), 413
+        
+        size = data.get('size', current_app.config['LABEL_DEFAULT_SIZE'])
+        if size not in LABEL_SIZES:
+            return jsonify({'error': f'Unknown label size: {size}'}), 400
+        
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        unique_ids = list(dict.fromkeys(device_ids))
+        cursor.execute(
+            f"SELECT id, name, barcode FROM devices WHERE id IN ({placeholders(unique_ids)})",
+            unique_ids
+        )
+        devices = {device['id']: device for device in cursor.fetchall()}
+        cursor.close()
+        conn.close()
+        
+        missing = [device_id for device_id in unique_ids if device_id not in devices]
+        if missing:
+            return jsonify({'error': 'Devices not found', 'device_ids': missing}), 404
+        
+        # Keep the requested order; repeated ids print repeated labels
+        labels = [(devices[device_id]['name'], devices[device_id]['barcode']) for device_id in device_ids]
+        
+        config = current_app.config
+        pdf = get_label_workers().run(
+            build_label_sheet,
+            labels,
+            get_label_cache().directory,
+            size,
+            config['LABEL_SHEET_COLUMNS'],
+            config['LABEL_SHEET_ROWS']
+        )
+        
+        logging.info(f"Rendered label sheet with {len(labels)} labels")
+        
+        return send_file(
+            io.BytesIO(pdf),
+            mimetype='application/pdf',
+            download_name='labels.pdf'
+        )
+        
+    except WorkersBusy as e:
+        logging.warning(f"Label sheet rejected: {e}")
+        return jsonify({'error': 'Label rendering is busy, try again shortly'}), 503
+    except ImportError:
+        logging.error("Label sheet requested but reportlab is not installed")
+        return jsonify({'error': 'Label rendering is not available'}), 501
+    except mysql.connector.Error as e:
+        logging.error(f"Database error in get_label_sheet: {e}")
+        return jsonify({'error': 'Database error occurred'}), 500
+    except Exception as e:
+        logging.error(f"Error in get_label_sheet: {e}")
+        return jsonify({'error': 'Failed to render labels'}), 500
+
 @devices_bp.route('/', methods=['POST'])
 @require_auth
 def create_device():
@@ -166,6 +420,11 @@ def create_device():
         cursor.close()
         conn.close()
         
+        # Drop a cached "unknown barcode" entry for the new device
+        get_device_cache().invalidate(data['barcode'])
+        get_suggester().clear()
+        invalidate_responses('devices')
+        
         logging.info(f"Device created: {data['name']} (ID: {device_id})")
         
         return jsonify({
@@ -198,57 +457,56 @@ def scan_barcode():
         cursor = conn.cursor(dictionary=True)
         
         # Find device by barcode
-        cursor.execute("SELECT * FROM devices WHERE barcode = %s", (barcode,))
-        device = cursor.fetchone()
+        device_cache = get_device_cache()
+        device = device_cache.lookup(cursor, barcode)
+        
+        # In write-behind mode the scan row is written by the background writer
+        scan_writer = get_scan_writer()
+        scanned_at = datetime.now()
         
         if device:
-            # Update device last scan time
-            cursor.execute(
-                "UPDATE devices SET last_scan = %s WHERE id = %s",
-                (datetime.now(), device['id'])
-            )
-            
-            # Record the scan
-            scan_query = """
-            INSERT INTO scans (device_id, job_id, barcode, scan_timestamp, location, notes)
-            VALUES (%s, %s, %s, %s, %s, %s)
-            """
-            cursor.execute(scan_query, (
-                device['id'],
-                job_id,
-                barcode,
-                datetime.now(),
-                location,
-                notes
-            ))
+            # Update device last scan time and record the scan
+            scan = {
+                'device_id': device['id'],
+                'job_id': job_id,
+                'barcode': barcode,
+                'scan_timestamp': scanned_at,
+                'location': location,
+                'notes': notes
+            }
+            if scan_writer:
+                scan_writer.submit(scan)
+            else:
+                # Scan row, rollups, last_scan and device_status commit together
+                write_scans(conn, cursor, [scan])
+            device_cache.touch(device['id'], scanned_at)
+            device['last_scan'] = scanned_at
+            invalidate_responses('scans')
             
             cursor.close()
             conn.close()
             
-            # Convert datetime objects to ISO format
-            for key, value in device.items():
-                if isinstance(value, datetime):
-                    device[key] = value.isoformat()
-            
             logging.info(f"Device scanned: {device['name']} ({barcode})")
             
             return jsonify({
                 'success': True,
                 'device': device,
+                'queued': scan_writer is not None,
                 'message': f'Device {device["name"]} scanned successfully'
             })
         else:
             # Record unknown barcode scan
-            scan_query = """
-            INSERT INTO scans (barcode, scan_timestamp, location, notes)
-            VALUES (%s, %s, %s, %s)
-            """
-            cursor.execute(scan_query, (
-                barcode,
-                datetime.now(),
-                location,
-                f"Unknown device - {notes}"
-            ))
+            scan = {
+                'barcode': barcode,
+                'scan_timestamp': scanned_at,
+                'location': location,
+                'notes': f"Unknown device - {notes}"
+            }
+            if scan_writer:
+                scan_writer.submit(scan)
+            else:
+                write_scans(conn, cursor, [scan])
+            invalidate_responses('scans')
             
             cursor.close()
             conn.close()
@@ -258,10 +516,13 @@ def scan_barcode():
             return jsonify({
                 'success': False,
                 'barcode': barcode,
-                'timestamp': datetime.now().isoformat(),
+                'timestamp': scanned_at.isoformat(),
                 'message': 'Barcode scanned but device not found in database'
             }), 404
             
+    except ScanQueueFull:
+        logging.warning("Scan rejected, write-behind queue is full")
+        return jsonify({'error': 'Scanner busy, please retry'}), 503, {'Retry-After': '1'}
     except mysql.connector.Error as e:
         logging.error(f"Database error in scan_barcode: {e}")
         return jsonify({'error': 'Database error occurred'}), 500
@@ -269,38 +530,265 @@ def scan_barcode():
         logging.error(f"Error in scan_barcode: {e}")
         return jsonify({'error': 'Scan failed'}), 500
 
+@devices_bp.route('/scan/batch', methods=['POST'])
+@require_auth
+def scan_barcode_batch():
+    """Handle a burst of barcode scans in a single request"""
+    try:
+        data = request.get_json()
+        
+        if isinstance(data, dict):
+            items = data.get('scans')
+        else:
+            items = data
+        
+        if not isinstance(items, list) or not items:
+            return jsonify({'error': 'No scans provided'}), 400
+        
+        max_size = current_app.config['SCAN_BATCH_MAX_SIZE']
+        if len(items) > max_size:
+            return jsonify({'error': f'Batch too large (max {max_size} scans)'}), 413
+        
+        results = []
+        barcodes = {}
+        for index, item in enumerate(items):
+            barcode = item.get('barcode') if isinstance(item, dict) else None
+            if isinstance(barcode, str):
+                barcode = barcode.strip()
+            if not barcode:
+                error = 'No barcode provided'
+            elif not isinstance(barcode, str) or len(barcode) > BARCODE_MAX_LENGTH:
+                barcode, error = None, 'Invalid barcode'
+            else:
+                barcodes[index] = barcode
+                continue
+            results.append({
+                'index': index,
+                'barcode': barcode,
+                'success': False,
+                'error': error
+            })
+        
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        
+        # Resolve every barcode with at most one lookup
+        device_cache = get_device_cache()
+        devices = device_cache.lookup_many(cursor, barcodes.values())
+        
+        now = datetime.now()
+        scans = []
+        for index, barcode in barcodes.items():
+            item = items[index]
+            device = devices.get(barcode)
+            notes = item.get('notes', '')
+            scans.append({
+                'device_id': device['id'] if device else None,
+                'job_id': item.get('job_id'),
+                'barcode': barcode,
+                'scan_timestamp': now,
+                'location': item.get('location', ''),
+                'notes': notes if device else f"Unknown device - {notes}"
+            })
+            
+            if device:
+                results.append({
+                    'index': index,
+                    'barcode': barcode,
+                    'success': True,
+                    'device': {
+                        'id': device['id'],
+                        'name': device['name'],
+                        'type': device['type'],
+                        'status': device['status'],
+                        'location': device['location']
+                    }
+                })
+            else:
+                results.append({
+                    'index': index,
+                    'barcode': barcode,
+                    'success': False,
+                    'error': 'Device not found in database'
+                })
+        
+        # Write all scans in one transaction
+        write_scans(conn, cursor, scans)
+        
+        for device in devices.values():
+            device_cache.touch(device['id'], now)
+        invalidate_responses('scans')
+        
+        cursor.close()
+        conn.close()
+        
+        results.sort(key=lambda result: result['index'])
+        scanned = sum(1 for result in results if result['success'])
+        
+        logging.info(f"Batch scan: {scanned} of {len(items)} barcodes matched")
+        
+        return jsonify({
+            'total': len(items),
+            'scanned': scanned,
+            'failed': len(items) - scanned,
+            'timestamp': now.isoformat(),
+            'results': results
+        })
+        
+    except mysql.connector.Error as e:
+        logging.error(f"Database error in scan_barcode_batch: {e}")
+        return jsonify({'error': 'Database error occurred'}), 500
+    except Exception as e:
+        logging.error(f"Error in scan_barcode_batch: {e}")
+        return jsonify({'error': 'Batch scan failed'}), 500
+
+def _record_decoded(cursor, conn, barcodes, job_id, location, now):
+    """Record scans for decoded barcodes the way /scan and /scan/batch do"""
+    device_cache = get_device_cache()
+    devices = device_cache.lookup_many(cursor, barcodes)
+    
+    scans = []
+    results = []
+    for barcode in barcodes:
+        device = devices.get(barcode)
+        scans.append({
+            'device_id': device['id'] if device else None,
+            'job_id': job_id,
+            'barcode': barcode,
+            'scan_timestamp': now,
+            'location': location,
+            'notes': 'Decoded from image' if device else 'Unknown device - decoded from image'
+        })
+        results.append({
+            'barcode': barcode,
+            'success': device is not None,
+            'device': {
+                'id': device['id'],
+                'name': device['name'],
+                'type': device['type'],
+                'status': device['status'],
+                'location': device['location']
+            } if device else None
+        })
+    
+    scan_writer = get_scan_writer()
+    if scan_writer:
+        for scan in scans:
+            scan_writer.submit(scan)
+    else:
+        write_scans(conn, cursor, scans)
+    
+    for device in devices.values():
+        device_cache.touch(device['id'], now)
+    invalidate_responses('scans')
+    return results
+
+@devices_bp.route('/decode', methods=['POST'])
+@require_auth
+def decode_images():
+    """Decode QR codes and 1D barcodes in uploaded camera frames.
+    
+    Frames come as multipart ``frame`` files (several allowed) or as a
+    single raw image body. ``?roi=x,y,w,h`` crops every frame to a region
+    given in fractions; ``?record=true`` also records a scan for every
+    distinct code found (with ``job_id`` and ``location`` form fields).
+    """
+    try:
+        frames = [upload.read() for upload in request.files.getlist('frame')]
+        if not frames and request.mimetype.startswith('image/'):
+            frames = [request.get_data()]
+        frames = [frame for frame in frames if frame]
+        
+        if not frames:
+            return jsonify({'error': 'No image provided'}), 400
+        
+        max_frames = current_app.config['DECODE_MAX_FRAMES']
+        if len(frames) > max_frames:
+            return jsonify({'error': f'Too many frames (max {max_frames})'}), 413
+        
+        try:
+            roi = parse_roi(request.args.get('roi'))
+        except ValueError as e:
+            return jsonify({'error': f'Invalid roi: {e}'}), 400
+        
+        results = get_decode_workers().run(
+            decode_frames,
+            frames,
+            roi,
+            current_app.config['DECODE_MAX_SIDE'],
+            current_app.config['DECODE_MAX_PIXELS']
+        )
+        
+        response = {
+            'frames': [dict(result, index=index) for index, result in enumerate(results)]
+        }
+        
+        record = request.args.get('record', '').lower() in ('1', 'true', 'yes')
+        barcodes = list(dict.fromkeys(
+            code['data'] for result in results for code in result['codes'] if code['data']
+        ))
+        
+        if record and barcodes:
+            conn = get_db_connection()
+            cursor = conn.cursor(dictionary=True)
+            response['scans'] = _record_decoded(
+                cursor,
+                conn,
+                barcodes,
+                request.values.get('job_id', type=int),
+                request.values.get('location', ''),
+                datetime.now()
+            )
+            response['queued'] = get_scan_writer() is not None
+            cursor.close()
+            conn.close()
+        
+        logging.info(f"Decoded {len(barcodes)} code(s) from {len(frames)} frame(s)")
+        
+        return jsonify(response)
+        
+    except WorkersBusy as e:
+        logging.warning(f"Decode rejected: {e}")
+        return jsonify({'error': 'Decoder busy, please retry'}), 503, {'Retry-After': '1'}
+    except ScanQueueFull:
+        logging.warning("Decoded scans rejected, write-behind queue is full")
+        return jsonify({'error': 'Scanner busy, please retry'}), 503, {'Retry-After': '1'}
+    except ImportError:
+        logging.error("Decode requested but pyzbar/Pillow is not installed")
+        return jsonify({'error': 'Image decoding is not available'}), 501
+    except mysql.connector.Error as e:
+        logging.error(f"Database error in decode_images: {e}")
+        return jsonify({'error': 'Database error occurred'}), 500
+    except Exception as e:
+        logging.error(f"Error in decode_images: {e}")
+        return jsonify({'error': 'Decode failed'}), 500
+
 @devices_bp.route('/search', methods=['GET'])
 @require_auth
 def search_devices():
-    """Search devices by barcode, name, or type"""
+    """Search devices by barcode, name, type or location, best matches first"""
     try:
         query = request.args.get('q', '').strip()
         
         if not query:
             return jsonify([])
         
+        limit = min(
+            request.args.get('limit', current_app.config['DEVICE_SEARCH_LIMIT'], type=int),
+            current_app.config['PAGE_SIZE_MAX']
+        )
+        if limit < 1:
+            return jsonify({'error': 'limit must be positive'}), 400
+        
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         
-        search_query = """
-        SELECT * FROM devices 
-        WHERE name LIKE %s 
-           OR barcode LIKE %s 
-           OR type LIKE %s 
-           OR location LIKE %s
-        ORDER BY name
-        LIMIT 20
-        """
-        
-        search_term = f"%{query}%"
-        cursor.execute(search_query, (search_term, search_term, search_term, search_term))
-        results = cursor.fetchall()
+        results = find_devices(cursor, query, limit)
         
-        # Convert datetime objects to ISO format
+        # Warm the barcode index with what the search just loaded
+        device_cache = get_device_cache()
         for device in results:
-            for key, value in device.items():
-                if isinstance(value, datetime):
-                    device[key] = value.isoformat()
+            device_cache.put(device)
         
         cursor.close()
         conn.close()
@@ -314,49 +802,312 @@ def search_devices():
         logging.error(f"Error in search_devices: {e}")
         return jsonify({'error': 'Search failed'}), 500
 
+@devices_bp.route('/suggest', methods=['GET'])
+@require_auth
+def suggest_devices():
+    """Typeahead: devices whose barcode or name starts with ?q= (id, name, barcode only)"""
+    try:
+        query = request.args.get('q', '').strip()
+        
+        if not query:
+            return jsonify([])
+        
+        limit = min(
+            request.args.get('limit', current_app.config['SUGGEST_LIMIT'], type=int),
+            current_app.config['SUGGEST_MAX_LIMIT']
+        )
+        if limit < 1:
+            return jsonify({'error': 'limit must be positive'}), 400
+        
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        
+        suggestions = get_suggester().suggest(cursor, query, limit)
+        
+        cursor.close()
+        conn.close()
+        
+        return jsonify(suggestions)
+        
+    except mysql.connector.Error as e:
+        logging.error(f"Database error in suggest_devices: {e}")
+        return jsonify({'error': 'Database error occurred'}), 500
+    except Exception as e:
+        logging.error(f"Error in suggest_devices: {e}")
+        return jsonify({'error': 'Suggest failed'}), 500
+
+def _batch_items(data, key='devices'):
+    """The item list of a bulk request: a JSON list or {<key>: [...]}"""
+    items = data.get(key) if isinstance(data, dict) else data
+    return items if isinstance(items, list) else None
+
+def _change_job_devices(change, job_id, items):
+    """Run assign_devices/return_devices in one transaction and refresh caches"""
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    
+    user = g.user.get('user', 'unknown')
+    conn.start_transaction()
+    try:
+        results, device_ids, device_count = change(cursor, job_id, items, user, datetime.now())
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+    
+    if device_ids:
+        # Cached rows still carry the old status
+        get_device_cache().invalidate_ids(device_ids)
+        invalidate_responses('devices', 'jobs')
+    return results, device_count
+
+@devices_bp.route('/job/<int:job_id>/device', methods=['POST'])
+@require_auth
+def add_device_to_job(job_id):
+    """Assign one device (barcode or id in ``deviceID``) to a job"""
+    try:
+        data = request.get_json()
+        
+        if not isinstance(data, dict) or not data.get('deviceID'):
+            return jsonify({'error': 'deviceID is required'}), 400
+        
+        results, device_count = _change_job_devices(assign_devices, job_id, [data])
+        result = results[0]
+        
+        if not result['success']:
+            return jsonify({'error': result['error']}), 400
+        
+        logging.info(f"Device {result['deviceID']} assigned to job {job_id}")
+        
+        return jsonify({
+            'success': True,
+            'device': result['device'],
+            'device_count': device_count,
+            'message': 'Device added to job successfully'
+        }), 201
+        
+    except InvalidItem as e:
+        return jsonify({'error': str(e)}), 400
+    except JobNotFound:
+        return jsonify({'error': 'Job not found'}), 404
+    except mysql.connector.Error as e:
+        logging.error(f"Database error in add_device_to_job: {e}")
+        return jsonify({'error': 'Database error occurred'}), 500
+    except Exception as e:
+        logging.error(f"Error in add_device_to_job: {e}")
+        return jsonify({'error': 'Failed to add device to job'}), 500
+
+@devices_bp.route('/job/<int:job_id>/devices', methods=['POST'])
+@require_auth
+def add_devices_to_job(job_id):
+    """Assign a scanned kit of devices to a job in one transaction"""
+    try:
+        items = _batch_items(request.get_json())
+        
+        if not items:
+            return jsonify({'error': 'No devices provided'}), 400
+        
+        max_size = current_app.config['JOB_DEVICES_BATCH_MAX_SIZE']
+        if len(items) > max_size:
+            return jsonify({'error': f'Batch too large (max {max_size} devices)'}), 413
+        
+        results, device_count = _change_job_devices(assign_devices, job_id, items)
+        assigned = sum(1 for result in results if result['success'])
+        
+        logging.info(f"Assigned {assigned} of {len(items)} devices to job {job_id}")
+        
+        return jsonify({
+            'total': len(items),
+            'assigned': assigned,
+            'failed': len(items) - assigned,
+            'device_count': device_count,
+            'results': results
+        })
+        
+    except InvalidItem as e:
+        return jsonify({'error': str(e)}), 400
+    except JobNotFound:
+        return jsonify({'error': 'Job not found'}), 404
+    except mysql.connector.Error as e:
+        logging.error(f"Database error in add_devices_to_job: {e}")
+        return jsonify({'error': 'Database error occurred'}), 500
+    except Exception as e:
+        logging.error(f"Error in add_devices_to_job: {e}")
+        return jsonify({'error': 'Failed to add devices to job'}), 500
+
+@devices_bp.route('/job/<int:job_id>/device/<path:device_id>', methods=['DELETE'])
+@require_auth
+def remove_device_from_job(job_id, device_id):
+    """Return one device (barcode or id) from a job"""
+    try:
+        results, device_count = _change_job_devices(return_devices, job_id, [device_id])
+        result = results[0]
+        
+        if not result['success']:
+            return jsonify({'error': result['error']}), 404
+        
+        logging.info(f"Device {device_id} returned from job {job_id}")
+        
+        return jsonify({
+            'success': True,
+            'device': result['device'],
+            'device_count': device_count,
+            'message': 'Device removed from job successfully'
+        })
+        
+    except InvalidItem as e:
+        return jsonify({'error': str(e)}), 400
+    except JobNotFound:
+        return jsonify({'error': 'Job not found'}), 404
+    except mysql.connector.Error as e:
+        logging.error(f"Database error in remove_device_from_job: {e}")
+        return jsonify({'error': 'Database error occurred'}), 500
+    except Exception as e:
+        logging.error(f"Error in remove_device_from_job: {e}")
+        return jsonify({'error': 'Failed to remove device from job'}), 500
+
+@devices_bp.route('/job/<int:job_id>/devices/return', methods=['POST'])
+@require_auth
+def return_devices_from_job(job_id):
+    """Return a scanned kit of devices from a job in one transaction"""
+    try:
+        items = _batch_items(request.get_json())
+        
+        if not items:
+            return jsonify({'error': 'No devices provided'}), 400
+        
+        max_size = current_app.config['JOB_DEVICES_BATCH_MAX_SIZE']
+        if len(items) > max_size:
+            return jsonify({'error': f'Batch too large (max {max_size} devices)'}), 413
+        
+        results, device_count = _change_job_devices(return_devices, job_id, items)
+        returned = sum(1 for result in results if result['success'])
+        
+        logging.info(f"Returned {returned} of {len(items)} devices from job {job_id}")
+        
+        return jsonify({
+            'total': len(items),
+            'returned': returned,
+            'failed': len(items) - returned,
+            'device_count': device_count,
+            'results': results
+        })
+        
+    except InvalidItem as e:
+        return jsonify({'error': str(e)}), 400
+    except JobNotFound:
+        return jsonify({'error': 'Job not found'}), 404
+    except mysql.connector.Error as e:
+        logging.error(f"Database error in return_devices_from_job: {e}")
+        return jsonify({'error': 'Database error occurred'}), 500
+    except Exception as e:
+        logging.error(f"Error in return_devices_from_job: {e}")
+        return jsonify({'error': 'Failed to return devices from job'}), 500
+
+VERIFY_FIELDS = ('id', 'name', 'type', 'barcode', 'status', 'location')
+
+@devices_bp.route('/verify/<path:identifier>', methods=['GET'])
+@require_auth
+def verify_device(identifier):
+    """Check that a scanned code belongs to a device.
+    
+    Accepts a barcode, a device id or a ``DEVICE:``-prefixed QR payload.
+    A ``DEVICE:`` payload names a device id and is resolved by id only;
+    anything else is looked up barcode first. Answers from the device
+    cache when it can and only takes a database connection on a miss.
+    """
+    try:
+        by_id = identifier.upper().startswith('DEVICE:')
+        if by_id:
+            identifier = identifier[len('DEVICE:'):]
+        identifier = identifier.strip()
+        if not identifier:
+            return jsonify({'error': 'No device identifier provided'}), 400
+        if by_id and not identifier.isdigit():
+            return jsonify({'error': f'Invalid device id: {identifier}'}), 400
+        
+        device_cache = get_device_cache()
+        if by_id:
+            hit, device = device_cache.peek_id(int(identifier))
+        else:
+            hit, device = device_cache.peek(identifier)
+        if not hit:
+            conn = get_db_connection()
+            cursor = conn.cursor(dictionary=True)
+            if by_id:
+                device = device_cache.find_by_id(cursor, int(identifier))
+            else:
+                device = device_cache.find(cursor, identifier)
+            cursor.close()
+            conn.close()
+        
+        if not device:
+            return jsonify({'valid': False, 'device': None})
+        
+        projection = {field: device.get(field) for field in VERIFY_FIELDS}
+        projection['deviceID'] = device['id']
+        return jsonify({'valid': True, 'device': projection})
+        
+    except mysql.connector.Error as e:
+        logging.error(f"Database error in verify_device: {e}")
+        return jsonify({'error': 'Database error occurred'}), 500
+    except Exception as e:
+        logging.error(f"Error in verify_device: {e}")
+        return jsonify({'error': 'Verification failed'}), 500
+
+RECENT_SCANS_LIMIT = 10
+RECENT_SCANS_WINDOWS = (7, 90, None)  # days; None reads every partition
+
+def _recent_scans_query(days):
+    """Newest scans, bounded to the last ``days`` days so older partitions are pruned"""
+    window = "WHERE s.scan_timestamp >= DATE_SUB(CURDATE(), INTERVAL %s DAY)" if days else ""
+    params = (days, RECENT_SCANS_LIMIT) if days else (RECENT_SCANS_LIMIT,)
+    return f"""
+        SELECT d.name, d.barcode, s.scan_timestamp
+        FROM scans s
+        JOIN devices d ON s.device_id = d.id
+        {window}
+        ORDER BY s.scan_timestamp DESC
+        LIMIT %s
+    """, params
+
 @devices_bp.route('/stats', methods=['GET'])
 @require_auth
+@cached_response('devices', 'scans')
 def get_device_stats():
     """Get device statistics"""
     try:
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         
-        # Get status counts
-        cursor.execute("""
-            SELECT status, COUNT(*) as count 
-            FROM devices 
-            GROUP BY status
-        """)
-        status_stats = cursor.fetchall()
-        
-        # Get type counts
-        cursor.execute("""
-            SELECT type, COUNT(*) as count 
-            FROM devices 
-            GROUP BY type
-        """)
-        type_stats = cursor.fetchall()
-        
-        # Get total count
-        cursor.execute("SELECT COUNT(*) as total FROM devices")
-        total_count = cursor.fetchone()['total']
-        
-        # Get recent scans
-        cursor.execute("""
-            SELECT d.name, d.barcode, s.scan_timestamp
-            FROM scans s
-            JOIN devices d ON s.device_id = d.id
-            ORDER BY s.scan_timestamp DESC
-            LIMIT 10
-        """)
-        recent_scans = cursor.fetchall()
-        
-        # Convert datetime objects to ISO format
-        for scan in recent_scans:
-            for key, value in scan.items():
-                if isinstance(value, datetime):
-                    scan[key] = value.isoformat()
+        # Status counts, type counts and recent scans in one round trip; the
+        # 7-day window keeps the scan query on the newest partitions
+        status_stats, type_stats, recent_scans = fetch_result_sets(cursor, [
+            ("""
+                SELECT status, COUNT(*) as count 
+                FROM devices 
+                GROUP BY status
+            """, ()),
+            ("""
+                SELECT type, COUNT(*) as count 
+                FROM devices 
+                GROUP BY type
+            """, ()),
+            _recent_scans_query(RECENT_SCANS_WINDOWS[0])
+        ])
+        
+        # A quiet week: widen the window until there are enough scans
+        for days in RECENT_SCANS_WINDOWS[1:]:
+            if len(recent_scans) >= RECENT_SCANS_LIMIT:
+                break
+            cursor.execute(*_recent_scans_query(days))
+            recent_scans = cursor.fetchall()
+        
+        # Every device has exactly one status
+        total_count = sum(row['count'] for row in status_stats)
         
         cursor.close()
         conn.close()
@@ -1,4 +1,12 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, current_app
+
+from ..utils.db import get_pool
+from ..utils.device_cache import get_device_cache
+from ..utils.scan_writer import get_scan_writer
+from ..utils.response_cache import get_response_cache
+from ..utils.suggest import get_suggester
+from ..utils.labels import get_label_cache, get_label_workers
+from ..utils.decode import get_decode_workers
 
 health_bp = Blueprint('health', __name__)
 
@@ -9,4 +17,44 @@ def health_check():
     return jsonify({
         'status': 'healthy',
         'message': 'API is running'
-    })
\ No newline at end of file
+    })
+
+@health_bp.route('/health/pool', methods=['GET'])
+def pool_stats():
+    """Database connection pool counters"""
+    return jsonify(get_pool().stats())
+
+@health_bp.route('/health/queries', methods=['GET'])
+def query_stats():
+    """Database round trips per endpoint"""
+    return jsonify(current_app.extensions['query_stats'].snapshot())
+
+@health_bp.route('/health/cache', methods=['GET'])
+def cache_stats():
+    """Device, typeahead and response cache hit/miss/eviction counters"""
+    return jsonify({
+        'devices': get_device_cache().stats(),
+        'suggest': get_suggester().stats(),
+        'responses': get_response_cache().stats()
+    })
+
+@health_bp.route('/health/scan-queue', methods=['GET'])
+def scan_queue_stats():
+    """Write-behind scan queue counters"""
+    writer = get_scan_writer()
+    if writer is None:
+        return jsonify({'enabled': False})
+    return jsonify(dict(writer.stats(), enabled=True))
+
+@health_bp.route('/health/labels', methods=['GET'])
+def label_stats():
+    """Label image cache and label sheet pool counters"""
+    return jsonify({
+        'cache': get_label_cache().stats(),
+        'workers': get_label_workers().stats()
+    })
+
+@health_bp.route('/health/decode', methods=['GET'])
+def decode_stats():
+    """Image decoding pool counters"""
+    return jsonify(get_decode_workers().stats())
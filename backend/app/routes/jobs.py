@@ -1,35 +1,34 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 import mysql.connector
-import os
 from datetime import datetime
 import logging
+from ..utils.db import get_db_connection, fetch_result_sets
+from ..utils.auth import require_auth
+from ..utils.response_cache import cached_response, invalidate_responses
+from ..utils.pagination import get_page_size, encode_cursor, decode_cursor, page_body, InvalidCursor
+from ..utils.job_ids import allocate_job_ids
+from ..utils.manifest import job_manifest
 
 jobs_bp = Blueprint('jobs', __name__)
 
-def get_db_connection():
-    """Get database connection"""
-    try:
-        return mysql.connector.connect(
-            host=os.getenv('MYSQL_HOST'),
-            user=os.getenv('MYSQL_USER'),
-            password=os.getenv('MYSQL_PASSWORD'),
-            database=os.getenv('MYSQL_DATABASE'),
-            connect_timeout=10,
-            autocommit=True
-        )
-    except Exception as e:
-        logging.error(f"Database connection failed: {e}")
-        raise
+JOB_INSERT = """
+INSERT INTO jobs (jobID, kunde, title, description, status, startDate, endDate, device_count, created_at) 
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
 
-def require_auth(f):
-    """Decorator to require authentication"""
-    def decorated_function(*args, **kwargs):
-        token = request.headers.get('Authorization')
-        if not token or not token.startswith('Bearer '):
-            return jsonify({'error': 'Authentication required'}), 401
-        return f(*args, **kwargs)
-    decorated_function.__name__ = f.__name__
-    return decorated_function
+def job_values(data, job_id, created_at):
+    """Parameters for JOB_INSERT from a request body"""
+    return (
+        job_id,
+        data.get('kunde', ''),
+        data.get('title'),
+        data.get('description', ''),
+        data.get('status', 'pending'),
+        data.get('startDate'),
+        data.get('endDate'),
+        data.get('device_count', 0),
+        created_at
+    )
 
 @jobs_bp.route('/', methods=['GET'])
 @require_auth
@@ -41,36 +40,47 @@ def get_jobs():
         
         # Get query parameters
         status = request.args.get('status')
-        limit = request.args.get('limit', type=int)
-        offset = request.args.get('offset', 0, type=int)
+        limit = get_page_size()
+        cursor_param = request.args.get('cursor')
         
-        # Build query
+        # Build query (keyset pagination on created_at, id)
         query = "SELECT * FROM jobs"
         params = []
+        conditions = []
         
         if status:
-            query += " WHERE status = %s"
+            conditions.append("status = %s")
             params.append(status)
-            
-        query += " ORDER BY created_at DESC"
         
-        if limit:
-            query += " LIMIT %s OFFSET %s"
-            params.extend([limit, offset])
+        if cursor_param:
+            try:
+                created_at, last_id = decode_cursor(cursor_param, 2)
+                created_at = datetime.fromisoformat(created_at)
+            except (InvalidCursor, TypeError, ValueError):
+                cursor.close()
+                conn.close()
+                return jsonify({'error': 'Invalid cursor'}), 400
+            conditions.append("(created_at < %s OR (created_at = %s AND id < %s))")
+            params.extend([created_at, created_at, last_id])
+        
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+            
+        query += " ORDER BY created_at DESC, id DESC LIMIT %s"
+        params.append(limit + 1)
         
         cursor.execute(query, params)
         jobs = cursor.fetchall()
         
-        # Convert datetime objects to ISO format
-        for job in jobs:
-            for key, value in job.items():
-                if isinstance(value, datetime):
-                    job[key] = value.isoformat()
+        next_cursor = None
+        if len(jobs) > limit:
+            jobs = jobs[:limit]
+            next_cursor = encode_cursor(jobs[-1]['created_at'].isoformat(), jobs[-1]['id'])
         
         cursor.close()
         conn.close()
         
-        return jsonify(jobs)
+        return jsonify(page_body(jobs, next_cursor))
         
     except mysql.connector.Error as e:
         logging.error(f"Database error in get_jobs: {e}")
@@ -82,27 +92,20 @@ def get_jobs():
 @jobs_bp.route('/<int:job_id>', methods=['GET'])
 @require_auth
 def get_job(job_id):
-    """Get specific job"""
+    """Get specific job with its devices"""
     try:
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         
-        cursor.execute("SELECT * FROM jobs WHERE id = %s", (job_id,))
-        job = cursor.fetchone()
+        manifest = job_manifest(cursor, job_id)
         
-        if job:
-            # Convert datetime objects to ISO format
-            for key, value in job.items():
-                if isinstance(value, datetime):
-                    job[key] = value.isoformat()
-            
-            cursor.close()
-            conn.close()
-            return jsonify(job)
-        else:
-            cursor.close()
-            conn.close()
+        cursor.close()
+        conn.close()
+        
+        if manifest is None:
             return jsonify({'error': 'Job not found'}), 404
+        
+        return jsonify(dict(manifest['job'], devices=manifest['devices'], device_counts=manifest['counts']))
             
     except mysql.connector.Error as e:
         logging.error(f"Database error in get_job: {e}")
@@ -130,38 +133,24 @@ def create_job():
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        # Generate job ID if not provided
+        # Generated job IDs come from the per-day sequence, reserved in the
+        # same transaction as the INSERT
         job_id = data.get('jobID')
-        if not job_id:
-            # Generate job ID based on current date and sequence
-            cursor.execute("SELECT COUNT(*) as count FROM jobs WHERE DATE(created_at) = CURDATE()")
-            result = cursor.fetchone()
-            daily_count = result[0] + 1
-            job_id = f"JOB{datetime.now().strftime('%Y%m%d')}{daily_count:03d}"
-        
-        query = """
-        INSERT INTO jobs (jobID, kunde, title, description, status, startDate, endDate, device_count, created_at) 
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """
-        
-        values = (
-            job_id,
-            data.get('kunde', ''),
-            data.get('title'),
-            data.get('description', ''),
-            data.get('status', 'pending'),
-            data.get('startDate'),
-            data.get('endDate'),
-            data.get('device_count', 0),
-            datetime.now()
-        )
-        
-        cursor.execute(query, values)
-        new_job_id = cursor.lastrowid
+        conn.start_transaction()
+        try:
+            if not job_id:
+                job_id = allocate_job_ids(cursor)[0]
+            cursor.execute(JOB_INSERT, job_values(data, job_id, datetime.now()))
+            new_job_id = cursor.lastrowid
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
         
         cursor.close()
         conn.close()
         
+        invalidate_responses('jobs')
         logging.info(f"Job created: {job_id} (ID: {new_job_id})")
         
         return jsonify({
@@ -170,6 +159,9 @@ def create_job():
             'message': 'Job created successfully'
         }), 201
         
+    except mysql.connector.IntegrityError as e:
+        logging.warning(f"Duplicate job in create_job: {e}")
+        return jsonify({'error': 'jobID already exists'}), 409
     except mysql.connector.Error as e:
         logging.error(f"Database error in create_job: {e}")
         return jsonify({'error': 'Database error occurred'}), 500
@@ -177,6 +169,71 @@ def create_job():
         logging.error(f"Error in create_job: {e}")
         return jsonify({'error': 'Failed to create job'}), 500
 
+@jobs_bp.route('/import', methods=['POST'])
+@require_auth
+def import_jobs():
+    """Create many jobs at once; missing jobIDs are generated as one block"""
+    try:
+        data = request.get_json()
+        
+        if isinstance(data, dict):
+            items = data.get('jobs')
+        else:
+            items = data
+        
+        if not isinstance(items, list) or not items:
+            return jsonify({'error': 'No jobs provided'}), 400
+        
+        max_size = current_app.config['JOB_IMPORT_MAX_SIZE']
+        if len(items) > max_size:
+            return jsonify({'error': f'Import too large (max {max_size} jobs)'}), 413
+        
+        for index, item in enumerate(items):
+            if not isinstance(item, dict) or not item.get('title'):
+                return jsonify({'error': f'title is required (job {index})'}), 400
+        
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        now = datetime.now()
+        missing = [index for index, item in enumerate(items) if not item.get('jobID')]
+        job_ids = [item.get('jobID') for item in items]
+        
+        conn.start_transaction()
+        try:
+            if missing:
+                for index, job_id in zip(missing, allocate_job_ids(cursor, len(missing))):
+                    job_ids[index] = job_id
+            cursor.executemany(JOB_INSERT, [
+                job_values(item, job_id, now) for item, job_id in zip(items, job_ids)
+            ])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        
+        cursor.close()
+        conn.close()
+        
+        invalidate_responses('jobs')
+        logging.info(f"Imported {len(items)} jobs ({len(missing)} generated IDs)")
+        
+        return jsonify({
+            'imported': len(items),
+            'jobIDs': job_ids,
+            'message': 'Jobs imported successfully'
+        }), 201
+        
+    except mysql.connector.IntegrityError as e:
+        logging.warning(f"Duplicate job in import_jobs: {e}")
+        return jsonify({'error': 'jobID already exists'}), 409
+    except mysql.connector.Error as e:
+        logging.error(f"Database error in import_jobs: {e}")
+        return jsonify({'error': 'Database error occurred'}), 500
+    except Exception as e:
+        logging.error(f"Error in import_jobs: {e}")
+        return jsonify({'error': 'Failed to import jobs'}), 500
+
 @jobs_bp.route('/<int:job_id>', methods=['PUT'])
 @require_auth
 def update_job(job_id):
@@ -224,6 +281,7 @@ def update_job(job_id):
         cursor.close()
         conn.close()
         
+        invalidate_responses('jobs')
         logging.info(f"Job updated: {job_id}")
         
         return jsonify({'message': 'Job updated successfully'})
@@ -252,12 +310,21 @@ def delete_job(job_id):
             conn.close()
             return jsonify({'error': 'Job not found'}), 404
         
-        # Delete the job
-        cursor.execute("DELETE FROM jobs WHERE id = %s", (job_id,))
+        # Delete the job; scans keep their rows but lose the reference
+        # (the partitioned scans table has no foreign keys to do it)
+        conn.start_transaction()
+        try:
+            cursor.execute("UPDATE scans SET job_id = NULL WHERE job_id = %s", (job_id,))
+            cursor.execute("DELETE FROM jobs WHERE id = %s", (job_id,))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
         
         cursor.close()
         conn.close()
         
+        invalidate_responses('jobs', 'scans')
         logging.info(f"Job deleted: {job[0]} (ID: {job_id})")
         
         return jsonify({'message': 'Job deleted successfully'})
@@ -271,33 +338,32 @@ def delete_job(job_id):
 
 @jobs_bp.route('/stats', methods=['GET'])
 @require_auth
+@cached_response('jobs')
 def get_job_stats():
     """Get job statistics"""
     try:
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         
-        # Get status counts
-        cursor.execute("""
-            SELECT status, COUNT(*) as count 
-            FROM jobs 
-            GROUP BY status
-        """)
-        status_stats = cursor.fetchall()
-        
-        # Get total count
-        cursor.execute("SELECT COUNT(*) as total FROM jobs")
-        total_count = cursor.fetchone()['total']
-        
-        # Get recent activity (last 7 days)
-        cursor.execute("""
-            SELECT DATE(created_at) as date, COUNT(*) as count
-            FROM jobs 
-            WHERE created_at >= DATE_SUB(NOW(), INTERVAL 7 DAY)
-            GROUP BY DATE(created_at)
-            ORDER BY date DESC
-        """)
-        recent_activity = cursor.fetchall()
+        # Status counts (WITH ROLLUP adds the total) and recent activity
+        # (last 7 days) in one round trip
+        status_stats, recent_activity = fetch_result_sets(cursor, [
+            ("""
+                SELECT status, COUNT(*) as count 
+                FROM jobs 
+                GROUP BY status WITH ROLLUP
+            """, ()),
+            ("""
+                SELECT DATE(created_at) as date, COUNT(*) as count
+                FROM jobs 
+                WHERE created_at >= DATE_SUB(NOW(), INTERVAL 7 DAY)
+                GROUP BY DATE(created_at)
+                ORDER BY date DESC
+            """, ())
+        ])
+        
+        # The rollup row (status NULL) carries the total
+        total_count = status_stats.pop()['count'] if status_stats else 0
         
         cursor.close()
         conn.close()
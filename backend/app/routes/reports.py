@@ -1,89 +1,54 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
 import mysql.connector
-import os
-from datetime import datetime, timedelta
+from datetime import date, datetime
 import logging
+import os
+from ..utils.db import get_db_connection, fetch_result_sets
+from ..utils.auth import require_auth
+from ..utils.streaming import json_response, Rows
+from ..utils.export import export_response, CSV_MIMETYPE
+from ..utils.response_cache import cached_response
+from ..utils.dates import parse_day, parse_timestamp, day_bounds, date_range_args, day_or_range_args
+from ..utils.manifest import job_manifest
+from ..utils.scan_history import iter_archive_csv, list_archives
 
 reports_bp = Blueprint('reports', __name__)
 
-def get_db_connection():
-    """Get database connection"""
-    try:
-        return mysql.connector.connect(
-            host=os.getenv('MYSQL_HOST'),
-            user=os.getenv('MYSQL_USER'),
-            password=os.getenv('MYSQL_PASSWORD'),
-            database=os.getenv('MYSQL_DATABASE'),
-            connect_timeout=10,
-            autocommit=True
-        )
-    except Exception as e:
-        logging.error(f"Database connection failed: {e}")
-        raise
-
-def require_auth(f):
-    """Decorator to require authentication"""
-    def decorated_function(*args, **kwargs):
-        token = request.headers.get('Authorization')
-        if not token or not token.startswith('Bearer '):
-            return jsonify({'error': 'Authentication required'}), 401
-        return f(*args, **kwargs)
-    decorated_function.__name__ = f.__name__
-    return decorated_function
-
 @reports_bp.route('/summary', methods=['GET'])
 @require_auth
+@cached_response('jobs', 'devices', 'scans')
 def get_summary():
     """Get summary report"""
     try:
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         
-        # Get job counts by status
-        cursor.execute("""
-            SELECT status, COUNT(*) as count 
-            FROM jobs 
-            GROUP BY status
-        """)
-        job_stats = cursor.fetchall()
-        
-        # Get device counts by status
-        cursor.execute("""
-            SELECT status, COUNT(*) as count 
-            FROM devices 
-            GROUP BY status
-        """)
-        device_stats = cursor.fetchall()
-        
-        # Get recent jobs (last 10)
-        cursor.execute("""
-            SELECT id, jobID, kunde, title, status, created_at
-            FROM jobs 
-            ORDER BY created_at DESC 
-            LIMIT 10
-        """)
-        recent_jobs = cursor.fetchall()
-        
-        # Get scan activity (last 7 days)
-        cursor.execute("""
-            SELECT DATE(scan_timestamp) as date, COUNT(*) as scan_count
-            FROM scans 
-            WHERE scan_timestamp >= DATE_SUB(NOW(), INTERVAL 7 DAY)
-            GROUP BY DATE(scan_timestamp)
-            ORDER BY date DESC
-        """)
-        scan_activity = cursor.fetchall()
-        
-        # Convert datetime objects to ISO format
-        for job in recent_jobs:
-            for key, value in job.items():
-                if isinstance(value, datetime):
-                    job[key] = value.isoformat()
-        
-        for activity in scan_activity:
-            for key, value in activity.items():
-                if isinstance(value, datetime):
-                    activity[key] = value.isoformat()
+        # Job counts, device counts, recent jobs (last 10) and scan activity
+        # (last 7 days, from the daily rollup) in one round trip
+        job_stats, device_stats, recent_jobs, scan_activity = fetch_result_sets(cursor, [
+            ("""
+                SELECT status, COUNT(*) as count 
+                FROM jobs 
+                GROUP BY status
+            """, ()),
+            ("""
+                SELECT status, COUNT(*) as count 
+                FROM devices 
+                GROUP BY status
+            """, ()),
+            ("""
+                SELECT id, jobID, kunde, title, status, created_at
+                FROM jobs 
+                ORDER BY created_at DESC 
+                LIMIT 10
+            """, ()),
+            ("""
+                SELECT scan_date as date, scan_count
+                FROM scan_daily_stats 
+                WHERE scan_date >= DATE_SUB(CURDATE(), INTERVAL 7 DAY)
+                ORDER BY scan_date DESC
+            """, ())
+        ])
         
         cursor.close()
         conn.close()
@@ -104,54 +69,33 @@ def get_summary():
         return jsonify({'error': 'Failed to generate summary'}), 500
 
 @reports_bp.route('/daily', methods=['GET'])
+@cached_response('jobs', 'devices', 'scans')
 def get_daily_report():
     """Get daily activity report"""
     try:
-        date_str = request.args.get('date', datetime.now().strftime('%Y-%m-%d'))
-        
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        # Get jobs created on this date
-        cursor.execute("""
-            SELECT * FROM jobs 
-            WHERE DATE(created_at) = %s
-            ORDER BY created_at DESC
-        """, (date_str,))
-        jobs = cursor.fetchall()
-        
-        # Get scans on this date
-        cursor.execute("""
-            SELECT s.*, d.name as device_name, d.type as device_type
-            FROM scans s
-            LEFT JOIN devices d ON s.device_id = d.id
-            WHERE DATE(s.scan_timestamp) = %s
-            ORDER BY s.scan_timestamp DESC
-        """, (date_str,))
-        scans = cursor.fetchall()
-        
-        # Convert datetime objects to ISO format
-        for job in jobs:
-            for key, value in job.items():
-                if isinstance(value, datetime):
-                    job[key] = value.isoformat()
-        
-        for scan in scans:
-            for key, value in scan.items():
-                if isinstance(value, datetime):
-                    scan[key] = value.isoformat()
-        
-        cursor.close()
-        conn.close()
-        
-        return jsonify({
-            'date': date_str,
-            'jobs': jobs,
-            'scans': scans,
-            'job_count': len(jobs),
-            'scan_count': len(scans)
-        })
-        
+        day = parse_day(request.args.get('date'), date.today())
+        start, end = day_bounds(day)
+        
+        return json_response([
+            ('date', day.isoformat()),
+            # Jobs created on this date
+            ('jobs', Rows("""
+                SELECT * FROM jobs 
+                WHERE created_at >= %s AND created_at < %s
+                ORDER BY created_at DESC
+            """, (start, end), count_key='job_count')),
+            # Scans on this date
+            ('scans', Rows("""
+                SELECT s.*, d.name as device_name, d.type as device_type
+                FROM scans s
+                LEFT JOIN devices d ON s.device_id = d.id
+                WHERE s.scan_timestamp >= %s AND s.scan_timestamp < %s
+                ORDER BY s.scan_timestamp DESC
+            """, (start, end), count_key='scan_count'))
+        ])
+        
+    except ValueError as e:
+        return jsonify({'error': f'Invalid date: {e}'}), 400
     except mysql.connector.Error as e:
         logging.error(f"Database error in get_daily_report: {e}")
         return jsonify({'error': 'Database error occurred'}), 500
@@ -161,179 +105,316 @@ def get_daily_report():
 
 @reports_bp.route('/devices', methods=['GET'])
 @require_auth
+@cached_response('devices', 'scans')
 def get_device_report():
     """Get device usage report"""
     try:
-        # Get date range parameters
-        start_date = request.args.get('start_date', (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d'))
-        end_date = request.args.get('end_date', datetime.now().strftime('%Y-%m-%d'))
+        # Get date range parameters (inclusive days)
+        start_date, end_date = date_range_args(request.args)
+        
+        return json_response([
+            ('start_date', start_date.isoformat()),
+            ('end_date', end_date.isoformat()),
+            # Device usage statistics (from the per-device daily rollup)
+            ('device_usage', Rows("""
+                SELECT 
+                    d.id,
+                    d.name,
+                    d.type,
+                    d.status,
+                    d.location,
+                    COALESCE(u.scan_count, 0) as scan_count,
+                    u.last_scan
+                FROM devices d
+                LEFT JOIN (
+                    SELECT device_id, SUM(scan_count) as scan_count, MAX(last_scan) as last_scan
+                    FROM device_daily_stats
+                    WHERE scan_date BETWEEN %s AND %s
+                    GROUP BY device_id
+                ) u ON d.id = u.device_id
+                ORDER BY scan_count DESC, d.name
+            """, (start_date, end_date))),
+            # Most active devices
+            ('most_active_devices', Rows("""
+                SELECT 
+                    d.name,
+                    d.type,
+                    SUM(u.scan_count) as scan_count
+                FROM device_daily_stats u
+                JOIN devices d ON d.id = u.device_id
+                WHERE u.scan_date BETWEEN %s AND %s
+                GROUP BY d.id, d.name, d.type
+                ORDER BY scan_count DESC
+                LIMIT 10
+            """, (start_date, end_date))),
+            # Devices by status
+            ('status_breakdown', Rows("""
+                SELECT status, COUNT(*) as count 
+                FROM devices 
+                GROUP BY status
+            """)),
+            ('generated_at', datetime.now().isoformat())
+        ])
+        
+    except ValueError as e:
+        return jsonify({'error': f'Invalid date: {e}'}), 400
+    except mysql.connector.Error as e:
+        logging.error(f"Database error in get_device_report: {e}")
+        return jsonify({'error': 'Database error occurred'}), 500
+    except Exception as e:
+        logging.error(f"Error in get_device_report: {e}")
+        return jsonify({'error': 'Failed to generate device report'}), 500
+
+@reports_bp.route('/jobs', methods=['GET'])
+@require_auth
+@cached_response('jobs')
+def get_job_report():
+    """Get job performance report"""
+    try:
+        # Get date range parameters (inclusive days)
+        start_date, end_date = date_range_args(request.args)
+        start, end = day_bounds(start_date, end_date)
+        
+        return json_response([
+            ('start_date', start_date.isoformat()),
+            ('end_date', end_date.isoformat()),
+            # Jobs in date range
+            ('jobs', Rows("""
+                SELECT 
+                    jobID,
+                    kunde,
+                    title,
+                    status,
+                    startDate,
+                    endDate,
+                    device_count,
+                    created_at,
+                    DATEDIFF(endDate, startDate) as duration_days
+                FROM jobs 
+                WHERE created_at >= %s AND created_at < %s
+                ORDER BY created_at DESC
+            """, (start, end), count_key='total_jobs')),
+            # Job statistics
+            ('job_statistics', Rows("""
+                SELECT 
+                    status,
+                    COUNT(*) as count,
+                    AVG(device_count) as avg_devices,
+                    AVG(DATEDIFF(endDate, startDate)) as avg_duration
+                FROM jobs 
+                WHERE created_at >= %s AND created_at < %s
+                GROUP BY status
+            """, (start, end))),
+            # Customer statistics
+            ('customer_statistics', Rows("""
+                SELECT 
+                    kunde,
+                    COUNT(*) as job_count,
+                    SUM(device_count) as total_devices
+                FROM jobs 
+                WHERE created_at >= %s AND created_at < %s
+                GROUP BY kunde
+                ORDER BY job_count DESC
+                LIMIT 10
+            """, (start, end))),
+            ('generated_at', datetime.now().isoformat())
+        ])
+        
+    except ValueError as e:
+        return jsonify({'error': f'Invalid date: {e}'}), 400
+    except mysql.connector.Error as e:
+        logging.error(f"Database error in get_job_report: {e}")
+        return jsonify({'error': 'Database error occurred'}), 500
+    except Exception as e:
+        logging.error(f"Error in get_job_report: {e}")
+        return jsonify({'error': 'Failed to generate job report'}), 500
+
+@reports_bp.route('/job/<int:job_id>/devices', methods=['GET'])
+@require_auth
+def get_job_manifest(job_id):
+    """Job manifest: the job, its devices by assignment status and each device's latest scan.
+    
+    ``?since=<as_of of the previous response>`` returns only devices that
+    changed or were scanned since then, for live load-out refreshes.
+    """
+    try:
+        since = parse_timestamp(request.args.get('since'))
         
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         
-        # Get device usage statistics
-        cursor.execute("""
-            SELECT 
-                d.id,
-                d.name,
-                d.type,
-                d.status,
-                d.location,
-                COUNT(s.id) as scan_count,
-                MAX(s.scan_timestamp) as last_scan
-            FROM devices d
-            LEFT JOIN scans s ON d.id = s.device_id 
-                AND s.scan_timestamp BETWEEN %s AND %s
-            GROUP BY d.id, d.name, d.type, d.status, d.location
-            ORDER BY scan_count DESC, d.name
-        """, (start_date, end_date))
-        device_usage = cursor.fetchall()
-        
-        # Get most active devices
-        cursor.execute("""
-            SELECT 
-                d.name,
-                d.type,
-                COUNT(s.id) as scan_count
-            FROM devices d
-            JOIN scans s ON d.id = s.device_id
-            WHERE s.scan_timestamp BETWEEN %s AND %s
-            GROUP BY d.id, d.name, d.type
-            ORDER BY scan_count DESC
-            LIMIT 10
-        """, (start_date, end_date))
-        most_active = cursor.fetchall()
-        
-        # Get devices by status
-        cursor.execute("""
-            SELECT status, COUNT(*) as count 
-            FROM devices 
-            GROUP BY status
-        """)
-        status_breakdown = cursor.fetchall()
-        
-        # Convert datetime objects to ISO format
-        for device in device_usage:
-            for key, value in device.items():
-                if isinstance(value, datetime):
-                    device[key] = value.isoformat()
+        manifest = job_manifest(cursor, job_id, since)
         
         cursor.close()
         conn.close()
         
-        return jsonify({
-            'start_date': start_date,
-            'end_date': end_date,
-            'device_usage': device_usage,
-            'most_active_devices': most_active,
-            'status_breakdown': status_breakdown,
-            'generated_at': datetime.now().isoformat()
-        })
+        if manifest is None:
+            return jsonify({'error': 'Job not found'}), 404
+        
+        manifest['generated_at'] = datetime.now().isoformat()
+        return jsonify(manifest)
         
+    except ValueError as e:
+        return jsonify({'error': f'Invalid since: {e}'}), 400
     except mysql.connector.Error as e:
-        logging.error(f"Database error in get_device_report: {e}")
+        logging.error(f"Database error in get_job_manifest: {e}")
         return jsonify({'error': 'Database error occurred'}), 500
     except Exception as e:
-        logging.error(f"Error in get_device_report: {e}")
-        return jsonify({'error': 'Failed to generate device report'}), 500
+        logging.error(f"Error in get_job_manifest: {e}")
+        return jsonify({'error': 'Failed to generate job manifest'}), 500
 
-@reports_bp.route('/jobs', methods=['GET'])
+@reports_bp.route('/archive', methods=['GET'])
 @require_auth
-def get_job_report():
-    """Get job performance report"""
+def get_scan_archives():
+    """List the months of scans moved out of MySQL into archive files"""
     try:
-        # Get date range parameters
-        start_date = request.args.get('start_date', (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d'))
-        end_date = request.args.get('end_date', datetime.now().strftime('%Y-%m-%d'))
-        
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         
-        # Get jobs in date range
-        cursor.execute("""
-            SELECT 
-                jobID,
-                kunde,
-                title,
-                status,
-                startDate,
-                endDate,
-                device_count,
-                created_at,
-                DATEDIFF(endDate, startDate) as duration_days
-            FROM jobs 
-            WHERE created_at BETWEEN %s AND %s
-            ORDER BY created_at DESC
-        """, (start_date, end_date))
-        jobs = cursor.fetchall()
-        
-        # Get job statistics
-        cursor.execute("""
-            SELECT 
-                status,
-                COUNT(*) as count,
-                AVG(device_count) as avg_devices,
-                AVG(DATEDIFF(endDate, startDate)) as avg_duration
-            FROM jobs 
-            WHERE created_at BETWEEN %s AND %s
-            GROUP BY status
-        """, (start_date, end_date))
-        job_stats = cursor.fetchall()
-        
-        # Get customer statistics
-        cursor.execute("""
-            SELECT 
-                kunde,
-                COUNT(*) as job_count,
-                SUM(device_count) as total_devices
-            FROM jobs 
-            WHERE created_at BETWEEN %s AND %s
-            GROUP BY kunde
-            ORDER BY job_count DESC
-            LIMIT 10
-        """, (start_date, end_date))
-        customer_stats = cursor.fetchall()
-        
-        # Convert datetime objects to ISO format
-        for job in jobs:
-            for key, value in job.items():
-                if isinstance(value, datetime):
-                    job[key] = value.isoformat()
+        archives = list_archives(cursor)
         
         cursor.close()
         conn.close()
         
         return jsonify({
-            'start_date': start_date,
-            'end_date': end_date,
-            'jobs': jobs,
-            'job_statistics': job_stats,
-            'customer_statistics': customer_stats,
-            'total_jobs': len(jobs),
-            'generated_at': datetime.now().isoformat()
+            'archives': archives,
+            'total_scans': sum(row['row_count'] for row in archives)
         })
         
     except mysql.connector.Error as e:
-        logging.error(f"Database error in get_job_report: {e}")
+        logging.error(f"Database error in get_scan_archives: {e}")
         return jsonify({'error': 'Database error occurred'}), 500
     except Exception as e:
-        logging.error(f"Error in get_job_report: {e}")
-        return jsonify({'error': 'Failed to generate job report'}), 500
+        logging.error(f"Error in get_scan_archives: {e}")
+        return jsonify({'error': 'Failed to list scan archives'}), 500
+
+@reports_bp.route('/archive/scans', methods=['GET'])
+@require_auth
+def export_archived_scans():
+    """Archived scans of a ?date= or ?start_date=&end_date= range as CSV.
+    
+    Read on demand from the monthly archive files; no database access.
+    """
+    try:
+        start_date, end_date = day_or_range_args(request.args)
+        start, end = day_bounds(start_date, end_date)
+        
+        directory = os.path.abspath(current_app.config['SCAN_ARCHIVE_DIR'])
+        filename = f'archived_scans_{start_date}_{end_date}'
+        
+        return Response(
+            stream_with_context(iter_archive_csv(directory, start, end)),
+            mimetype=f'{CSV_MIMETYPE}; charset=utf-8',
+            headers={'Content-Disposition': f'attachment; filename="{filename}.csv"'}
+        )
+        
+    except ValueError as e:
+        return jsonify({'error': f'Invalid date: {e}'}), 400
+    except Exception as e:
+        logging.error(f"Error in export_archived_scans: {e}")
+        return jsonify({'error': 'Archive export failed'}), 500
+
+EXPORT_FORMATS = ('csv', 'xlsx')
 
 @reports_bp.route('/export/<report_type>', methods=['GET'])
 @require_auth
 def export_report(report_type):
-    """Export report as CSV"""
+    """Export report as CSV (streamed) or XLSX"""
     try:
-        # This would implement CSV export functionality
-        # For now, return JSON with export info
-        return jsonify({
-            'message': f'Export functionality for {report_type} reports will be implemented',
-            'report_type': report_type,
-            'format': 'CSV',
-            'status': 'pending_implementation'
-        })
-        
+        export_format = request.args.get('format', 'csv').lower()
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({'error': f'Unsupported format: {export_format}'}), 400
+        
+        today = date.today()
+        
+        if report_type == 'summary':
+            query = """
+                SELECT 'jobs' as section, status as name, COUNT(*) as count
+                FROM jobs GROUP BY status
+                UNION ALL
+                SELECT 'devices', status, COUNT(*)
+                FROM devices GROUP BY status
+                UNION ALL
+                SELECT 'scans', scan_date, scan_count
+                FROM scan_daily_stats
+                WHERE scan_date >= DATE_SUB(CURDATE(), INTERVAL 7 DAY)
+            """
+            params = ()
+            filename = f'summary_{today.isoformat()}'
+        
+        elif report_type == 'daily':
+            start_date, end_date = day_or_range_args(request.args)
+            query = """
+                SELECT s.id, s.scan_timestamp, s.barcode, s.device_id,
+                       d.name as device_name, d.type as device_type,
+                       s.job_id, s.location, s.scanned_by, s.notes
+                FROM scans s
+                LEFT JOIN devices d ON s.device_id = d.id
+                WHERE s.scan_timestamp >= %s AND s.scan_timestamp < %s
+                ORDER BY s.scan_timestamp
+            """
+            params = day_bounds(start_date, end_date)
+            filename = f'scans_{start_date}_{end_date}'
+        
+        elif report_type == 'devices':
+            start_date, end_date = date_range_args(request.args)
+            query = """
+                SELECT 
+                    d.id,
+                    d.name,
+                    d.type,
+                    d.barcode,
+                    d.status,
+                    d.location,
+                    COALESCE(u.scan_count, 0) as scan_count,
+                    u.last_scan
+                FROM devices d
+                LEFT JOIN (
+                    SELECT device_id, SUM(scan_count) as scan_count, MAX(last_scan) as last_scan
+                    FROM device_daily_stats
+                    WHERE scan_date BETWEEN %s AND %s
+                    GROUP BY device_id
+                ) u ON d.id = u.device_id
+                ORDER BY d.name
+            """
+            params = (start_date, end_date)
+            filename = f'devices_{start_date}_{end_date}'
+        
+        elif report_type == 'jobs':
+            start_date, end_date = date_range_args(request.args)
+            query = """
+                SELECT 
+                    jobID,
+                    kunde,
+                    title,
+                    status,
+                    startDate,
+                    endDate,
+                    device_count,
+                    created_at,
+                    DATEDIFF(endDate, startDate) as duration_days
+                FROM jobs 
+                WHERE created_at >= %s AND created_at < %s
+                ORDER BY created_at DESC
+            """
+            params = day_bounds(start_date, end_date)
+            filename = f'jobs_{start_date}_{end_date}'
+        
+        else:
+            return jsonify({'error': f'Unknown report type: {report_type}'}), 404
+        
+        logging.info(f"Exporting {report_type} report as {export_format}")
+        
+        return export_response(query, params, filename, export_format)
+        
+    except ValueError as e:
+        return jsonify({'error': f'Invalid date: {e}'}), 400
+    except ImportError:
+        logging.error("XLSX export requested but openpyxl is not installed")
+        return jsonify({'error': 'XLSX export is not available'}), 501
+    except mysql.connector.Error as e:
+        logging.error(f"Database error in export_report: {e}")
+        return jsonify({'error': 'Database error occurred'}), 500
     except Exception as e:
         logging.error(f"Error in export_report: {e}")
         return jsonify({'error': 'Export failed'}), 500
\ No newline at end of file
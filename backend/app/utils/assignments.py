@@ -0,0 +1,216 @@
+from .db import placeholders
+from .device_status import set_current_job, clear_current_job
+
+ASSIGN_UPSERT = """
+INSERT INTO job_devices (job_id, device_id, assigned_at, status, custom_price, notes)
+VALUES (%s, %s, %s, 'assigned', %s, %s)
+ON DUPLICATE KEY UPDATE
+    status = 'assigned',
+    assigned_at = VALUES(assigned_at),
+    returned_at = NULL,
+    custom_price = VALUES(custom_price),
+    notes = VALUES(notes)
+"""
+
+RECOUNT_JOB_DEVICES = """
+UPDATE jobs SET device_count = (
+    SELECT COUNT(*) FROM job_devices WHERE job_id = %s AND status = 'assigned'
+) WHERE id = %s
+"""
+
+
+class JobNotFound(Exception):
+    """Raised when the job of an assignment does not exist"""
+
+
+class InvalidItem(ValueError):
+    """Raised when a request item does not name a device"""
+
+
+def normalize_items(items):
+    """Turn request items into (identifier, custom_price, notes) tuples.
+
+    An item is either a bare barcode/id or a dict with ``deviceID`` and
+    optional ``customPrice`` and ``notes``. Identifiers are strings.
+    Raises InvalidItem for the first identifier that is not a non-empty
+    string or an integer.
+    """
+    normalized = []
+    for index, item in enumerate(items):
+        if isinstance(item, dict):
+            identifier = item.get('deviceID')
+            custom_price = item.get('customPrice')
+            notes = item.get('notes')
+        else:
+            identifier, custom_price, notes = item, None, None
+        if isinstance(identifier, int) and not isinstance(identifier, bool):
+            identifier = str(identifier)
+        elif isinstance(identifier, str):
+            identifier = identifier.strip()
+        else:
+            identifier = None
+        if not identifier:
+            raise InvalidItem(f'Item {index}: deviceID must be a barcode or device id')
+        normalized.append((identifier, custom_price, notes))
+    return normalized
+
+
+def lock_job(cursor, job_id):
+    """Lock the job row for the rest of the transaction"""
+    cursor.execute("SELECT id FROM jobs WHERE id = %s FOR UPDATE", (job_id,))
+    if not cursor.fetchone():
+        raise JobNotFound(job_id)
+
+
+def resolve_devices(cursor, identifiers):
+    """Lock and return the devices named by barcode or numeric id.
+
+    Returns a dict of identifier -> device row (id, name, barcode,
+    status) with one query; barcodes win over ids.
+    """
+    identifiers = list(set(identifiers))
+    if not identifiers:
+        return {}
+    ids = [int(identifier) for identifier in identifiers if identifier.isdigit()]
+
+    where = f"barcode IN ({placeholders(identifiers)})"
+    params = list(identifiers)
+    if ids:
+        where += f" OR id IN ({placeholders(ids)})"
+        params += ids
+    cursor.execute(f"SELECT id, name, barcode, status FROM devices WHERE {where} FOR UPDATE", params)
+    rows = cursor.fetchall()
+
+    by_barcode = {row['barcode']: row for row in rows}
+    by_id = {str(row['id']): row for row in rows}
+    resolved = {}
+    for identifier in identifiers:
+        device = by_barcode.get(identifier) or by_id.get(identifier)
+        if device:
+            resolved[identifier] = device
+    return resolved
+
+
+def recount_job_devices(cursor, job_id):
+    """Recompute jobs.device_count from job_devices and return it"""
+    cursor.execute(RECOUNT_JOB_DEVICES, (job_id, job_id))
+    cursor.execute("SELECT device_count FROM jobs WHERE id = %s", (job_id,))
+    return cursor.fetchone()['device_count']
+
+
+def _result(index, identifier, device=None, error=None):
+    result = {'index': index, 'deviceID': identifier, 'success': error is None}
+    if device:
+        result['device'] = {'id': device['id'], 'name': device['name'], 'barcode': device['barcode']}
+    if error:
+        result['error'] = error
+    return result
+
+
+def assign_devices(cursor, job_id, items, user, now):
+    """Assign a kit of devices to a job inside the caller's transaction.
+
+    Devices must be 'available' (as in the AssignDeviceToJob procedure);
+    anything else is reported per item and skipped. Valid devices go
+    into job_devices with one multi-row upsert, are set to 'in_use' with
+    one UPDATE and get the job as current job in device_status, and
+    device_count is recomputed once for the batch.
+    ``cursor`` must be a dictionary cursor.
+
+    Returns (results, assigned device ids, device_count).
+    """
+    items = normalize_items(items)
+    lock_job(cursor, job_id)
+    devices = resolve_devices(cursor, [identifier for identifier, _, _ in items])
+
+    cursor.execute(
+        "SELECT device_id FROM job_devices WHERE job_id = %s AND status = 'assigned'",
+        (job_id,)
+    )
+    already_assigned = {row['device_id'] for row in cursor.fetchall()}
+
+    results = []
+    rows = []
+    seen = set()
+    for index, (identifier, custom_price, notes) in enumerate(items):
+        device = devices.get(identifier)
+        if not device:
+            results.append(_result(index, identifier, error='Device not found'))
+        elif device['id'] in seen:
+            results.append(_result(index, identifier, device, 'Device listed twice'))
+        elif device['id'] in already_assigned:
+            results.append(_result(index, identifier, device, 'Device is already assigned to this job'))
+        elif device['status'] != 'available':
+            results.append(_result(index, identifier, device, f"Device is not available ({device['status']})"))
+        else:
+            seen.add(device['id'])
+            rows.append((job_id, device['id'], now, custom_price, notes or f'Assigned by {user}'))
+            results.append(_result(index, identifier, device))
+
+    device_ids = [row[1] for row in rows]
+    if rows:
+        cursor.executemany(ASSIGN_UPSERT, rows)
+        cursor.execute(
+            f"UPDATE devices SET status = 'in_use' WHERE id IN ({placeholders(device_ids)})",
+            device_ids
+        )
+        set_current_job(cursor, device_ids, job_id)
+    device_count = recount_job_devices(cursor, job_id)
+    return results, device_ids, device_count
+
+
+def return_devices(cursor, job_id, identifiers, user, now):
+    """Return devices from a job inside the caller's transaction.
+
+    Only devices currently 'assigned' or 'missing' on this job are
+    returned; their rows are closed, the devices set back to
+    'available' and their current job cleared with one UPDATE each, and
+    device_count is recomputed once. ``cursor`` must be a dictionary cursor.
+
+    Returns (results, returned device ids, device_count).
+    """
+    items = normalize_items(identifiers)
+    lock_job(cursor, job_id)
+    devices = resolve_devices(cursor, [identifier for identifier, _, _ in items])
+
+    open_ids = set()
+    candidate_ids = list({device['id'] for device in devices.values()})
+    if candidate_ids:
+        cursor.execute(f"""
+            SELECT device_id FROM job_devices
+            WHERE job_id = %s AND device_id IN ({placeholders(candidate_ids)})
+              AND status IN ('assigned', 'missing')
+            FOR UPDATE
+        """, [job_id] + candidate_ids)
+        open_ids = {row['device_id'] for row in cursor.fetchall()}
+
+    results = []
+    device_ids = []
+    for index, (identifier, _, _) in enumerate(items):
+        device = devices.get(identifier)
+        if not device:
+            results.append(_result(index, identifier, error='Device not found'))
+        elif device['id'] in device_ids:
+            results.append(_result(index, identifier, device, 'Device listed twice'))
+        elif device['id'] not in open_ids:
+            results.append(_result(index, identifier, device, 'Device is not assigned to this job'))
+        else:
+            device_ids.append(device['id'])
+            results.append(_result(index, identifier, device))
+
+    if device_ids:
+        id_list = placeholders(device_ids)
+        cursor.execute(f"""
+            UPDATE job_devices
+            SET status = 'returned',
+                returned_at = %s,
+                notes = CONCAT(COALESCE(notes, ''), ' - Returned by ', %s)
+            WHERE job_id = %s AND device_id IN ({id_list})
+        """, [now, user, job_id] + device_ids)
+        cursor.execute(
+            f"UPDATE devices SET status = 'available' WHERE id IN ({id_list})",
+            device_ids
+        )
+        clear_current_job(cursor, device_ids, job_id)
+    device_count = recount_job_devices(cursor, job_id)
+    return results, device_ids, device_count
@@ -0,0 +1,125 @@
+import time
+import logging
+from functools import wraps
+
+import jwt
+from flask import current_app, request, jsonify, g
+
+from .cache import TTLCache
+from .db import get_db_connection
+
+
+def get_bearer_token():
+    """Return the token from the Authorization header, or None"""
+    header = request.headers.get('Authorization')
+    if not header or not header.startswith('Bearer '):
+        return None
+    return header[7:]
+
+
+def decode_token(token):
+    """Verify a JWT and return its claims.
+
+    Verified claims are memoized per token until the token's ``exp``, so
+    repeated requests with the same token skip the HMAC check. Raises
+    jwt.ExpiredSignatureError / jwt.InvalidTokenError like jwt.decode().
+    """
+    cache = current_app.extensions['auth_token_cache']
+
+    claims = cache.get(token)
+    if claims is not None:
+        if claims['exp'] > time.time():
+            return claims
+        cache.delete(token)
+        raise jwt.ExpiredSignatureError('Signature has expired')
+
+    claims = jwt.decode(
+        token,
+        current_app.config['JWT_SECRET_KEY'],
+        algorithms=['HS256'],
+        # Tokens without exp are rejected (MissingRequiredClaimError is an InvalidTokenError)
+        options={'require': ['exp']}
+    )
+
+    ttl = claims['exp'] - time.time()
+    if ttl > 0:
+        cache.set(token, claims, ttl=ttl)
+    return claims
+
+
+def get_user_permissions(username):
+    """Get user permissions from MySQL"""
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+
+        # Check if user exists in mysql.user table
+        cursor.execute("""
+            SELECT User, Host,
+                   CASE
+                       WHEN Super_priv = 'Y' THEN 'admin'
+                       WHEN Select_priv = 'Y' AND Insert_priv = 'Y' AND Update_priv = 'Y' AND Delete_priv = 'Y' THEN 'manager'
+                       WHEN Select_priv = 'Y' THEN 'viewer'
+                       ELSE 'limited'
+                   END as role
+            FROM mysql.user
+            WHERE User = %s
+            LIMIT 1
+        """, (username,))
+
+        user_info = cursor.fetchone()
+        cursor.close()
+        conn.close()
+
+        if user_info:
+            return {
+                'username': user_info['User'],
+                'host': user_info['Host'],
+                'role': user_info['role']
+            }
+        return None
+
+    except Exception as e:
+        logging.error(f"Error getting user permissions: {e}")
+        return None
+
+
+def get_cached_user_permissions(username):
+    """get_user_permissions() behind a short-lived cache"""
+    cache = current_app.extensions['auth_role_cache']
+
+    user_info = cache.get(username)
+    if user_info is None:
+        user_info = get_user_permissions(username)
+        if user_info:
+            cache.set(username, user_info)
+    return user_info
+
+
+def require_auth(f):
+    """Decorator to require a valid JWT; the claims are stored in g.user"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        token = get_bearer_token()
+        if not token:
+            return jsonify({'error': 'Authentication required'}), 401
+        try:
+            g.user = decode_token(token)
+        except jwt.ExpiredSignatureError:
+            return jsonify({'error': 'Token expired'}), 401
+        except jwt.InvalidTokenError:
+            return jsonify({'error': 'Invalid token'}), 401
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def init_auth(app):
+    """Create the token and role caches for the app"""
+    app.extensions['auth_token_cache'] = TTLCache(
+        maxsize=app.config['AUTH_TOKEN_CACHE_SIZE'],
+        ttl=app.config['JWT_EXPIRATION']
+    )
+    app.extensions['auth_role_cache'] = TTLCache(
+        maxsize=app.config['AUTH_ROLE_CACHE_SIZE'],
+        ttl=app.config['AUTH_ROLE_CACHE_TTL']
+    )
@@ -0,0 +1,62 @@
+from datetime import date, datetime, time, timedelta
+
+DATE_FORMAT = '%Y-%m-%d'
+
+
+def parse_day(value, default=None):
+    """Parse a YYYY-MM-DD string into a date; raises ValueError if malformed"""
+    if value is None or value == '':
+        return default
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(value, DATE_FORMAT).date()
+
+
+def day_bounds(start_day, end_day=None):
+    """Half-open [start, end) datetimes covering whole days.
+
+    Filtering with ``col >= start AND col < end`` keeps the indexed column
+    bare, unlike ``DATE(col) = %s`` or BETWEEN on date strings, which
+    either defeat the index or silently drop the last day after midnight.
+    """
+    if end_day is None:
+        end_day = start_day
+    start = datetime.combine(start_day, time.min)
+    end = datetime.combine(end_day + timedelta(days=1), time.min)
+    return start, end
+
+
+def date_range_args(args, default_days=30):
+    """Read ?start_date=&end_date= (inclusive days) from request args.
+
+    Defaults to the last ``default_days`` days up to today. Raises
+    ValueError for malformed dates or an end before the start.
+    """
+    today = date.today()
+    start_day = parse_day(args.get('start_date'), today - timedelta(days=default_days))
+    end_day = parse_day(args.get('end_date'), today)
+    if end_day < start_day:
+        raise ValueError('end_date is before start_date')
+    return start_day, end_day
+
+
+def day_or_range_args(args):
+    """Read a single ?date= or a ?start_date=&end_date= range of days.
+
+    Defaults to today; a missing end_date means the start day alone.
+    Raises ValueError for malformed dates or an end before the start.
+    """
+    start_day = parse_day(args.get('start_date') or args.get('date'), date.today())
+    end_day = parse_day(args.get('end_date'), start_day)
+    if end_day < start_day:
+        raise ValueError('end_date is before start_date')
+    return start_day, end_day
+
+
+def parse_timestamp(value, default=None):
+    """Parse an ISO 8601 timestamp (as returned in ``as_of``); raises ValueError if malformed"""
+    if value is None or value == '':
+        return default
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
@@ -0,0 +1,350 @@
+import threading
+import time
+import logging
+from collections import deque
+
+import mysql.connector
+from mysql.connector.errors import PoolError
+from flask import current_app, g, has_request_context, request
+
+
+class PoolExhaustedError(PoolError):
+    """Raised when no pooled connection became free within the timeout"""
+
+
+def count_queries(n=1):
+    """Add to the current request's database round-trip counter"""
+    if has_request_context():
+        g._db_queries = g.get('_db_queries', 0) + n
+
+
+class CountingCursor:
+    """Cursor proxy that counts round trips for the per-request metric"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def execute(self, operation, params=None, multi=False):
+        count_queries()
+        return self._cursor.execute(operation, params, multi=multi)
+
+    def executemany(self, operation, seq_params):
+        # INSERTs are folded into one multi-row statement, anything else loops
+        if operation.lstrip().upper().startswith('INSERT'):
+            count_queries()
+        else:
+            count_queries(len(seq_params))
+        return self._cursor.executemany(operation, seq_params)
+
+
+class PooledConnection:
+    """Connection proxy that returns itself to the pool on close()"""
+
+    def __init__(self, pool, conn, created_at):
+        self._pool = pool
+        self._conn = conn
+        self._created_at = created_at
+        self._released = False
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def cursor(self, *args, **kwargs):
+        return CountingCursor(self._conn.cursor(*args, **kwargs))
+
+    @property
+    def raw(self):
+        """Underlying mysql.connector connection"""
+        return self._conn
+
+    def close(self):
+        """Hand the connection back to the pool instead of closing it"""
+        if self._released:
+            return
+        self._released = True
+        self._pool._release(self._conn, self._created_at)
+
+    def discard(self):
+        """Close the underlying connection and free its pool slot"""
+        if self._released:
+            return
+        self._released = True
+        self._pool._release(self._conn, self._created_at, discard=True)
+
+
+class ConnectionPool:
+    """Thread-safe MySQL connection pool shared by all blueprints.
+
+    Connections are opened lazily up to ``size``. On checkout an idle
+    connection is pinged if it has not been used for ``ping_interval``
+    seconds, and connections older than ``recycle`` seconds are replaced.
+    Callers block up to ``timeout`` seconds when every connection is busy.
+    """
+
+    def __init__(self, connect_args, size=5, recycle=1800, timeout=10, ping_interval=30):
+        self.connect_args = dict(connect_args)
+        self.size = max(1, size)
+        self.recycle = recycle
+        self.timeout = timeout
+        self.ping_interval = ping_interval
+
+        self._cond = threading.Condition()
+        self._idle = deque()  # (conn, created_at, last_used)
+        self._open = 0
+
+        self._stats = {
+            'checkouts': 0,
+            'connects': 0,
+            'recycled': 0,
+            'failed_health_checks': 0,
+            'exhausted': 0,
+            'timeouts': 0,
+            'wait_time_total': 0.0,
+            'wait_time_max': 0.0,
+        }
+
+    @classmethod
+    def from_config(cls, config):
+        """Build a pool from the Flask app config"""
+        connect_args = {
+            'host': config['MYSQL_HOST'],
+            'user': config['MYSQL_USER'],
+            'password': config['MYSQL_PASSWORD'],
+            'database': config['MYSQL_DATABASE'],
+            'connect_timeout': config.get('MYSQL_CONNECT_TIMEOUT', 10),
+            'autocommit': True,
+        }
+        return cls(
+            connect_args,
+            size=config.get('MYSQL_POOL_SIZE', 5),
+            recycle=config.get('MYSQL_POOL_RECYCLE', 1800),
+            timeout=config.get('MYSQL_POOL_TIMEOUT', 10),
+            ping_interval=config.get('MYSQL_POOL_PING_INTERVAL', 30),
+        )
+
+    def _connect(self):
+        conn = mysql.connector.connect(**self.connect_args)
+        with self._cond:
+            self._stats['connects'] += 1
+        return conn
+
+    def _close_quietly(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _is_healthy(self, conn):
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def acquire(self):
+        """Check out a connection, blocking while the pool is exhausted"""
+        start = time.monotonic()
+        deadline = start + self.timeout
+        entry = None
+        exhausted = False
+
+        with self._cond:
+            while True:
+                if self._idle:
+                    entry = self._idle.pop()
+                    break
+                if self._open < self.size:
+                    self._open += 1
+                    break
+                if not exhausted:
+                    exhausted = True
+                    self._stats['exhausted'] += 1
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolExhaustedError(
+                        f"No database connection available after {self.timeout}s"
+                    )
+                self._cond.wait(remaining)
+
+            waited = time.monotonic() - start
+            self._stats['checkouts'] += 1
+            self._stats['wait_time_total'] += waited
+            self._stats['wait_time_max'] = max(self._stats['wait_time_max'], waited)
+
+        try:
+            conn, created_at = self._prepare(entry)
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+
+        return PooledConnection(self, conn, created_at)
+
+    def _prepare(self, entry):
+        """Validate an idle connection, or open a new one for an empty slot"""
+        now = time.monotonic()
+
+        if entry is not None:
+            conn, created_at, last_used = entry
+
+            if self.recycle and now - created_at > self.recycle:
+                self._close_quietly(conn)
+                with self._cond:
+                    self._stats['recycled'] += 1
+            elif now - last_used < self.ping_interval or self._is_healthy(conn):
+                return conn, created_at
+            else:
+                self._close_quietly(conn)
+                with self._cond:
+                    self._stats['failed_health_checks'] += 1
+
+        return self._connect(), time.monotonic()
+
+    def _release(self, conn, created_at, discard=False):
+        if not discard:
+            try:
+                if conn.in_transaction:
+                    conn.rollback()
+            except Exception:
+                discard = True
+
+        if discard:
+            self._close_quietly(conn)
+
+        with self._cond:
+            if discard:
+                self._open -= 1
+            else:
+                self._idle.append((conn, created_at, time.monotonic()))
+            self._cond.notify()
+
+    def close_all(self):
+        """Close every idle connection"""
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._open -= len(idle)
+            self._cond.notify_all()
+        for conn, _, _ in idle:
+            self._close_quietly(conn)
+
+    def stats(self):
+        """Snapshot of pool usage counters"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats['size'] = self.size
+            stats['open'] = self._open
+            stats['idle'] = len(self._idle)
+            stats['in_use'] = self._open - len(self._idle)
+        checkouts = stats['checkouts']
+        stats['wait_time_avg'] = stats['wait_time_total'] / checkouts if checkouts else 0.0
+        return stats
+
+
+def placeholders(values):
+    """Return a '%s, %s, ...' list for an IN (...) clause"""
+    return ', '.join(['%s'] * len(values))
+
+
+def fetch_result_sets(cursor, statements):
+    """Run several SELECTs in a single round trip.
+
+    ``statements`` is a list of (sql, params) pairs. They are sent as one
+    multi-statement query and the rows of each come back as a list, in
+    order.
+    """
+    sql = ';\n'.join(statement.strip().rstrip(';') for statement, _ in statements)
+    params = [param for _, statement_params in statements for param in statement_params]
+
+    results = []
+    for result in cursor.execute(sql, params or None, multi=True):
+        if result.with_rows:
+            results.append(result.fetchall())
+    return results
+
+
+def get_pool():
+    """Return the connection pool of the current app"""
+    return current_app.extensions['db_pool']
+
+
+def get_db_connection():
+    """Get a pooled database connection for the current request"""
+    try:
+        conn = get_pool().acquire()
+    except Exception as e:
+        logging.error(f"Database connection failed: {e}")
+        raise
+
+    g.setdefault('_db_connections', []).append(conn)
+    return conn
+
+
+def _release_request_connections(exc=None):
+    """Return connections a request forgot to close"""
+    for conn in g.pop('_db_connections', []):
+        conn.close()
+
+
+class QueryStats:
+    """Per-endpoint request and database round-trip totals"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, endpoint, queries):
+        with self._lock:
+            stats = self._endpoints.setdefault(endpoint, {'requests': 0, 'queries': 0, 'max_queries': 0})
+            stats['requests'] += 1
+            stats['queries'] += queries
+            stats['max_queries'] = max(stats['max_queries'], queries)
+
+    def snapshot(self):
+        with self._lock:
+            endpoints = {name: dict(stats) for name, stats in self._endpoints.items()}
+        for stats in endpoints.values():
+            stats['avg_queries'] = stats['queries'] / stats['requests']
+        return endpoints
+
+
+def mark_streamed():
+    """Note that the response runs queries after after_request has fired"""
+    g._db_streamed = True
+
+
+def _report_query_count(response):
+    """Expose the request's round-trip count as X-DB-Queries"""
+    if g.get('_db_streamed'):
+        # The count is only known once the body has been sent
+        response.headers['X-DB-Queries'] = 'unknown'
+        return response
+    queries = g.get('_db_queries', 0)
+    response.headers['X-DB-Queries'] = str(queries)
+    if request.endpoint:
+        current_app.extensions['query_stats'].record(request.endpoint, queries)
+    return response
+
+
+def init_db(app):
+    """Create the shared connection pool for the app"""
+    pool = ConnectionPool.from_config(app.config)
+    app.extensions['db_pool'] = pool
+    app.extensions['query_stats'] = QueryStats()
+    app.after_request(_report_query_count)
+    app.teardown_appcontext(_release_request_connections)
+    return pool
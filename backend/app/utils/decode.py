@@ -0,0 +1,95 @@
+import io
+
+from flask import current_app
+
+from .workers import ProcessWorkers
+
+# QR plus the 1D symbologies printed on rental gear and supplier packaging
+SYMBOLOGIES = ('QRCODE', 'CODE128', 'CODE39', 'CODE93', 'EAN13', 'EAN8', 'UPCA', 'UPCE', 'I25')
+
+
+def parse_roi(value):
+    """Parse ?roi=x,y,w,h (fractions of the frame) into a tuple, or None.
+
+    Raises ValueError for malformed or empty regions.
+    """
+    if not value:
+        return None
+    parts = [float(part) for part in value.split(',')]
+    if len(parts) != 4:
+        raise ValueError('roi must be x,y,w,h')
+    x, y, w, h = parts
+    if not (0 <= x < 1 and 0 <= y < 1 and 0 < w <= 1 and 0 < h <= 1):
+        raise ValueError('roi values must be fractions between 0 and 1')
+    return x, y, min(w, 1 - x), min(h, 1 - y)
+
+
+def _scan(image, symbols):
+    from pyzbar.pyzbar import decode
+
+    return [
+        {'data': symbol.data.decode('utf-8', errors='replace'), 'type': symbol.type}
+        for symbol in decode(image, symbols=symbols)
+    ]
+
+
+def decode_frame(data, roi=None, max_side=800, max_pixels=16000000):
+    """Decode every QR/1D code in one encoded image (JPEG, PNG, ...).
+
+    The frame is converted to grayscale, cropped to ``roi`` and shrunk
+    so its longest side is at most ``max_side`` before scanning; only if
+    that finds nothing is the full-resolution crop scanned as well, for
+    thin 1D barcodes that do not survive downscaling.
+    """
+    from PIL import Image
+    from pyzbar.pyzbar import ZBarSymbol
+
+    symbols = [getattr(ZBarSymbol, name) for name in SYMBOLOGIES]
+
+    try:
+        image = Image.open(io.BytesIO(data))
+        if image.width * image.height > max_pixels:
+            return {'codes': [], 'error': 'Image too large'}
+        image = image.convert('L')
+    except Exception:
+        return {'codes': [], 'error': 'Unreadable image'}
+
+    if roi:
+        x, y, w, h = roi
+        image = image.crop((
+            int(x * image.width),
+            int(y * image.height),
+            int((x + w) * image.width),
+            int((y + h) * image.height)
+        ))
+
+    scaled = image
+    if max(image.size) > max_side:
+        scaled = image.copy()
+        scaled.thumbnail((max_side, max_side))
+
+    codes = _scan(scaled, symbols)
+    if not codes and scaled is not image:
+        codes = _scan(image, symbols)
+    return {'codes': codes}
+
+
+def decode_frames(frames, roi=None, max_side=800, max_pixels=16000000):
+    """Decode a batch of frames in one worker task, one result per frame"""
+    return [decode_frame(data, roi, max_side, max_pixels) for data in frames]
+
+
+def get_decode_workers():
+    """Return the process pool used for image decoding"""
+    return current_app.extensions['decode_workers']
+
+
+def init_decode(app):
+    """Create the image decoding process pool"""
+    config = app.config
+    app.extensions['decode_workers'] = ProcessWorkers(
+        'decode',
+        workers=config['DECODE_WORKERS'],
+        max_pending=config['DECODE_MAX_PENDING'],
+        timeout=config['DECODE_TIMEOUT']
+    )
@@ -0,0 +1,210 @@
+import threading
+
+from flask import current_app
+
+from .cache import TTLCache
+from .db import placeholders
+
+_MISSING = object()
+
+
+class DeviceCache:
+    """In-memory barcode -> device row index in front of the devices table.
+
+    Unknown barcodes are cached as well, but only for ``negative_ttl``
+    seconds so a device created by another worker shows up quickly.
+    Rows are copied on the way in and out, so callers may mutate them.
+    """
+
+    def __init__(self, maxsize=10000, ttl=300, negative_ttl=5):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.negative_ttl = negative_ttl
+        self._barcodes_by_id = {}
+        self._lock = threading.Lock()
+
+    def get(self, barcode):
+        """Return (hit, device) without touching the database"""
+        device = self._cache.get(barcode, _MISSING)
+        if device is _MISSING:
+            return False, None
+        return True, dict(device) if device else None
+
+    def put(self, device):
+        """Cache a device row under its barcode"""
+        self._cache.set(device['barcode'], dict(device))
+        with self._lock:
+            self._barcodes_by_id[device['id']] = device['barcode']
+
+    def put_missing(self, barcode):
+        """Remember that no device has this barcode"""
+        self._cache.set(barcode, None, ttl=self.negative_ttl)
+
+    def invalidate(self, barcode):
+        """Forget a barcode"""
+        self._cache.delete(barcode)
+
+    def invalidate_ids(self, device_ids):
+        """Forget the devices with the given ids"""
+        with self._lock:
+            barcodes = [self._barcodes_by_id.pop(device_id, None) for device_id in device_ids]
+        for barcode in barcodes:
+            if barcode is not None:
+                self._cache.delete(barcode)
+
+    def touch(self, device_id, last_scan):
+        """Refresh last_scan of a cached device after it was scanned"""
+        with self._lock:
+            barcode = self._barcodes_by_id.get(device_id)
+        if barcode is None:
+            return
+        hit, device = self.get(barcode)
+        if hit and device:
+            device['last_scan'] = last_scan
+            self.put(device)
+
+    def clear(self):
+        """Drop every cached device"""
+        self._cache.clear()
+        with self._lock:
+            self._barcodes_by_id.clear()
+
+    def lookup(self, cursor, barcode):
+        """Return the device for a barcode, querying MySQL on a miss.
+
+        ``cursor`` must be a dictionary cursor.
+        """
+        hit, device = self.get(barcode)
+        if hit:
+            return device
+
+        cursor.execute("SELECT * FROM devices WHERE barcode = %s", (barcode,))
+        device = cursor.fetchone()
+        if device:
+            self.put(device)
+            return dict(device)
+        self.put_missing(barcode)
+        return None
+
+    def peek(self, identifier):
+        """Resolve a barcode or numeric id from memory only.
+
+        Returns (hit, device) like get(); a miss means the database has
+        to be asked.
+        """
+        hit, device = self.get(identifier)
+        if hit and (device or not identifier.isdigit()):
+            return True, device
+
+        if identifier.isdigit():
+            with self._lock:
+                barcode = self._barcodes_by_id.get(int(identifier))
+            if barcode is not None:
+                hit, device = self.get(barcode)
+                if hit and device:
+                    return True, device
+
+        return False, None
+
+    def find(self, cursor, identifier):
+        """Return the device whose barcode (or, for digits, id) is ``identifier``.
+
+        Barcodes win over ids. Answers from memory when possible (see
+        peek()); otherwise both are checked in one query. ``cursor`` must
+        be a dictionary cursor.
+        """
+        hit, device = self.peek(identifier)
+        if hit:
+            return device
+
+        if not identifier.isdigit():
+            cursor.execute("SELECT * FROM devices WHERE barcode = %s", (identifier,))
+        else:
+            cursor.execute("""
+                SELECT * FROM devices
+                WHERE barcode = %s OR id = %s
+                ORDER BY barcode = %s DESC
+                LIMIT 1
+            """, (identifier, int(identifier), identifier))
+        device = cursor.fetchone()
+        if device:
+            self.put(device)
+            return dict(device)
+        if not identifier.isdigit():
+            self.put_missing(identifier)
+        return None
+
+    def peek_id(self, device_id):
+        """Resolve a device by primary key from memory only, like peek()"""
+        with self._lock:
+            barcode = self._barcodes_by_id.get(device_id)
+        if barcode is not None:
+            hit, device = self.get(barcode)
+            if hit and device and device['id'] == device_id:
+                return True, device
+        return False, None
+
+    def find_by_id(self, cursor, device_id):
+        """Return the device with primary key ``device_id``, or None.
+
+        Unlike find() barcodes are not consulted, so a device whose
+        barcode looks like another device's id cannot shadow it.
+        ``cursor`` must be a dictionary cursor.
+        """
+        hit, device = self.peek_id(device_id)
+        if hit:
+            return device
+
+        cursor.execute("SELECT * FROM devices WHERE id = %s", (device_id,))
+        device = cursor.fetchone()
+        if device:
+            self.put(device)
+            return dict(device)
+        return None
+
+    def lookup_many(self, cursor, barcodes):
+        """Resolve many barcodes with at most one IN (...) query.
+
+        Returns a dict of barcode -> device for the barcodes that exist.
+        """
+        devices = {}
+        missing = []
+        for barcode in set(barcodes):
+            hit, device = self.get(barcode)
+            if not hit:
+                missing.append(barcode)
+            elif device:
+                devices[barcode] = device
+
+        if missing:
+            cursor.execute(
+                f"SELECT * FROM devices WHERE barcode IN ({placeholders(missing)})",
+                missing
+            )
+            for device in cursor.fetchall():
+                self.put(device)
+                devices[device['barcode']] = dict(device)
+            for barcode in missing:
+                if barcode not in devices:
+                    self.put_missing(barcode)
+
+        return devices
+
+    def stats(self):
+        """Hit/miss/eviction counters of the underlying cache"""
+        return self._cache.stats()
+
+
+def get_device_cache():
+    """Return the device cache of the current app"""
+    return current_app.extensions['device_cache']
+
+
+def init_device_cache(app):
+    """Create the barcode -> device cache for the app"""
+    cache = DeviceCache(
+        maxsize=app.config['DEVICE_CACHE_SIZE'],
+        ttl=app.config['DEVICE_CACHE_TTL'],
+        negative_ttl=app.config['DEVICE_CACHE_NEGATIVE_TTL']
+    )
+    app.extensions['device_cache'] = cache
+    return cache
@@ -0,0 +1,75 @@
+import re
+
+# InnoDB's default innodb_ft_min_token_size; shorter words never reach
+# the FULLTEXT index, so they only take part in the prefix branches.
+MIN_TOKEN_SIZE = 3
+
+_WORD = re.compile(r'\w+', re.UNICODE)
+
+# Branch weights: an exact barcode always wins, then barcode and name
+# prefixes, then FULLTEXT relevance over name, type and location.
+EXACT_BARCODE_SCORE = 1000
+BARCODE_PREFIX_SCORE = 100
+NAME_PREFIX_SCORE = 50
+FULLTEXT_WEIGHT = 10
+
+
+def escape_like(value):
+    """Escape LIKE wildcards so user input only matches literally"""
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def boolean_query(query):
+    """Turn free text into a BOOLEAN MODE query requiring every word as a prefix.
+
+    Operators in the input are dropped. Returns None when no word is long
+    enough to be in the index.
+    """
+    words = [word for word in _WORD.findall(query) if len(word) >= MIN_TOKEN_SIZE]
+    if not words:
+        return None
+    return ' '.join(f'+{word}*' for word in words)
+
+
+def find_devices(cursor, query, limit=20):
+    """Return up to ``limit`` device rows matching ``query``, best first.
+
+    Every branch is an index lookup: barcode and name prefixes use the
+    B-tree indexes on those columns, words use the ft_devices_search
+    FULLTEXT index. They are combined with UNION ALL because an OR
+    across a FULLTEXT MATCH and a LIKE makes MySQL scan the table.
+    ``cursor`` must be a dictionary cursor.
+    """
+    prefix = escape_like(query) + '%'
+
+    branches = [
+        ("SELECT id, IF(barcode = %s, %s, %s) AS score FROM devices WHERE barcode LIKE %s LIMIT %s",
+         [query, EXACT_BARCODE_SCORE, BARCODE_PREFIX_SCORE, prefix, limit]),
+        ("SELECT id, %s AS score FROM devices WHERE name LIKE %s LIMIT %s",
+         [NAME_PREFIX_SCORE, prefix, limit]),
+    ]
+
+    terms = boolean_query(query)
+    if terms:
+        branches.append((
+            "SELECT id, MATCH(name, type, location) AGAINST (%s IN BOOLEAN MODE) * %s AS score "
+            "FROM devices WHERE MATCH(name, type, location) AGAINST (%s IN BOOLEAN MODE) LIMIT %s",
+            [terms, FULLTEXT_WEIGHT, terms, limit]
+        ))
+
+    hits = ' UNION ALL '.join(f'({sql})' for sql, _ in branches)
+    params = [param for _, branch_params in branches for param in branch_params]
+
+    cursor.execute(f"""
+        SELECT d.*
+        FROM (
+            SELECT id, SUM(score) AS score
+            FROM ({hits}) hits
+            GROUP BY id
+            ORDER BY score DESC
+            LIMIT %s
+        ) ranked
+        JOIN devices d ON d.id = ranked.id
+        ORDER BY ranked.score DESC, d.name
+    """, params + [limit])
+    return cursor.fetchall()
@@ -0,0 +1,148 @@
+import logging
+
+from .db import placeholders
+
+# scan_count_day counts the scans of scan_day only. A newer day restarts
+# the counter and late scans for an older day leave it alone. MySQL
+# applies the assignments left to right, so the counter must be updated
+# before scan_day moves.
+SCAN_UPSERT = """
+INSERT INTO device_status (device_id, last_scan_time, scan_day, scan_count_day)
+VALUES (%s, %s, %s, %s)
+ON DUPLICATE KEY UPDATE
+    scan_count_day = CASE
+        WHEN scan_day IS NULL OR VALUES(scan_day) > scan_day THEN VALUES(scan_count_day)
+        WHEN VALUES(scan_day) = scan_day THEN scan_count_day + VALUES(scan_count_day)
+        ELSE scan_count_day
+    END,
+    scan_day = GREATEST(COALESCE(scan_day, VALUES(scan_day)), VALUES(scan_day)),
+    last_scan_time = GREATEST(COALESCE(last_scan_time, VALUES(last_scan_time)), VALUES(last_scan_time))
+"""
+
+ASSIGN_UPSERT = """
+INSERT INTO device_status (device_id, current_job_id)
+VALUES (%s, %s)
+ON DUPLICATE KEY UPDATE current_job_id = VALUES(current_job_id)
+"""
+
+# Recompute the rows of a batch of devices from job_devices and scans.
+# Every subquery is an index probe (idx_device_id, idx_device_time).
+REPAIR_UPSERT = """
+INSERT INTO device_status (device_id, current_job_id, last_scan_time, scan_day, scan_count_day)
+SELECT
+    d.id,
+    (
+        SELECT jd.job_id FROM job_devices jd
+        WHERE jd.device_id = d.id AND jd.status = 'assigned'
+        ORDER BY jd.assigned_at DESC, jd.id DESC
+        LIMIT 1
+    ),
+    (SELECT MAX(s.scan_timestamp) FROM scans s WHERE s.device_id = d.id),
+    CURDATE(),
+    (
+        SELECT COUNT(*) FROM scans s
+        WHERE s.device_id = d.id
+          AND s.scan_timestamp >= CURDATE()
+          AND s.scan_timestamp < CURDATE() + INTERVAL 1 DAY
+    )
+FROM devices d
+WHERE d.id IN ({ids})
+ON DUPLICATE KEY UPDATE
+    current_job_id = VALUES(current_job_id),
+    last_scan_time = VALUES(last_scan_time),
+    scan_day = VALUES(scan_day),
+    scan_count_day = VALUES(scan_count_day)
+"""
+
+# What device_status_view used to compute, read from the maintained table
+STATUS_SELECT = """
+SELECT
+    d.*,
+    COALESCE(j.jobID, '') AS current_job,
+    COALESCE(j.kunde, '') AS current_customer,
+    ds.current_job_id,
+    ds.last_scan_time,
+    IF(ds.scan_day = CURDATE(), ds.scan_count_day, 0) AS scan_count_today
+FROM devices d
+LEFT JOIN device_status ds ON ds.device_id = d.id
+LEFT JOIN jobs j ON j.id = ds.current_job_id
+"""
+
+
+def update_scan_status(cursor, scans):
+    """Add freshly written scans to last_scan_time and the day counter"""
+    latest = {}
+    for scan in scans:
+        device_id = scan.get('device_id')
+        if device_id is None:
+            continue
+        timestamp = scan['scan_timestamp']
+        scan_day = timestamp.date()
+
+        if device_id not in latest:
+            latest[device_id] = [timestamp, scan_day, 1]
+            continue
+        entry = latest[device_id]
+        entry[0] = max(entry[0], timestamp)
+        if scan_day > entry[1]:
+            entry[1], entry[2] = scan_day, 1
+        elif scan_day == entry[1]:
+            entry[2] += 1
+
+    if latest:
+        cursor.executemany(SCAN_UPSERT, [
+            (device_id, timestamp, scan_day, count)
+            for device_id, (timestamp, scan_day, count) in latest.items()
+        ])
+
+
+def set_current_job(cursor, device_ids, job_id):
+    """Record job_id as the current job of the devices"""
+    if device_ids:
+        cursor.executemany(ASSIGN_UPSERT, [(device_id, job_id) for device_id in device_ids])
+
+
+def clear_current_job(cursor, device_ids, job_id):
+    """Clear the current job of devices returned from job_id"""
+    if device_ids:
+        cursor.execute(
+            f"UPDATE device_status SET current_job_id = NULL "
+            f"WHERE current_job_id = %s AND device_id IN ({placeholders(device_ids)})",
+            [job_id] + list(device_ids)
+        )
+
+
+def repair_device_status(conn, batch_size=500):
+    """Recompute device_status for every device, one batch per transaction.
+
+    Walks devices by id so each transaction only locks a small slice of
+    the table. Returns the number of devices checked. Like the rollup
+    backfill, a batch rebuilt while its devices are being scanned can be
+    off by a scan or two, so schedule it for quiet hours.
+    """
+    cursor = conn.cursor()
+    last_id = 0
+    devices = 0
+    while True:
+        cursor.execute(
+            "SELECT id FROM devices WHERE id > %s ORDER BY id LIMIT %s",
+            (last_id, batch_size)
+        )
+        ids = [row[0] for row in cursor.fetchall()]
+        if not ids:
+            break
+
+        conn.start_transaction()
+        try:
+            cursor.execute(REPAIR_UPSERT.format(ids=placeholders(ids)), ids)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        devices += len(ids)
+        last_id = ids[-1]
+        logging.info(f"Repaired device status up to device {last_id}")
+
+    cursor.close()
+    return devices
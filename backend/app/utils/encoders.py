@@ -1,3 +1,4 @@
+from datetime import date, datetime, time, timedelta
 from decimal import Decimal
 from flask.json import JSONEncoder
 
@@ -5,4 +6,12 @@ class CustomJSONEncoder(JSONEncoder):
     def default(self, obj):
         if isinstance(obj, Decimal):
             return float(obj)
-        return super().default(obj)
+        # ISO 8601 instead of Flask's RFC 822 dates
+        if isinstance(obj, (datetime, date, time)):
+            return obj.isoformat()
+        # MySQL TIME columns come back as timedelta
+        if isinstance(obj, timedelta):
+            return obj.total_seconds()
+        if isinstance(obj, (bytes, bytearray)):
+            return obj.decode('utf-8', errors='replace')
+        return super().default(obj)
\ No newline at end of file
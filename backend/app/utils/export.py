@@ -0,0 +1,118 @@
+import csv
+import io
+import tempfile
+
+from flask import Response, current_app, request, send_file, stream_with_context
+
+from .db import get_db_connection, mark_streamed
+
+CSV_MIMETYPE = 'text/csv'
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+def iter_csv(conn, query, params=(), chunk_size=1000):
+    """Yield CSV text for a query, ``chunk_size`` rows at a time.
+
+    Rows are read from an unbuffered cursor, so only one chunk is ever
+    held in memory. The first chunk starts with a UTF-8 BOM so Excel
+    picks the right encoding for umlauts in customer names.
+    """
+    cursor = conn.cursor()
+    finished = False
+    try:
+        cursor.execute(query, params)
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        buffer.write('\ufeff')
+        writer.writerow(cursor.column_names)
+
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            writer.writerows(rows)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+
+        if buffer.tell():
+            yield buffer.getvalue()
+        finished = True
+    finally:
+        if finished:
+            cursor.close()
+            conn.close()
+        else:
+            conn.discard()
+
+
+def write_xlsx(conn, query, params, fileobj, sheet_title, chunk_size=1000):
+    """Write a query result into an XLSX workbook using openpyxl's write-only mode"""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=sheet_title[:31])
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute(query, params)
+        sheet.append(list(cursor.column_names))
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            for row in rows:
+                sheet.append(list(row))
+        cursor.close()
+        conn.close()
+    except Exception:
+        conn.discard()
+        raise
+
+    workbook.save(fileobj)
+
+
+def export_response(query, params, filename, export_format='csv'):
+    """Build a download response for a query.
+
+    CSV is streamed straight from the cursor. XLSX, and CSV requests that
+    carry a Range header (resumed downloads), are written to a temporary
+    file first and served with send_file() so Range/If-Range work.
+    """
+    chunk_size = current_app.config['EXPORT_CHUNK_SIZE']
+    conn = get_db_connection()
+
+    if export_format == 'xlsx':
+        fileobj = tempfile.TemporaryFile()
+        write_xlsx(conn, query, params, fileobj, filename, chunk_size)
+        fileobj.seek(0)
+        return send_file(
+            fileobj,
+            mimetype=XLSX_MIMETYPE,
+            as_attachment=True,
+            download_name=f'{filename}.xlsx',
+            conditional=True,
+            etag=False
+        )
+
+    if request.range is not None:
+        fileobj = tempfile.TemporaryFile()
+        for chunk in iter_csv(conn, query, params, chunk_size):
+            fileobj.write(chunk.encode('utf-8'))
+        fileobj.seek(0)
+        return send_file(
+            fileobj,
+            mimetype=CSV_MIMETYPE,
+            as_attachment=True,
+            download_name=f'{filename}.csv',
+            conditional=True,
+            etag=False
+        )
+
+    mark_streamed()
+    return Response(
+        stream_with_context(iter_csv(conn, query, params, chunk_size)),
+        mimetype=f'{CSV_MIMETYPE}; charset=utf-8',
+        headers={'Content-Disposition': f'attachment; filename="{filename}.csv"'}
+    )
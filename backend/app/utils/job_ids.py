@@ -0,0 +1,39 @@
+from datetime import date
+
+JOB_ID_PREFIX = 'JOB'
+
+# Reserve `count` numbers for a day in one statement. The row lock taken
+# here is held until the surrounding transaction ends, so concurrent
+# creators queue on the counter instead of racing for the same jobID.
+# LAST_INSERT_ID(expr) hands the new high-water mark back in the OK packet.
+SEQUENCE_ALLOCATE = """
+INSERT INTO job_sequences (seq_date, last_value)
+VALUES (%s, LAST_INSERT_ID(%s))
+ON DUPLICATE KEY UPDATE last_value = LAST_INSERT_ID(last_value + %s)
+"""
+
+
+def format_job_id(day, number):
+    """JOB{YYYYMMDD}{nnn}, the format the frontend and existing jobs use"""
+    return f"{JOB_ID_PREFIX}{day.strftime('%Y%m%d')}{number:03d}"
+
+
+def allocate_job_numbers(cursor, count=1, day=None):
+    """Reserve a block of ``count`` consecutive sequence numbers for ``day``.
+
+    Returns the first number of the block. Call inside the transaction
+    that inserts the jobs: a rollback hands the numbers back.
+    """
+    if count < 1:
+        raise ValueError('count must be at least 1')
+    day = day or date.today()
+
+    cursor.execute(SEQUENCE_ALLOCATE, (day, count, count))
+    return cursor.lastrowid - count + 1
+
+
+def allocate_job_ids(cursor, count=1, day=None):
+    """Reserve ``count`` job IDs for ``day`` (default today) and return them"""
+    day = day or date.today()
+    first = allocate_job_numbers(cursor, count, day)
+    return [format_job_id(day, number) for number in range(first, first + count)]
@@ -0,0 +1,230 @@
+import hashlib
+import io
+import os
+import tempfile
+import threading
+
+from flask import current_app
+
+from .cache import TTLCache
+from .workers import ProcessWorkers
+
+LABEL_FORMATS = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+
+# python-barcode writer options per label size (millimetres, points for fonts)
+LABEL_SIZES = {
+    'small': {'module_width': 0.2, 'module_height': 8.0, 'font_size': 6, 'text_distance': 3.0, 'quiet_zone': 2.0},
+    'medium': {'module_width': 0.3, 'module_height': 12.0, 'font_size': 10, 'text_distance': 4.0, 'quiet_zone': 4.0},
+    'large': {'module_width': 0.4, 'module_height': 18.0, 'font_size': 14, 'text_distance': 5.0, 'quiet_zone': 6.0},
+}
+
+PNG_DPI = 300
+
+# QR module size in pixels per label size
+QR_BOX_SIZES = {'small': 4, 'medium': 8, 'large': 12}
+
+
+def render_label(value, fmt, size):
+    """Render a Code 128 barcode with its human-readable text.
+
+    Raises ValueError if the value cannot be encoded.
+    """
+    from barcode import Code128
+    from barcode.errors import BarcodeError
+    from barcode.writer import ImageWriter, SVGWriter
+
+    options = dict(LABEL_SIZES[size])
+    if fmt == 'png':
+        writer = ImageWriter()
+        options['dpi'] = PNG_DPI
+    else:
+        writer = SVGWriter()
+
+    buffer = io.BytesIO()
+    try:
+        Code128(value, writer=writer).write(buffer, options)
+    except BarcodeError as e:
+        raise ValueError(str(e))
+    return buffer.getvalue()
+
+
+def render_qrcode(value, fmt, size):
+    """Render a QR code (error correction M) for ``value``"""
+    import qrcode
+    from qrcode.image.svg import SvgPathImage
+
+    qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_M, box_size=QR_BOX_SIZES[size], border=4)
+    qr.add_data(value)
+    qr.make(fit=True)
+
+    buffer = io.BytesIO()
+    if fmt == 'png':
+        qr.make_image().save(buffer, format='PNG')
+    else:
+        qr.make_image(image_factory=SvgPathImage).save(buffer)
+    return buffer.getvalue()
+
+
+RENDERERS = {
+    'barcode': render_label,
+    'qrcode': render_qrcode,
+}
+
+
+class LabelCache:
+    """Content-addressed store of rendered labels on disk.
+
+    An image is identified by the SHA-256 of kind (barcode or qrcode),
+    format, size and encoded value, and stored under
+    ``<directory>/<2 hex>/<digest>.<format>``. Files are written through
+    a temporary name and renamed, so concurrent workers and processes
+    never see a half-written image. The digest doubles as the ETag: the
+    same inputs always render the same image. With ``memory_size`` the
+    most recently used images are also kept in memory by load().
+    """
+
+    def __init__(self, directory, memory_size=0, memory_ttl=86400):
+        self.directory = directory
+        self._memory = TTLCache(maxsize=memory_size, ttl=memory_ttl) if memory_size else None
+        self._stats_lock = threading.Lock()
+        self._stats = {'memory_hits': 0, 'hits': 0, 'renders': 0}
+
+    @staticmethod
+    def key(value, fmt, size, kind='barcode'):
+        return hashlib.sha256(f"{kind}\0{fmt}\0{size}\0{value}".encode('utf-8')).hexdigest()
+
+    def path(self, key, fmt):
+        return os.path.join(self.directory, key[:2], f"{key}.{fmt}")
+
+    def fetch(self, value, fmt, size, kind='barcode'):
+        """Return (key, path) of the image, rendering it on a miss"""
+        key = self.key(value, fmt, size, kind)
+        path = self.path(key, fmt)
+        if os.path.exists(path):
+            self._count('hits')
+            return key, path
+
+        data = RENDERERS[kind](value, fmt, size)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+        self._count('renders')
+        return key, path
+
+    def load(self, value, fmt, size, kind='barcode'):
+        """Return (key, bytes) of the image from memory, disk or a fresh render"""
+        key = self.key(value, fmt, size, kind)
+        if self._memory is not None:
+            data = self._memory.get(key)
+            if data is not None:
+                self._count('memory_hits')
+                return key, data
+
+        key, path = self.fetch(value, fmt, size, kind)
+        with open(path, 'rb') as f:
+            data = f.read()
+        if self._memory is not None:
+            self._memory.set(key, data)
+        return key, data
+
+    def _count(self, key):
+        with self._stats_lock:
+            self._stats[key] += 1
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        if self._memory is not None:
+            stats['memory'] = self._memory.stats()
+        return stats
+
+
+def build_label_sheet(devices, cache_dir, size, columns, rows):
+    """Lay out one label per device on A4 sheets and return the PDF bytes.
+
+    ``devices`` is a list of (name, barcode) pairs. Runs in a worker
+    process: barcode images come from (and go into) the shared disk
+    cache, so reprinting a sheet only re-does the layout.
+    """
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import mm
+    from reportlab.pdfgen import canvas
+
+    cache = LabelCache(cache_dir)
+    margin = 10 * mm
+    cell_width = (A4[0] - 2 * margin) / columns
+    cell_height = (A4[1] - 2 * margin) / rows
+    padding = 2 * mm
+    font_size = 8
+
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=A4)
+    pdf.setTitle('Device labels')
+    per_page = columns * rows
+
+    for index, (name, barcode) in enumerate(devices):
+        if index and index % per_page == 0:
+            pdf.showPage()
+        slot = index % per_page
+        x = margin + (slot % columns) * cell_width
+        y = A4[1] - margin - (slot // columns + 1) * cell_height
+
+        # Device name on top, shortened to the cell width
+        text = name or ''
+        max_width = cell_width - 2 * padding
+        while text and pdf.stringWidth(text, 'Helvetica', font_size) > max_width:
+            text = text[:-2] + '…' if len(text) > 1 else ''
+        pdf.setFont('Helvetica', font_size)
+        pdf.drawCentredString(x + cell_width / 2, y + cell_height - padding - font_size, text)
+
+        try:
+            _, path = cache.fetch(barcode, 'png', size)
+        except ValueError:
+            pdf.drawCentredString(x + cell_width / 2, y + cell_height / 2, f'Invalid barcode: {barcode}')
+            continue
+        pdf.drawImage(
+            path,
+            x + padding,
+            y + padding,
+            width=cell_width - 2 * padding,
+            height=cell_height - 3 * padding - font_size,
+            preserveAspectRatio=True,
+            anchor='c'
+        )
+
+    pdf.save()
+    return buffer.getvalue()
+
+
+def get_label_cache():
+    """Return the label image cache of the current app"""
+    return current_app.extensions['label_cache']
+
+
+def get_label_workers():
+    """Return the process pool used for label sheets"""
+    return current_app.extensions['label_workers']
+
+
+def init_labels(app):
+    """Create the label/QR image cache and the label sheet process pool"""
+    config = app.config
+    app.extensions['label_cache'] = LabelCache(
+        os.path.abspath(config['LABEL_CACHE_DIR']),
+        memory_size=config['LABEL_MEMORY_CACHE_SIZE']
+    )
+    app.extensions['label_workers'] = ProcessWorkers(
+        'label sheet',
+        workers=config['LABEL_PDF_WORKERS'],
+        max_pending=config['LABEL_PDF_MAX_PENDING'],
+        timeout=config['LABEL_PDF_TIMEOUT']
+    )
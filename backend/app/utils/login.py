@@ -0,0 +1,155 @@
+import hashlib
+import hmac
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+import mysql.connector
+from flask import current_app
+
+from .cache import TTLCache
+
+
+class LoginBusy(Exception):
+    """Raised when the credential check pool is saturated"""
+
+
+class RateLimiter:
+    """Sliding-window counter of failed attempts per key (user or client IP)"""
+
+    def __init__(self, limit, window, maxsize=10000):
+        self.limit = limit
+        self.window = window
+        self.maxsize = maxsize
+        self._hits = {}
+        self._lock = threading.Lock()
+
+    def check(self, key):
+        """Return seconds to wait if ``key`` is over the limit, else 0"""
+        now = time.monotonic()
+        with self._lock:
+            hits = [t for t in self._hits.get(key, ()) if now - t < self.window]
+            if len(hits) >= self.limit:
+                # Concurrent failures can overshoot the limit; wait until
+                # enough of them have aged out, not just the oldest
+                return self.window - (now - hits[-self.limit])
+        return 0
+
+    def hit(self, key):
+        """Record a failed attempt"""
+        now = time.monotonic()
+        with self._lock:
+            hits = [t for t in self._hits.get(key, ()) if now - t < self.window]
+            hits.append(now)
+            self._hits[key] = hits
+            if len(self._hits) > self.maxsize:
+                self._prune(now)
+
+    def _prune(self, now):
+        for key in [k for k, hits in self._hits.items() if not hits or now - hits[-1] >= self.window]:
+            del self._hits[key]
+
+
+class CredentialVerifier:
+    """Checks MySQL credentials on a bounded thread pool.
+
+    At most ``workers`` checks run at once and at most ``max_pending``
+    wait for a worker; anything beyond that raises LoginBusy instead of
+    piling more handshakes onto MySQL. Successful checks are remembered
+    for ``cache_ttl`` seconds under an HMAC of username and password with
+    a per-process random salt, so the plaintext password is never stored.
+    """
+
+    def __init__(self, host, database, workers=4, max_pending=32, timeout=10,
+                 cache_ttl=300, cache_size=1000):
+        self.host = host
+        self.database = database
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='login')
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+        self._salt = os.urandom(32)
+        self._cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+
+    def _cache_key(self, username, password):
+        message = username.encode('utf-8') + b'\0' + password.encode('utf-8')
+        return hmac.new(self._salt, message, hashlib.sha256).hexdigest()
+
+    def _connect(self, username, password):
+        try:
+            conn = mysql.connector.connect(
+                host=self.host,
+                user=username,
+                password=password,
+                database=self.database,
+                connect_timeout=5
+            )
+            conn.close()
+            return True
+        except mysql.connector.Error:
+            return False
+
+    def is_cached(self, username, password):
+        """True if these credentials were verified within cache_ttl"""
+        return bool(self._cache.get(self._cache_key(username, password)))
+
+    def verify(self, username, password):
+        """Return True if the credentials open a MySQL session"""
+        key = self._cache_key(username, password)
+        if self._cache.get(key):
+            return True
+
+        if not self._slots.acquire(blocking=False):
+            raise LoginBusy('Too many concurrent logins')
+        try:
+            future = self._executor.submit(self._connect, username, password)
+        except Exception:
+            self._slots.release()
+            raise
+        # The slot is held until the check finishes, even after we stop
+        # waiting for it, so a stalled MySQL cannot grow the backlog
+        future.add_done_callback(lambda _: self._slots.release())
+
+        try:
+            valid = future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            raise LoginBusy('Credential check timed out')
+
+        if valid:
+            self._cache.set(key, True)
+        return valid
+
+    def forget(self, username, password):
+        """Drop a cached positive result"""
+        self._cache.delete(self._cache_key(username, password))
+
+    def stats(self):
+        """Positive-result cache counters"""
+        return self._cache.stats()
+
+
+def get_credential_verifier():
+    """Return the credential verifier of the current app"""
+    return current_app.extensions['credential_verifier']
+
+
+def get_login_limiters():
+    """Return the (per-user, per-IP) login rate limiters"""
+    return current_app.extensions['login_limiters']
+
+
+def init_login(app):
+    """Create the credential verifier and login rate limiters"""
+    config = app.config
+    app.extensions['credential_verifier'] = CredentialVerifier(
+        config['MYSQL_HOST'],
+        config['MYSQL_DATABASE'],
+        workers=config['LOGIN_WORKERS'],
+        max_pending=config['LOGIN_MAX_PENDING'],
+        timeout=config['LOGIN_TIMEOUT'],
+        cache_ttl=config['LOGIN_CACHE_TTL']
+    )
+    app.extensions['login_limiters'] = (
+        RateLimiter(config['LOGIN_RATE_LIMIT_USER'], config['LOGIN_RATE_LIMIT_WINDOW']),
+        RateLimiter(config['LOGIN_RATE_LIMIT_IP'], config['LOGIN_RATE_LIMIT_WINDOW'])
+    )
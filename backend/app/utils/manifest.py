@@ -0,0 +1,83 @@
+from .db import fetch_result_sets
+
+# One row per device on the job with its latest scan. device_status
+# knows when that scan happened, so the correlated subquery and the join
+# each hit one idx_device_time/primary key entry in one partition; the
+# cost grows with the job, not with the scan history.
+MANIFEST_DEVICES = """
+SELECT
+    jd.device_id AS id,
+    jd.device_id AS deviceID,
+    d.name,
+    d.type,
+    d.barcode,
+    d.status AS device_status,
+    d.location,
+    jd.status,
+    jd.assigned_at,
+    jd.returned_at,
+    jd.custom_price,
+    jd.notes,
+    jd.updated_at,
+    ls.scan_timestamp AS last_scan,
+    ls.location AS last_scan_location,
+    ls.job_id AS last_scan_job_id
+FROM job_devices jd
+JOIN devices d ON d.id = jd.device_id
+LEFT JOIN device_status ds ON ds.device_id = jd.device_id
+LEFT JOIN scans ls ON ls.scan_timestamp = ds.last_scan_time AND ls.id = (
+    SELECT s.id FROM scans s
+    WHERE s.device_id = jd.device_id AND s.scan_timestamp = ds.last_scan_time
+    ORDER BY s.id DESC
+    LIMIT 1
+)
+WHERE jd.job_id = %s
+"""
+
+MANIFEST_STATUSES = ('assigned', 'returned', 'missing')
+
+
+def job_manifest(cursor, job_id, since=None):
+    """Return the job with its devices and their latest scans, or None.
+
+    Job row, per-status counts, device rows and the database clock come
+    back in one round trip. With ``since`` only devices whose assignment
+    changed or that were scanned at or after that time are listed;
+    ``as_of`` is the value to pass as ``since`` on the next refresh.
+    ``cursor`` must be a dictionary cursor.
+    """
+    devices_query = MANIFEST_DEVICES
+    devices_params = (job_id,)
+    if since is not None:
+        # Both columns are set by the database clock, like as_of; scan
+        # timestamps come from the app servers and could drift past it
+        devices_query += " AND (jd.updated_at >= %s OR ds.updated_at >= %s)"
+        devices_params += (since, since)
+    devices_query += " ORDER BY d.name, jd.device_id"
+
+    jobs, counts, devices, clock = fetch_result_sets(cursor, [
+        ("SELECT * FROM jobs WHERE id = %s", (job_id,)),
+        ("""
+            SELECT status, COUNT(*) AS count
+            FROM job_devices
+            WHERE job_id = %s
+            GROUP BY status
+        """, (job_id,)),
+        (devices_query, devices_params),
+        ("SELECT NOW() AS as_of", ()),
+    ])
+
+    if not jobs:
+        return None
+
+    totals = dict.fromkeys(MANIFEST_STATUSES, 0)
+    for row in counts:
+        totals[row['status']] = row['count']
+
+    return {
+        'job': jobs[0],
+        'counts': totals,
+        'devices': devices,
+        'since': since,
+        'as_of': clock[0]['as_of'],
+    }
@@ -0,0 +1,39 @@
+import base64
+import json
+
+from flask import current_app, request
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+def encode_cursor(*values):
+    """Pack the sort key of the last row into an opaque cursor string"""
+    raw = json.dumps(list(values), separators=(',', ':'), default=str)
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    """Unpack a cursor made by encode_cursor() into ``size`` values"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f'Invalid cursor: {e}')
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor('Invalid cursor')
+    return values
+
+
+def get_page_size():
+    """Read ?limit=, applying the default and the server-side maximum"""
+    limit = request.args.get('limit', type=int)
+    if not limit or limit < 1:
+        limit = current_app.config['PAGE_SIZE_DEFAULT']
+    return min(limit, current_app.config['PAGE_SIZE_MAX'])
+
+
+def page_body(items, next_cursor):
+    """Response body of one page; ``next_cursor`` is None on the last page"""
+    return {'items': items, 'next_cursor': next_cursor}
@@ -0,0 +1,140 @@
+import hashlib
+import json
+import threading
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import current_app, make_response, request
+
+from .cache import TTLCache
+from .streaming import wants_stream
+
+
+class ResponseCache:
+    """Short-lived cache of rendered JSON responses.
+
+    Entries are keyed by endpoint, view arguments, normalized query
+    arguments and the current version of each data tag the endpoint
+    depends on ('jobs', 'devices', 'scans'). invalidate() bumps a tag's
+    version, which orphans every entry built from older data; the TTL
+    bounds staleness for changes made by other worker processes.
+    """
+
+    def __init__(self, maxsize=256, ttl=30):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        # ETag -> when that representation was first built, so an
+        # unchanged payload keeps its Last-Modified across TTL refreshes
+        self._first_seen = TTLCache(maxsize=maxsize, ttl=86400)
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def key(self, tags):
+        args = tuple(sorted(
+            (name, tuple(sorted(values)))
+            for name, values in request.args.lists()
+        ))
+        view_args = tuple(sorted((request.view_args or {}).items()))
+        with self._lock:
+            versions = tuple(self._versions.get(tag, 0) for tag in tags)
+        return (request.endpoint, view_args, args, versions)
+
+    def get(self, key):
+        return self._cache.get(key)
+
+    def set(self, key, entry):
+        self._cache.set(key, entry)
+
+    def first_seen(self, etag, now):
+        """When a representation with this ETag was first built"""
+        seen = self._first_seen.get(etag)
+        if seen is None:
+            seen = now
+            self._first_seen.set(etag, seen)
+        return seen
+
+    def invalidate(self, *tags):
+        """Mark cached responses built from these tables as stale"""
+        with self._lock:
+            for tag in tags:
+                self._versions[tag] = self._versions.get(tag, 0) + 1
+
+    def stats(self):
+        return self._cache.stats()
+
+
+def get_response_cache():
+    """Return the response cache of the current app"""
+    return current_app.extensions['response_cache']
+
+
+def invalidate_responses(*tags):
+    """Drop cached responses that depend on the given tables"""
+    get_response_cache().invalidate(*tags)
+
+
+def payload_etag(rv):
+    """Hash of the JSON payload without its volatile ``generated_at``.
+
+    Rebuilding an unchanged report after the TTL gives the same ETag, so
+    pollers keep getting 304s until the data itself changes.
+    """
+    payload = rv.get_json(silent=True)
+    if payload is None:
+        return hashlib.sha1(rv.get_data()).hexdigest()
+    if isinstance(payload, dict):
+        payload.pop('generated_at', None)
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+
+def cached_response(*tags):
+    """Cache a JSON GET endpoint and answer conditional requests.
+
+    Responses carry a strong ETag and Last-Modified; a matching
+    If-None-Match / If-Modified-Since gets a 304 without a body. Both
+    are derived from the payload minus ``generated_at``, so they only
+    change when the data does. Streamed responses (?stream=true) bypass
+    the cache.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if wants_stream():
+                return f(*args, **kwargs)
+
+            cache = get_response_cache()
+            key = cache.key(tags)
+            entry = cache.get(key)
+
+            if entry is None:
+                rv = make_response(f(*args, **kwargs))
+                if rv.status_code != 200 or rv.is_streamed:
+                    return rv
+                etag = payload_etag(rv)
+                entry = {
+                    'body': rv.get_data(),
+                    'mimetype': rv.mimetype,
+                    'etag': etag,
+                    'last_modified': cache.first_seen(etag, datetime.now(timezone.utc).replace(microsecond=0))
+                }
+                cache.set(key, entry)
+
+            response = current_app.response_class(entry['body'], mimetype=entry['mimetype'])
+            response.set_etag(entry['etag'])
+            response.last_modified = entry['last_modified']
+            # Let browsers keep the body but revalidate on every poll
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            return response.make_conditional(request)
+        return decorated_function
+    return decorator
+
+
+def init_response_cache(app):
+    """Create the response cache for the app"""
+    cache = ResponseCache(
+        maxsize=app.config['RESPONSE_CACHE_SIZE'],
+        ttl=app.config['RESPONSE_CACHE_TTL']
+    )
+    app.extensions['response_cache'] = cache
+    return cache
@@ -0,0 +1,110 @@
+import logging
+from datetime import timedelta
+
+from .dates import day_bounds
+
+DAILY_UPSERT = """
+INSERT INTO scan_daily_stats (scan_date, scan_count, unknown_count)
+VALUES (%s, %s, %s)
+ON DUPLICATE KEY UPDATE
+    scan_count = scan_count + VALUES(scan_count),
+    unknown_count = unknown_count + VALUES(unknown_count)
+"""
+
+DEVICE_DAILY_UPSERT = """
+INSERT INTO device_daily_stats (device_id, scan_date, scan_count, last_scan)
+VALUES (%s, %s, %s, %s)
+ON DUPLICATE KEY UPDATE
+    scan_count = scan_count + VALUES(scan_count),
+    last_scan = GREATEST(last_scan, VALUES(last_scan))
+"""
+
+
+def update_rollups(cursor, scans):
+    """Add freshly written scans to the per-day and per-device/day counters"""
+    daily = {}
+    per_device = {}
+
+    for scan in scans:
+        timestamp = scan['scan_timestamp']
+        scan_date = timestamp.date()
+        device_id = scan.get('device_id')
+
+        counts = daily.setdefault(scan_date, [0, 0])
+        counts[0] += 1
+        if device_id is None:
+            counts[1] += 1
+            continue
+
+        key = (device_id, scan_date)
+        if key in per_device:
+            count, last_scan = per_device[key]
+            per_device[key] = (count + 1, max(last_scan, timestamp))
+        else:
+            per_device[key] = (1, timestamp)
+
+    if daily:
+        cursor.executemany(DAILY_UPSERT, [
+            (scan_date, total, unknown) for scan_date, (total, unknown) in daily.items()
+        ])
+    if per_device:
+        cursor.executemany(DEVICE_DAILY_UPSERT, [
+            (device_id, scan_date, count, last_scan)
+            for (device_id, scan_date), (count, last_scan) in per_device.items()
+        ])
+
+
+def rebuild_rollups(conn, start_date=None, end_date=None):
+    """Recompute the rollup tables from raw scans, one day per transaction.
+
+    Defaults to the whole scan history. Returns the number of days rebuilt.
+    Rebuilding the current day while scans are arriving can drop a few
+    increments, so run it for closed days or during quiet hours.
+    """
+    cursor = conn.cursor()
+
+    if start_date is None or end_date is None:
+        cursor.execute("SELECT MIN(scan_timestamp), MAX(scan_timestamp) FROM scans")
+        first, last = cursor.fetchone()
+        if first is None:
+            cursor.close()
+            return 0
+        start_date = start_date or first.date()
+        end_date = end_date or last.date()
+
+    day = start_date
+    days = 0
+    while day <= end_date:
+        bounds = day_bounds(day)
+
+        conn.start_transaction()
+        try:
+            cursor.execute("DELETE FROM scan_daily_stats WHERE scan_date = %s", (day,))
+            cursor.execute("DELETE FROM device_daily_stats WHERE scan_date = %s", (day,))
+            cursor.execute("""
+                INSERT INTO scan_daily_stats (scan_date, scan_count, unknown_count)
+                SELECT %s, COUNT(*), COALESCE(SUM(device_id IS NULL), 0)
+                FROM scans
+                WHERE scan_timestamp >= %s AND scan_timestamp < %s
+                HAVING COUNT(*) > 0
+            """, (day,) + bounds)
+            cursor.execute("""
+                INSERT INTO device_daily_stats (device_id, scan_date, scan_count, last_scan)
+                SELECT device_id, %s, COUNT(*), MAX(scan_timestamp)
+                FROM scans
+                WHERE scan_timestamp >= %s AND scan_timestamp < %s
+                  AND device_id IS NOT NULL
+                GROUP BY device_id
+            """, (day,) + bounds)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        logging.info(f"Rebuilt scan rollups for {day}")
+        day += timedelta(days=1)
+        days += 1
+
+    cursor.close()
+    return days
+
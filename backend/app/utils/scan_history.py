@@ -0,0 +1,290 @@
+import csv
+import gzip
+import io
+import logging
+import os
+import tempfile
+from datetime import date, datetime, time
+
+FUTURE_PARTITION = 'p_future'
+
+# Columns written to archive files, in order
+ARCHIVE_COLUMNS = ('id', 'device_id', 'job_id', 'barcode', 'scanned_by', 'scan_timestamp', 'location', 'notes')
+
+LIST_PARTITIONS = """
+SELECT PARTITION_NAME, TABLE_ROWS
+FROM information_schema.PARTITIONS
+WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'scans' AND PARTITION_NAME IS NOT NULL
+ORDER BY PARTITION_ORDINAL_POSITION
+"""
+
+ARCHIVE_UPSERT = """
+INSERT INTO scan_archives (partition_name, month, file_name, row_count, archived_at)
+VALUES (%s, %s, %s, %s, %s)
+ON DUPLICATE KEY UPDATE
+    file_name = VALUES(file_name),
+    row_count = VALUES(row_count),
+    archived_at = VALUES(archived_at)
+"""
+
+
+class NotPartitioned(Exception):
+    """Raised when the scans table has not been partitioned yet"""
+
+
+def month_start(day):
+    """First day of the month of a date or datetime"""
+    return date(day.year, day.month, 1)
+
+
+def add_months(month, count):
+    """The first of the month ``count`` months after (or before) ``month``"""
+    years, index = divmod(month.month - 1 + count, 12)
+    return date(month.year + years, index + 1, 1)
+
+
+def partition_name(month):
+    return f"p{month:%Y%m}"
+
+
+def partition_month(name):
+    """Month of a pYYYYMM partition, or None for other partitions"""
+    try:
+        return datetime.strptime(name, 'p%Y%m').date()
+    except ValueError:
+        return None
+
+
+def archive_file_name(month):
+    return f"scans_{month:%Y_%m}.csv.gz"
+
+
+def list_partitions(cursor):
+    """Return [(name, month or None, estimated rows)] of scans, in order.
+
+    Raises NotPartitioned before migration 008 has been applied.
+    """
+    cursor.execute(LIST_PARTITIONS)
+    partitions = [(name, partition_month(name), rows) for name, rows in cursor.fetchall()]
+    if not partitions:
+        raise NotPartitioned('scans is not partitioned; apply database/migrations/008_partition_scans.sql')
+    return partitions
+
+
+def ensure_partitions(conn, months_ahead=3, today=None):
+    """Split p_future into monthly partitions up to ``months_ahead`` months out.
+
+    The first run after the migration splits the whole history (that
+    copies the table once); afterwards p_future is empty and adding
+    months is a metadata change. Returns the names of new partitions.
+    """
+    today = today or date.today()
+    cursor = conn.cursor()
+    try:
+        months = [month for _, month, _ in list_partitions(cursor) if month]
+        if months:
+            first = add_months(max(months), 1)
+        else:
+            cursor.execute("SELECT MIN(scan_timestamp) FROM scans")
+            oldest = cursor.fetchone()[0]
+            first = month_start(oldest or today)
+        last = add_months(month_start(today), months_ahead)
+
+        new_months = []
+        month = first
+        while month <= last:
+            new_months.append(month)
+            month = add_months(month, 1)
+        if not new_months:
+            return []
+
+        # Bounds are evaluated in the session time zone, like the TIMESTAMP values
+        definitions = [
+            f"PARTITION {partition_name(month)} VALUES LESS THAN "
+            f"(UNIX_TIMESTAMP('{add_months(month, 1):%Y-%m-%d} 00:00:00'))"
+            for month in new_months
+        ]
+        definitions.append(f"PARTITION {FUTURE_PARTITION} VALUES LESS THAN MAXVALUE")
+        cursor.execute(
+            f"ALTER TABLE scans REORGANIZE PARTITION {FUTURE_PARTITION} INTO ({', '.join(definitions)})"
+        )
+    finally:
+        cursor.close()
+
+    names = [partition_name(month) for month in new_months]
+    logging.info(f"Added scan partitions {names[0]}..{names[-1]}")
+    return names
+
+
+def _write_archive(conn, name, path, chunk_size):
+    """Dump one partition into a gzipped CSV and return the row count"""
+    cursor = conn.cursor()  # unbuffered: rows are read as we go
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    count = 0
+    try:
+        with os.fdopen(fd, 'wb') as raw, gzip.open(raw, 'wt', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(ARCHIVE_COLUMNS)
+            cursor.execute(
+                f"SELECT {', '.join(ARCHIVE_COLUMNS)} FROM scans PARTITION ({name}) "
+                f"ORDER BY scan_timestamp, id"
+            )
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                writer.writerows(rows)
+                count += len(rows)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+    finally:
+        cursor.close()
+    return count
+
+
+def archive_partitions(conn, directory, keep_months, chunk_size=1000, today=None):
+    """Move monthly partitions older than ``keep_months`` into archive files.
+
+    Each partition is written to ``<directory>/scans_YYYY_MM.csv.gz``,
+    recorded in scan_archives and dropped; dropping a partition is a
+    metadata change, so no scan rows are locked. A partition that gained
+    rows while it was being written is left for the next run. The
+    rollup tables are untouched, so summaries still cover archived
+    months. Returns [(partition, rows archived)].
+    """
+    if keep_months <= 0:
+        return []
+    cutoff = add_months(month_start(today or date.today()), -keep_months)
+    os.makedirs(directory, exist_ok=True)
+
+    cursor = conn.cursor()
+    archived = []
+    try:
+        for name, month, _ in list_partitions(cursor):
+            if month is None or month >= cutoff:
+                continue
+
+            file_name = archive_file_name(month)
+            count = _write_archive(conn, name, os.path.join(directory, file_name), chunk_size)
+
+            cursor.execute(f"SELECT COUNT(*) FROM scans PARTITION ({name})")
+            if cursor.fetchone()[0] != count:
+                logging.warning(f"Scan partition {name} changed while archiving, retrying next run")
+                continue
+
+            cursor.execute(ARCHIVE_UPSERT, (name, month, file_name, count, datetime.now()))
+            cursor.execute(f"ALTER TABLE scans DROP PARTITION {name}")
+            logging.info(f"Archived {count} scans of {name} to {file_name}")
+            archived.append((name, count))
+    finally:
+        cursor.close()
+    return archived
+
+
+def max_scan_history(cursor):
+    """The max_scan_history setting (scans kept per device), 0 if unset"""
+    cursor.execute("SELECT setting_value FROM settings WHERE setting_key = 'max_scan_history'")
+    row = cursor.fetchone()
+    try:
+        return max(int(row[0]), 0) if row else 0
+    except (TypeError, ValueError):
+        return 0
+
+
+def trim_scan_history(conn, max_per_device, batch_size=1000):
+    """Delete the oldest scans of devices with more than ``max_per_device``.
+
+    Rows go in DELETE ... LIMIT batches that commit one by one, so locks
+    are held only for ``batch_size`` rows at a time. Returns the number
+    of scans deleted.
+    """
+    if max_per_device <= 0:
+        return 0
+
+    cursor = conn.cursor()
+    deleted = 0
+    try:
+        cursor.execute("""
+            SELECT device_id FROM scans
+            WHERE device_id IS NOT NULL
+            GROUP BY device_id
+            HAVING COUNT(*) > %s
+        """, (max_per_device,))
+        device_ids = [row[0] for row in cursor.fetchall()]
+
+        for device_id in device_ids:
+            # Newest scan that no longer fits; it and everything older goes
+            cursor.execute("""
+                SELECT scan_timestamp, id FROM scans
+                WHERE device_id = %s
+                ORDER BY scan_timestamp DESC, id DESC
+                LIMIT 1 OFFSET %s
+            """, (device_id, max_per_device))
+            row = cursor.fetchone()
+            if not row:
+                continue
+            timestamp, scan_id = row
+
+            while True:
+                cursor.execute("""
+                    DELETE FROM scans
+                    WHERE device_id = %s
+                      AND (scan_timestamp < %s OR (scan_timestamp = %s AND id <= %s))
+                    LIMIT %s
+                """, (device_id, timestamp, timestamp, scan_id, batch_size))
+                deleted += cursor.rowcount
+                if cursor.rowcount < batch_size:
+                    break
+    finally:
+        cursor.close()
+
+    if deleted:
+        logging.info(f"Trimmed {deleted} scans from {len(device_ids)} device(s)")
+    return deleted
+
+
+def iter_archive_csv(directory, start, end):
+    """Yield CSV text of archived scans with start <= scan_timestamp < end.
+
+    Only the monthly files overlapping the range are opened and they are
+    read line by line, so memory stays flat. Starts with a UTF-8 BOM and
+    the header row, like the live exports.
+    """
+    start_key = start.isoformat(sep=' ')
+    end_key = end.isoformat(sep=' ')
+    timestamp_index = ARCHIVE_COLUMNS.index('scan_timestamp')
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write('\ufeff')
+    writer.writerow(ARCHIVE_COLUMNS)
+
+    month = month_start(start)
+    while datetime.combine(month, time.min) < end:
+        path = os.path.join(directory, archive_file_name(month))
+        month = add_months(month, 1)
+        if not os.path.exists(path):
+            continue
+
+        with gzip.open(path, 'rt', encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            for row in reader:
+                # 'YYYY-MM-DD HH:MM:SS' strings sort like the timestamps
+                if start_key <= row[timestamp_index] < end_key:
+                    writer.writerow(row)
+                    if buffer.tell() > 65536:
+                        yield buffer.getvalue()
+                        buffer.seek(0)
+                        buffer.truncate(0)
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def list_archives(cursor):
+    """Rows of scan_archives, oldest month first. ``cursor`` must be a dictionary cursor."""
+    cursor.execute("SELECT partition_name, month, file_name, row_count, archived_at FROM scan_archives ORDER BY month")
+    return cursor.fetchall()
@@ -0,0 +1,274 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+import mysql.connector
+from flask import current_app
+
+from .scans import write_scans
+
+
+# Errors caused by the rows themselves: retrying the batch cannot help
+DATA_ERRORS = (
+    mysql.connector.DataError,
+    mysql.connector.IntegrityError,
+    mysql.connector.ProgrammingError,
+    AttributeError,
+    KeyError,
+    TypeError,
+    ValueError,
+)
+
+
+class ScanQueueFull(Exception):
+    """Raised when the write-behind buffer stays full past the put timeout"""
+
+
+class ScanWriter:
+    """Write-behind buffer for scan records.
+
+    Scans are queued in memory and written by a background thread in
+    batches of up to ``batch_size`` rows, or every ``flush_interval``
+    seconds, whichever comes first. The queue is bounded: ``submit()``
+    blocks for up to ``put_timeout`` seconds when it is full and then
+    raises ScanQueueFull. Batches that cannot be written are spilled to
+    JSON-lines files in ``spool_dir`` and replayed after the next
+    successful write. Batches MySQL rejects for their data, and spool
+    files that cannot be read, are set aside as ``*.jsonl.bad`` instead
+    of being retried forever. Pending scans are flushed at interpreter
+    exit.
+    """
+
+    def __init__(self, pool, max_size=10000, batch_size=200, flush_interval=1.0,
+                 put_timeout=2.0, spool_dir='spool'):
+        self.pool = pool
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.spool_dir = spool_dir
+
+        self._queue = queue.Queue(maxsize=max_size)
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'queued': 0,
+            'written': 0,
+            'batches': 0,
+            'rejected': 0,
+            'spilled': 0,
+            'replayed': 0,
+            'quarantined': 0,
+        }
+
+    def _count(self, key, n=1):
+        with self._stats_lock:
+            self._stats[key] += n
+
+    def _ensure_started(self):
+        # Threads do not survive fork(), so start one per worker process
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='scan-writer', daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+
+    def submit(self, scan):
+        """Queue a scan row for writing"""
+        self._ensure_started()
+        try:
+            self._queue.put(scan, timeout=self.put_timeout)
+        except queue.Full:
+            self._count('rejected')
+            raise ScanQueueFull('Scan write queue is full')
+        self._count('queued')
+
+    def _drain(self, block=True):
+        """Collect up to one batch, waiting at most flush_interval"""
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if block and remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                batch = self._drain()
+                if batch and not self._write(batch):
+                    continue
+                self._replay_spool()
+            except Exception as e:
+                # Never let one bad round end the thread: submit() would
+                # start failing once the queue fills up
+                logging.error(f"Scan writer loop failed: {e}")
+                self._stop.wait(self.flush_interval)
+
+    def _insert(self, batch):
+        """Write a batch in one transaction; raises on failure"""
+        conn = self.pool.acquire()
+        try:
+            cursor = conn.cursor()
+            write_scans(conn, cursor, batch)
+            cursor.close()
+        except Exception:
+            conn.discard()
+            raise
+        conn.close()
+
+        self._count('written', len(batch))
+        self._count('batches')
+
+    def _write(self, batch):
+        """Write a batch, spilling it to disk on failure.
+
+        Returns False when MySQL could not take the batch and later
+        writes should wait, True otherwise.
+        """
+        try:
+            self._insert(batch)
+        except DATA_ERRORS as e:
+            logging.error(f"Scan writer rejected {len(batch)} scans: {e}")
+            self._spill(batch, suffix='.jsonl.bad')
+            self._count('quarantined')
+            return True
+        except Exception as e:
+            logging.error(f"Scan writer failed to write {len(batch)} scans: {e}")
+            self._spill(batch)
+            return False
+        return True
+
+    def _spill(self, batch, suffix='.jsonl'):
+        try:
+            os.makedirs(self.spool_dir, exist_ok=True)
+            path = os.path.join(self.spool_dir, f"scans-{os.getpid()}-{time.time_ns()}{suffix}")
+            # Written under a temporary name so no worker replays a half-written file
+            with open(f"{path}.tmp", 'w') as f:
+                for scan in batch:
+                    row = dict(scan)
+                    if isinstance(row.get('scan_timestamp'), datetime):
+                        row['scan_timestamp'] = row['scan_timestamp'].isoformat()
+                    f.write(json.dumps(row, default=str) + '\n')
+            os.replace(f"{path}.tmp", path)
+        except OSError as e:
+            logging.error(f"Scan writer lost {len(batch)} scans, spooling failed: {e}")
+            return
+        self._count('spilled', len(batch))
+        logging.warning(f"Spilled {len(batch)} scans to {path}")
+
+    def _quarantine(self, claimed, path, error):
+        """Set a spool file that cannot be written aside as <name>.bad"""
+        bad_path = f"{path}.bad"
+        try:
+            os.rename(claimed, bad_path)
+        except OSError as e:
+            logging.error(f"Scan writer could not quarantine {claimed}: {e}")
+            return
+        self._count('quarantined')
+        logging.error(f"Quarantined spool file {bad_path}: {error}")
+
+    def _replay_spool(self):
+        """Write back scans spilled while MySQL was unreachable"""
+        try:
+            names = sorted(n for n in os.listdir(self.spool_dir) if n.endswith('.jsonl'))
+        except OSError:
+            return
+
+        for name in names:
+            path = os.path.join(self.spool_dir, name)
+            claimed = f"{path}.replay-{os.getpid()}"
+            try:
+                # Rename first so concurrent workers never replay the same file
+                os.rename(path, claimed)
+            except OSError:
+                continue
+
+            try:
+                with open(claimed) as f:
+                    batch = [json.loads(line) for line in f if line.strip()]
+                for scan in batch:
+                    scan['scan_timestamp'] = datetime.fromisoformat(scan['scan_timestamp'])
+            except (OSError, KeyError, TypeError, ValueError) as e:
+                # Partly written or corrupt file
+                self._quarantine(claimed, path, e)
+                continue
+
+            try:
+                self._insert(batch)
+            except DATA_ERRORS as e:
+                self._quarantine(claimed, path, e)
+                continue
+            except Exception as e:
+                # MySQL went away again; hand the file back for the next round
+                logging.error(f"Scan writer failed to replay {name}: {e}")
+                try:
+                    os.rename(claimed, path)
+                except OSError:
+                    pass
+                return
+            os.remove(claimed)
+            self._count('replayed', len(batch))
+
+    def flush(self):
+        """Write everything queued so far from the calling thread"""
+        while True:
+            batch = self._drain(block=False)
+            if not batch:
+                break
+            self._write(batch)
+
+    def stop(self):
+        """Stop the background thread and flush what is left"""
+        self._stop.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+    def stats(self):
+        """Queue depth and write counters"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['pending'] = self._queue.qsize()
+        stats['max_size'] = self._queue.maxsize
+        return stats
+
+
+def get_scan_writer():
+    """Return the write-behind scan writer, or None when disabled"""
+    return current_app.extensions.get('scan_writer')
+
+
+def init_scan_writer(app, pool):
+    """Create the write-behind scan writer if SCAN_WRITE_BEHIND is enabled"""
+    if not app.config['SCAN_WRITE_BEHIND']:
+        return None
+    writer = ScanWriter(
+        pool,
+        max_size=app.config['SCAN_QUEUE_SIZE'],
+        batch_size=app.config['SCAN_FLUSH_BATCH_SIZE'],
+        flush_interval=app.config['SCAN_FLUSH_INTERVAL'],
+        put_timeout=app.config['SCAN_QUEUE_PUT_TIMEOUT'],
+        spool_dir=app.config['SCAN_SPOOL_DIR']
+    )
+    app.extensions['scan_writer'] = writer
+    return writer
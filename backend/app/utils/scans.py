@@ -0,0 +1,80 @@
+from .db import placeholders
+from .rollups import update_rollups
+from .device_status import update_scan_status
+
+SCAN_INSERT = """
+INSERT INTO scans (device_id, job_id, barcode, scan_timestamp, location, notes)
+VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+
+def record_scans(cursor, scans):
+    """Insert scan rows and update devices.last_scan, device_status and the rollups.
+
+    ``scans`` is a list of dicts with device_id, job_id, barcode,
+    scan_timestamp, location and notes. All rows go out in one multi-row
+    INSERT and the last_scan of every known device in one UPDATE. Call
+    it inside a transaction (see write_scans) so the rollups and
+    device_status never drift from the scans.
+    """
+    if not scans:
+        return
+
+    cursor.executemany(SCAN_INSERT, [
+        (
+            scan.get('device_id'),
+            scan.get('job_id'),
+            scan['barcode'],
+            scan['scan_timestamp'],
+            scan.get('location', ''),
+            scan.get('notes', '')
+        )
+        for scan in scans
+    ])
+
+    update_rollups(cursor, scans)
+    update_scan_status(cursor, scans)
+
+    last_scan = {}
+    for scan in scans:
+        device_id = scan.get('device_id')
+        if device_id is None:
+            continue
+        if device_id not in last_scan or scan['scan_timestamp'] > last_scan[device_id]:
+            last_scan[device_id] = scan['scan_timestamp']
+
+    if not last_scan:
+        return
+
+    cases = []
+    params = []
+    for device_id, timestamp in last_scan.items():
+        cases.append("WHEN %s THEN %s")
+        params.extend([device_id, timestamp])
+
+    device_ids = list(last_scan)
+    params.extend(device_ids)
+    cursor.execute(
+        f"UPDATE devices SET last_scan = CASE id {' '.join(cases)} END "
+        f"WHERE id IN ({placeholders(device_ids)})",
+        params
+    )
+
+
+def write_scans(conn, cursor, scans):
+    """record_scans() in one transaction on ``conn``.
+
+    Joins the caller's transaction if one is open, otherwise commits (or
+    rolls back) its own. Every scan path goes through here, so a scan
+    row never lands without its rollup and device_status updates.
+    """
+    if conn.in_transaction:
+        record_scans(cursor, scans)
+        return
+    conn.start_transaction()
+    try:
+        record_scans(cursor, scans)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
@@ -0,0 +1,126 @@
+import json
+
+from flask import Response, current_app, jsonify, request, stream_with_context
+
+from .db import get_db_connection, fetch_result_sets, mark_streamed
+from .encoders import CustomJSONEncoder
+
+
+class Rows:
+    """A query whose rows become a JSON array in a report response.
+
+    ``count_key`` adds the number of rows under that key, after all
+    arrays, so streamed responses can report counts without buffering.
+    """
+
+    def __init__(self, query, params=(), count_key=None):
+        self.query = query
+        self.params = params
+        self.count_key = count_key
+
+
+def wants_stream():
+    """True when the client asked for ?stream=true"""
+    return request.args.get('stream', '').lower() in ('1', 'true', 'yes')
+
+
+def _dumps(value):
+    return json.dumps(value, cls=CustomJSONEncoder, separators=(',', ':'))
+
+
+def _generate(conn, cursor, fields, chunk_size, executed=None):
+    """Write the JSON object; ``executed`` is a Rows already run on ``cursor``"""
+    counts = []
+    finished = False
+    try:
+        yield '{'
+        for index, (key, value) in enumerate(fields):
+            yield (',' if index else '') + _dumps(key) + ':'
+
+            if not isinstance(value, Rows):
+                yield _dumps(value)
+                continue
+
+            if value is not executed:
+                cursor.execute(value.query, value.params)
+            yield '['
+            count = 0
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                parts = []
+                for row in rows:
+                    parts.append((',' if count else '') + _dumps(row))
+                    count += 1
+                yield ''.join(parts)
+            yield ']'
+
+            if value.count_key:
+                counts.append((value.count_key, count))
+
+        for key, count in counts:
+            yield ',' + _dumps(key) + ':' + str(count)
+        yield '}'
+        finished = True
+    finally:
+        if finished:
+            cursor.close()
+            conn.close()
+        else:
+            # Client went away mid-stream; unread rows make the connection unusable
+            conn.discard()
+
+
+def json_response(fields, stream=None):
+    """Build a JSON object response from (key, value) pairs.
+
+    Values that are Rows are queried on one pooled connection. With
+    ``stream`` (default: ?stream=true) the object is written
+    incrementally from an unbuffered cursor, so memory stays flat no
+    matter how many rows the queries return; otherwise it is built in
+    memory and jsonify()'d as before. A streamed response runs its first
+    query before returning, so a failing query still ends in a 500
+    rather than a truncated 200.
+    """
+    if stream is None:
+        stream = wants_stream()
+
+    conn = get_db_connection()
+
+    if stream:
+        chunk_size = current_app.config['STREAM_CHUNK_SIZE']
+        cursor = conn.cursor(dictionary=True)  # unbuffered: rows are read as we go
+        first = next((value for _, value in fields if isinstance(value, Rows)), None)
+        if first is not None:
+            try:
+                cursor.execute(first.query, first.params)
+            except Exception:
+                conn.discard()
+                raise
+        mark_streamed()
+        return Response(
+            stream_with_context(_generate(conn, cursor, fields, chunk_size, first)),
+            mimetype='application/json'
+        )
+
+    # Buffered: all queries go out in one round trip
+    cursor = conn.cursor(dictionary=True)
+    queries = [value for _, value in fields if isinstance(value, Rows)]
+    result_sets = iter(fetch_result_sets(cursor, [(rows.query, rows.params) for rows in queries]))
+
+    result = {}
+    counts = {}
+    for key, value in fields:
+        if isinstance(value, Rows):
+            value_rows = next(result_sets)
+            result[key] = value_rows
+            if value.count_key:
+                counts[value.count_key] = len(value_rows)
+        else:
+            result[key] = value
+    result.update(counts)
+
+    cursor.close()
+    conn.close()
+    return jsonify(result)
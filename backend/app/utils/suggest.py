@@ -0,0 +1,159 @@
+import threading
+import unicodedata
+
+from flask import current_app
+
+from .cache import TTLCache
+from .device_search import escape_like
+
+SUGGEST_FIELDS = ('id', 'name', 'barcode')
+
+
+def fold(value):
+    """Case- and accent-insensitive form, close to utf8mb4_unicode_ci"""
+    decomposed = unicodedata.normalize('NFKD', value)
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+
+
+class SingleFlight:
+    """Run one call per key at a time; concurrent callers share its result.
+
+    The first caller for a key runs ``fn``; callers arriving while it is
+    in flight wait for it and get the same result or exception.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}  # key -> [event, result, error]
+        self.shared = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = [threading.Event(), None, None]
+            else:
+                self.shared += 1
+
+        event = call[0]
+        if not leader:
+            event.wait()
+            if call[2] is not None:
+                raise call[2]
+            return call[1]
+
+        try:
+            call[1] = fn()
+            return call[1]
+        except Exception as e:
+            call[2] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            event.set()
+
+
+class DeviceSuggester:
+    """Typeahead over device barcodes and names.
+
+    A suggestion matches when the barcode or the name starts with the
+    typed text. Each prefix fetched from MySQL is cached together with a
+    flag saying whether it holds every match (fewer than ``fetch_limit``
+    rows came back). Narrowing "spk" to "spk1" then filters the cached
+    "spk" rows in memory; identical queries in flight at the same time
+    share one database round trip.
+    """
+
+    def __init__(self, fetch_limit=200, maxsize=1024, ttl=10):
+        self.fetch_limit = fetch_limit
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._flight = SingleFlight()
+        self._stats_lock = threading.Lock()
+        self._stats = {'queries': 0, 'exact_hits': 0, 'prefix_hits': 0, 'fetches': 0}
+
+    def _count(self, name):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def _cached(self, key):
+        """Cached rows from which the suggestions for ``key`` can be filtered"""
+        entry = self._cache.get(key)
+        if entry is not None:
+            self._count('exact_hits')
+            return entry[1]
+        for length in range(len(key) - 1, 0, -1):
+            entry = self._cache.get(key[:length])
+            if entry is not None and entry[0]:
+                self._count('prefix_hits')
+                return entry[1]
+        return None
+
+    def _fetch(self, cursor, query):
+        prefix = escape_like(query) + '%'
+        limit = self.fetch_limit + 1
+        cursor.execute("""
+            (SELECT id, name, barcode FROM devices WHERE barcode LIKE %s ORDER BY barcode LIMIT %s)
+            UNION
+            (SELECT id, name, barcode FROM devices WHERE name LIKE %s ORDER BY name LIMIT %s)
+        """, (prefix, limit, prefix, limit))
+        rows = [tuple(row[field] for field in SUGGEST_FIELDS) for row in cursor.fetchall()]
+        self._count('fetches')
+        # UNION dedupes, so either branch hitting its limit shows up as > fetch_limit
+        complete = len(rows) <= self.fetch_limit
+        return complete, rows
+
+    def suggest(self, cursor, query, limit=10):
+        """Return up to ``limit`` {id, name, barcode} dicts for ``query``.
+
+        ``cursor`` must be a dictionary cursor; it is only used on a miss.
+        """
+        key = fold(query)
+        self._count('queries')
+
+        rows = self._cached(key)
+        if rows is None:
+            def load():
+                entry = self._fetch(cursor, query)
+                self._cache.set(key, entry)
+                return entry
+            rows = self._flight.do(key, load)[1]
+
+        matches = []
+        for row in rows:
+            barcode, name = fold(row[2]), fold(row[1])
+            if barcode.startswith(key) or name.startswith(key):
+                # Exact barcode first, then barcode prefixes, then names
+                rank = 0 if barcode == key else 1 if barcode.startswith(key) else 2
+                matches.append((rank, name, row))
+        matches.sort(key=lambda match: match[:2])
+
+        return [dict(zip(SUGGEST_FIELDS, row)) for _, _, row in matches[:limit]]
+
+    def clear(self):
+        """Forget every cached prefix, e.g. after a device was added or renamed"""
+        self._cache.clear()
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['coalesced'] = self._flight.shared
+        stats['cache'] = self._cache.stats()
+        return stats
+
+
+def get_suggester():
+    """Return the device suggester of the current app"""
+    return current_app.extensions['device_suggester']
+
+
+def init_suggest(app):
+    """Create the typeahead suggester for the app"""
+    suggester = DeviceSuggester(
+        fetch_limit=app.config['SUGGEST_FETCH_LIMIT'],
+        maxsize=app.config['SUGGEST_CACHE_SIZE'],
+        ttl=app.config['SUGGEST_CACHE_TTL']
+    )
+    app.extensions['device_suggester'] = suggester
+    return suggester
@@ -0,0 +1,97 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+
+class WorkersBusy(Exception):
+    """Raised when a process pool is saturated or a task timed out"""
+
+
+class ProcessWorkers:
+    """Bounded process pool for CPU-heavy work such as rendering.
+
+    Work runs outside the request worker's GIL, so its other threads keep
+    serving while a task is computed. At most ``workers`` tasks run at
+    once and ``max_pending`` more may wait; beyond that run() raises
+    WorkersBusy. Pools are created lazily per process with the 'spawn'
+    start method, since forking a threaded gunicorn worker is unsafe.
+    Task functions must be module-level so they can be pickled.
+    """
+
+    def __init__(self, name, workers=2, max_pending=4, timeout=60):
+        self.name = name
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+        self._stats_lock = threading.Lock()
+        self._stats = {'completed': 0, 'failed': 0, 'rejected': 0, 'timeouts': 0}
+
+    def _count(self, key):
+        with self._stats_lock:
+            self._stats[key] += 1
+
+    def _get_executor(self):
+        if self._executor is not None and self._pid == os.getpid():
+            return self._executor
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+
+    def _reset(self, executor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
+
+    def run(self, fn, *args):
+        """Run fn(*args) in a worker process and return its result"""
+        if not self._slots.acquire(blocking=False):
+            self._count('rejected')
+            raise WorkersBusy(f'Too many pending {self.name} tasks')
+        try:
+            executor = self._get_executor()
+            future = executor.submit(fn, *args)
+            try:
+                result = future.result(timeout=self.timeout)
+            except FutureTimeoutError:
+                future.cancel()
+                self._count('timeouts')
+                raise WorkersBusy(f'{self.name} task timed out')
+            except BrokenProcessPool:
+                # A worker died (e.g. OOM-killed); start a fresh pool next time
+                self._reset(executor)
+                self._count('failed')
+                raise
+            except Exception:
+                self._count('failed')
+                raise
+        finally:
+            self._slots.release()
+
+        self._count('completed')
+        return result
+
+    def shutdown(self):
+        """Stop this process's worker processes"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None and self._pid == os.getpid():
+            executor.shutdown(wait=True)
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['workers'] = self.workers
+        stats['started'] = self._executor is not None and self._pid == os.getpid()
+        return stats
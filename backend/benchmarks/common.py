@@ -0,0 +1,79 @@
+"""Shared helpers for the benchmark scripts.
+
+Benchmarks create and fill their own tables, so they only ever run
+against the database named in BENCH_MYSQL_DATABASE, never the
+application database. Connection settings otherwise come from the same
+MYSQL_* variables the API uses.
+"""
+import os
+import sys
+import time
+
+import mysql.connector
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def bench_database():
+    """Name of the scratch database, refusing to touch the application database"""
+    database = os.getenv('BENCH_MYSQL_DATABASE')
+    if not database:
+        sys.exit("Set BENCH_MYSQL_DATABASE to a scratch database; benchmarks drop and refill tables.")
+    if database == os.getenv('MYSQL_DATABASE'):
+        sys.exit("BENCH_MYSQL_DATABASE must not be the application database.")
+    return database
+
+
+def bench_connection():
+    """Connect to the dedicated benchmark database"""
+    return mysql.connector.connect(
+        host=os.getenv('MYSQL_HOST', 'localhost'),
+        user=os.getenv('MYSQL_USER', 'root'),
+        password=os.getenv('MYSQL_PASSWORD', ''),
+        database=bench_database(),
+        autocommit=True
+    )
+
+
+def bench_app():
+    """The Flask app with its connection pool pointed at the benchmark database"""
+    os.environ['MYSQL_DATABASE'] = bench_database()
+    from app import create_app
+    return create_app()
+
+
+def bench_token(app):
+    """A bearer token that require_auth accepts for ``app``"""
+    import jwt
+
+    return jwt.encode(
+        {'user': 'bench', 'role': 'admin', 'host': '%', 'exp': int(time.time()) + 3600},
+        app.config['JWT_SECRET_KEY'],
+        algorithm='HS256'
+    )
+
+
+def insert_batches(cursor, query, rows, batch_size=5000):
+    """executemany() in chunks so multi-row INSERTs stay under max_allowed_packet"""
+    for start in range(0, len(rows), batch_size):
+        cursor.executemany(query, rows[start:start + batch_size])
+
+
+def timed(fn, repeat=20):
+    """Run fn repeat times and return the per-call latencies in milliseconds, sorted"""
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return latencies
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
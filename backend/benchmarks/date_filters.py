@@ -0,0 +1,122 @@
+"""Compare DATE(col) = day filters with half-open >= / < bounds.
+
+Seeds jobs and scans in the benchmark database, then prints the EXPLAIN
+plan and latency of each pair of queries the API used to run and now
+runs. The DATE() forms should show a full scan (type ALL, key NULL);
+the range forms should use idx_created_at / idx_scan_timestamp.
+
+    BENCH_MYSQL_DATABASE=scanner_bench python -m benchmarks.date_filters [--days 365] [--per-day 500]
+"""
+import argparse
+import os
+import random
+import sys
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import bench_connection, insert_batches, timed, percentile  # noqa: E402
+from app.utils.dates import day_bounds  # noqa: E402
+
+SCHEMA = [
+    "DROP TABLE IF EXISTS scans",
+    "DROP TABLE IF EXISTS jobs",
+    """
+    CREATE TABLE jobs (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        jobID VARCHAR(50) UNIQUE NOT NULL,
+        title VARCHAR(255) NOT NULL,
+        status VARCHAR(20) DEFAULT 'pending',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        INDEX idx_created_at (created_at)
+    ) ENGINE=InnoDB
+    """,
+    """
+    CREATE TABLE scans (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        device_id INT NULL,
+        barcode VARCHAR(255) NOT NULL,
+        scan_timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        INDEX idx_scan_timestamp (scan_timestamp)
+    ) ENGINE=InnoDB
+    """,
+]
+
+
+def seed(cursor, days, per_day):
+    for statement in SCHEMA:
+        cursor.execute(statement)
+
+    today = datetime.combine(date.today(), datetime.min.time())
+    jobs = []
+    scans = []
+    for offset in range(days):
+        day = today - timedelta(days=offset)
+        for n in range(max(1, per_day // 50)):
+            jobs.append((f"JOB{day:%Y%m%d}{n:03d}", f"Job {n}", day + timedelta(seconds=random.randrange(86400))))
+        for _ in range(per_day):
+            scans.append((random.randint(1, 1000), f"DEV{random.randint(1, 1000):05d}",
+                          day + timedelta(seconds=random.randrange(86400))))
+
+    insert_batches(cursor, "INSERT INTO jobs (jobID, title, created_at) VALUES (%s, %s, %s)", jobs)
+    insert_batches(cursor, "INSERT INTO scans (device_id, barcode, scan_timestamp) VALUES (%s, %s, %s)", scans)
+    cursor.execute("ANALYZE TABLE jobs, scans")
+    cursor.fetchall()
+    return len(jobs), len(scans)
+
+
+def explain(cursor, query, params):
+    cursor.execute("EXPLAIN " + query, params)
+    columns = [column[0] for column in cursor.description]
+    row = dict(zip(columns, cursor.fetchone()))
+    cursor.fetchall()
+    return row
+
+
+def run(cursor, query, params):
+    cursor.execute(query, params)
+    cursor.fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--per-day', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    conn = bench_connection()
+    cursor = conn.cursor()
+
+    job_count, scan_count = seed(cursor, args.days, args.per_day)
+    print(f"Seeded {job_count} jobs and {scan_count} scans over {args.days} days\n")
+
+    day = date.today() - timedelta(days=args.days // 2)
+    bounds = day_bounds(day)
+
+    cases = [
+        ("daily jobs",
+         ("SELECT id, jobID FROM jobs WHERE DATE(created_at) = %s", (day,)),
+         ("SELECT id, jobID FROM jobs WHERE created_at >= %s AND created_at < %s", bounds)),
+        ("daily scans",
+         ("SELECT id, barcode FROM scans WHERE DATE(scan_timestamp) = %s", (day,)),
+         ("SELECT id, barcode FROM scans WHERE scan_timestamp >= %s AND scan_timestamp < %s", bounds)),
+        ("job number count",
+         ("SELECT COUNT(*) FROM jobs WHERE DATE(created_at) = CURDATE()", ()),
+         ("SELECT COUNT(*) FROM jobs WHERE created_at >= %s AND created_at < %s", day_bounds(date.today()))),
+    ]
+
+    print(f"{'query':<18} {'form':<6} {'type':<6} {'key':<20} {'rows':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, *forms in cases:
+        for label, (query, params) in zip(('DATE()', 'range'), forms):
+            plan = explain(cursor, query, params)
+            latencies = timed(lambda: run(cursor, query, params), args.repeat)
+            print(f"{name:<18} {label:<6} {str(plan['type']):<6} {str(plan['key']):<20} "
+                  f"{plan['rows']:>8} {percentile(latencies, 50):>8.2f} {percentile(latencies, 99):>8.2f}")
+
+    cursor.close()
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
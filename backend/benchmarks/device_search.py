@@ -0,0 +1,111 @@
+"""Compare the old four-way LIKE '%q%' device search with find_devices().
+
+Seeds a devices table (100k rows by default) with the production indexes
+in the benchmark database, then prints p50/p99 latency of each search
+for a mix of barcode, name and type queries.
+
+    BENCH_MYSQL_DATABASE=scanner_bench python -m benchmarks.device_search [--devices 100000]
+"""
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import bench_connection, insert_batches, timed, percentile  # noqa: E402
+from app.utils.device_search import find_devices  # noqa: E402
+
+SCHEMA = [
+    "DROP TABLE IF EXISTS devices",
+    """
+    CREATE TABLE devices (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        type VARCHAR(100) DEFAULT 'equipment',
+        barcode VARCHAR(255) UNIQUE NOT NULL,
+        status VARCHAR(20) DEFAULT 'available',
+        location VARCHAR(255) DEFAULT '',
+        last_scan TIMESTAMP NULL,
+        INDEX idx_barcode (barcode),
+        INDEX idx_name (name),
+        FULLTEXT INDEX ft_devices_search (name, type, location)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """,
+]
+
+TYPES = ['audio', 'video', 'lighting', 'rigging', 'power', 'network', 'staging']
+MODELS = ['Mixer', 'Speaker', 'Projector', 'Moving Head', 'Truss', 'Distro', 'Switch',
+          'Microphone', 'Amplifier', 'Monitor', 'Camera', 'Dimmer', 'Cable', 'Case']
+VARIANTS = ['Pro', 'Ultra', 'Mini', 'XL', '4K', 'Wireless', 'Compact', 'Stereo']
+LOCATIONS = [f'Warehouse {hall} - Shelf {shelf}' for hall in 'ABCD' for shelf in range(1, 21)]
+
+LIKE_SEARCH = """
+SELECT * FROM devices
+WHERE name LIKE %s OR barcode LIKE %s OR type LIKE %s OR location LIKE %s
+ORDER BY name
+LIMIT %s
+"""
+
+
+def seed(cursor, count):
+    for statement in SCHEMA:
+        cursor.execute(statement)
+
+    rows = []
+    for n in range(count):
+        device_type = random.choice(TYPES)
+        name = f"{random.choice(MODELS)} {random.choice(VARIANTS)} {n % 500}"
+        rows.append((name, device_type, f"{device_type[:3].upper()}{n:09d}", random.choice(LOCATIONS)))
+    insert_batches(cursor, "INSERT INTO devices (name, type, barcode, location) VALUES (%s, %s, %s, %s)", rows)
+    cursor.execute("ANALYZE TABLE devices")
+    cursor.fetchall()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--devices', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+
+    conn = bench_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    rows = seed(cursor, args.devices)
+    print(f"Seeded {len(rows)} devices\n")
+
+    sample = random.choice(rows)
+    queries = [
+        ('exact barcode', sample[2]),
+        ('barcode prefix', sample[2][:6]),
+        ('name word', 'projector'),
+        ('two words', 'speaker wireless'),
+        ('type', 'lighting'),
+        ('no match', 'zzzzzz'),
+    ]
+
+    print(f"{'query':<16} {'search':<8} {'p50 ms':>8} {'p99 ms':>8} {'rows':>6}")
+    for label, query in queries:
+        term = f"%{query}%"
+
+        def like():
+            cursor.execute(LIKE_SEARCH, (term, term, term, term, args.limit))
+            return cursor.fetchall()
+
+        def indexed():
+            return find_devices(cursor, query, args.limit)
+
+        for name, search in (('LIKE', like), ('indexed', indexed)):
+            found = len(search())
+            latencies = timed(search, args.repeat)
+            print(f"{label:<16} {name:<8} {percentile(latencies, 50):>8.2f} "
+                  f"{percentile(latencies, 99):>8.2f} {found:>6}")
+
+    cursor.close()
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
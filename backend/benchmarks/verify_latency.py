@@ -0,0 +1,95 @@
+"""p50/p99 latency of GET /devices/verify/<id> through the Flask app.
+
+Seeds a devices table in the benchmark database, then requests the
+endpoint through the test client (no network) for:
+
+- warm barcode   barcode already in the device cache
+- warm DEVICE:id QR payload resolved through the cached id -> barcode map
+- cold           device cache cleared before every request (one query)
+- unknown        barcode that does not exist (negative cache)
+
+    BENCH_MYSQL_DATABASE=scanner_bench python -m benchmarks.verify_latency [--devices 10000]
+"""
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import (  # noqa: E402
+    bench_app, bench_connection, bench_token, insert_batches, timed, percentile
+)
+
+SCHEMA = [
+    "DROP TABLE IF EXISTS devices",
+    """
+    CREATE TABLE devices (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        type VARCHAR(100) DEFAULT 'equipment',
+        barcode VARCHAR(255) UNIQUE NOT NULL,
+        status VARCHAR(20) DEFAULT 'available',
+        location VARCHAR(255) DEFAULT '',
+        last_scan TIMESTAMP NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """,
+]
+
+
+def seed(count):
+    conn = bench_connection()
+    cursor = conn.cursor()
+    for statement in SCHEMA:
+        cursor.execute(statement)
+    insert_batches(cursor, "INSERT INTO devices (name, barcode) VALUES (%s, %s)", [
+        (f"Device {n}", f"DEV{n:08d}") for n in range(1, count + 1)
+    ])
+    cursor.close()
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--devices', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args()
+
+    seed(args.devices)
+    app = bench_app()
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {bench_token(app)}'}
+    device_cache = app.extensions['device_cache']
+
+    device_id = random.randint(1, args.devices)
+    barcode = f"DEV{device_id:08d}"
+
+    def verify(identifier, clear=False):
+        def request():
+            if clear:
+                device_cache.clear()
+            response = client.get(f'/api/v1/devices/verify/{identifier}', headers=headers)
+            assert response.status_code == 200, response.get_data(as_text=True)
+        return request
+
+    verify(barcode)()  # fill the cache
+    cases = [
+        ('warm barcode', verify(barcode)),
+        ('warm DEVICE:id', verify(f'DEVICE:{device_id}')),
+        ('cold', verify(barcode, clear=True)),
+        ('unknown', verify('NO-SUCH-BARCODE')),
+    ]
+
+    print(f"{args.devices} devices, {args.repeat} requests per case\n")
+    print(f"{'case':<16} {'p50 ms':>8} {'p99 ms':>8}")
+    for label, request in cases:
+        latencies = timed(request, args.repeat)
+        print(f"{label:<16} {percentile(latencies, 50):>8.3f} {percentile(latencies, 99):>8.3f}")
+
+    print(f"\ndevice cache: {device_cache.stats()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -10,10 +10,30 @@ class Config:
     MYSQL_USER = os.getenv('MYSQL_USER', 'root')
     MYSQL_PASSWORD = os.getenv('MYSQL_PASSWORD')  # Required environment variable
     MYSQL_POOL_SIZE = int(os.getenv('MYSQL_POOL_SIZE', '5'))
+    MYSQL_POOL_TIMEOUT = float(os.getenv('MYSQL_POOL_TIMEOUT', '10'))  # seconds to wait for a free connection
+    MYSQL_POOL_RECYCLE = int(os.getenv('MYSQL_POOL_RECYCLE', '1800'))  # reconnect connections older than this
+    MYSQL_POOL_PING_INTERVAL = int(os.getenv('MYSQL_POOL_PING_INTERVAL', '30'))  # ping idle connections before reuse
+    MYSQL_CONNECT_TIMEOUT = int(os.getenv('MYSQL_CONNECT_TIMEOUT', '10'))
 
     # JWT Settings
     SECRET_KEY = os.getenv('SECRET_KEY', 'your-secret-key-here')
     JWT_EXPIRATION = int(os.getenv('JWT_EXPIRATION', '3600'))  # 1 hour
+    JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'change-this-in-production')
+    AUTH_TOKEN_CACHE_SIZE = int(os.getenv('AUTH_TOKEN_CACHE_SIZE', '10000'))  # verified tokens kept until exp
+    AUTH_ROLE_CACHE_SIZE = int(os.getenv('AUTH_ROLE_CACHE_SIZE', '1000'))
+    AUTH_ROLE_CACHE_TTL = int(os.getenv('AUTH_ROLE_CACHE_TTL', '60'))  # seconds
+
+    # Login Settings
+    LOGIN_WORKERS = int(os.getenv('LOGIN_WORKERS', '4'))  # concurrent MySQL credential checks
+    LOGIN_MAX_PENDING = int(os.getenv('LOGIN_MAX_PENDING', '32'))  # checks allowed to wait for a worker
+    LOGIN_TIMEOUT = float(os.getenv('LOGIN_TIMEOUT', '10'))  # seconds
+    LOGIN_CACHE_TTL = int(os.getenv('LOGIN_CACHE_TTL', '300'))  # remember successful logins
+    LOGIN_RATE_LIMIT_WINDOW = int(os.getenv('LOGIN_RATE_LIMIT_WINDOW', '60'))  # seconds
+    LOGIN_RATE_LIMIT_USER = int(os.getenv('LOGIN_RATE_LIMIT_USER', '10'))  # failed attempts per user and IP
+    LOGIN_RATE_LIMIT_IP = int(os.getenv('LOGIN_RATE_LIMIT_IP', '30'))  # failed attempts per IP
+
+    # Number of reverse proxies in front of the app (X-Forwarded-For hops to trust)
+    PROXY_FIX_X_FOR = int(os.getenv('PROXY_FIX_X_FOR', '0'))
 
     # CORS Settings
     CORS_ORIGINS = os.getenv('CORS_ORIGINS', '*')
@@ -22,6 +42,74 @@ class Config:
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     UPLOAD_FOLDER = 'uploads'
 
+    # Scanning Settings
+    SCAN_BATCH_MAX_SIZE = int(os.getenv('SCAN_BATCH_MAX_SIZE', '1000'))
+
+    # Job Settings
+    JOB_IMPORT_MAX_SIZE = int(os.getenv('JOB_IMPORT_MAX_SIZE', '1000'))  # jobs per POST /jobs/import
+    JOB_DEVICES_BATCH_MAX_SIZE = int(os.getenv('JOB_DEVICES_BATCH_MAX_SIZE', '500'))  # devices per bulk assign/return
+
+    # Write-behind scan recording (acknowledge scans before they hit MySQL)
+    SCAN_WRITE_BEHIND = os.getenv('SCAN_WRITE_BEHIND', 'false').lower() == 'true'
+    SCAN_QUEUE_SIZE = int(os.getenv('SCAN_QUEUE_SIZE', '10000'))
+    SCAN_QUEUE_PUT_TIMEOUT = float(os.getenv('SCAN_QUEUE_PUT_TIMEOUT', '2'))  # seconds before rejecting
+    SCAN_FLUSH_BATCH_SIZE = int(os.getenv('SCAN_FLUSH_BATCH_SIZE', '200'))
+    SCAN_FLUSH_INTERVAL = float(os.getenv('SCAN_FLUSH_INTERVAL', '1'))  # seconds
+    SCAN_SPOOL_DIR = os.getenv('SCAN_SPOOL_DIR', 'spool')  # scans kept here while MySQL is unreachable
+
+    # Scan History Settings (flask scans ...; monthly partitions of the scans table)
+    SCAN_PARTITIONS_AHEAD = int(os.getenv('SCAN_PARTITIONS_AHEAD', '3'))  # empty months kept ready
+    SCAN_ARCHIVE_AFTER_MONTHS = int(os.getenv('SCAN_ARCHIVE_AFTER_MONTHS', '12'))  # older months are archived, 0 = never
+    SCAN_ARCHIVE_DIR = os.getenv('SCAN_ARCHIVE_DIR', 'scan-archive')  # gzipped CSV per archived month
+    SCAN_RETENTION_BATCH_SIZE = int(os.getenv('SCAN_RETENTION_BATCH_SIZE', '1000'))  # rows per DELETE
+
+    # Device Cache Settings (barcode -> device lookups)
+    DEVICE_CACHE_SIZE = int(os.getenv('DEVICE_CACHE_SIZE', '10000'))
+    DEVICE_CACHE_TTL = int(os.getenv('DEVICE_CACHE_TTL', '300'))  # seconds
+    DEVICE_CACHE_NEGATIVE_TTL = int(os.getenv('DEVICE_CACHE_NEGATIVE_TTL', '5'))  # unknown barcodes
+
+    # Device Search Settings (GET /devices/search)
+    DEVICE_SEARCH_LIMIT = int(os.getenv('DEVICE_SEARCH_LIMIT', '20'))  # default ?limit=, capped at PAGE_SIZE_MAX
+
+    # Typeahead Settings (GET /devices/suggest)
+    SUGGEST_LIMIT = int(os.getenv('SUGGEST_LIMIT', '10'))  # default ?limit=
+    SUGGEST_MAX_LIMIT = int(os.getenv('SUGGEST_MAX_LIMIT', '25'))
+    SUGGEST_FETCH_LIMIT = int(os.getenv('SUGGEST_FETCH_LIMIT', '200'))  # rows cached per prefix for narrowing
+    SUGGEST_CACHE_SIZE = int(os.getenv('SUGGEST_CACHE_SIZE', '1024'))  # prefixes
+    SUGGEST_CACHE_TTL = int(os.getenv('SUGGEST_CACHE_TTL', '10'))  # seconds
+
+    # Label Settings (GET /devices/<id>/label.png|svg, /devices/qrcode/<id>, POST /devices/labels.pdf)
+    LABEL_CACHE_DIR = os.getenv('LABEL_CACHE_DIR', 'label-cache')  # rendered images, content-addressed
+    LABEL_DEFAULT_SIZE = os.getenv('LABEL_DEFAULT_SIZE', 'medium')  # small, medium or large
+    LABEL_MAX_AGE = int(os.getenv('LABEL_MAX_AGE', '86400'))  # browser cache lifetime in seconds
+    LABEL_MEMORY_CACHE_SIZE = int(os.getenv('LABEL_MEMORY_CACHE_SIZE', '512'))  # QR images kept in memory
+    LABEL_SHEET_COLUMNS = int(os.getenv('LABEL_SHEET_COLUMNS', '3'))
+    LABEL_SHEET_ROWS = int(os.getenv('LABEL_SHEET_ROWS', '8'))
+    LABEL_PDF_MAX_LABELS = int(os.getenv('LABEL_PDF_MAX_LABELS', '1000'))
+    LABEL_PDF_WORKERS = int(os.getenv('LABEL_PDF_WORKERS', '2'))  # processes per gunicorn worker
+    LABEL_PDF_MAX_PENDING = int(os.getenv('LABEL_PDF_MAX_PENDING', '4'))  # sheets allowed to wait
+    LABEL_PDF_TIMEOUT = float(os.getenv('LABEL_PDF_TIMEOUT', '50'))  # below the gunicorn timeout
+
+    # Image Decoding Settings (POST /devices/decode)
+    DECODE_MAX_FRAMES = int(os.getenv('DECODE_MAX_FRAMES', '8'))  # frames per request
+    DECODE_MAX_SIDE = int(os.getenv('DECODE_MAX_SIDE', '800'))  # frames are downscaled to this many pixels
+    DECODE_MAX_PIXELS = int(os.getenv('DECODE_MAX_PIXELS', '16000000'))  # larger uploads are rejected
+    DECODE_WORKERS = int(os.getenv('DECODE_WORKERS', '2'))  # processes per gunicorn worker
+    DECODE_MAX_PENDING = int(os.getenv('DECODE_MAX_PENDING', '8'))
+    DECODE_TIMEOUT = float(os.getenv('DECODE_TIMEOUT', '10'))  # seconds
+
+    # Response Cache Settings (dashboard and report endpoints)
+    RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', '30'))  # seconds
+    RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', '256'))
+
+    # Pagination Settings (GET /jobs, GET /devices)
+    PAGE_SIZE_DEFAULT = int(os.getenv('PAGE_SIZE_DEFAULT', '50'))
+    PAGE_SIZE_MAX = int(os.getenv('PAGE_SIZE_MAX', '200'))
+
+    # Streaming Settings (?stream=true on report endpoints)
+    STREAM_CHUNK_SIZE = int(os.getenv('STREAM_CHUNK_SIZE', '500'))  # rows fetched per round
+    EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', '1000'))  # rows per CSV chunk
+
     # API Settings
     API_TITLE = 'Barcode Scanner API'
     API_VERSION = 'v1'
@@ -0,0 +1,50 @@
+"""Gunicorn settings for the production backend.
+
+Every setting can be overridden from the environment, e.g.
+GUNICORN_WORKERS=4 GUNICORN_THREADS=8 gunicorn -c gunicorn.conf.py run:app
+"""
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+
+# One process per core plus one, each serving requests on a thread pool
+workers = int(os.getenv('GUNICORN_WORKERS') or multiprocessing.cpu_count() * 2 + 1)
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+worker_class = 'gthread'
+
+# Build the app once in the master; workers inherit it on fork.
+# Database connections and background threads are created lazily per worker.
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+# Recycle workers after a number of requests (jittered so they don't all restart together)
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '2000'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '200'))
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+
+accesslog = os.getenv('GUNICORN_ACCESSLOG', '-')
+errorlog = os.getenv('GUNICORN_ERRORLOG', '-')
+loglevel = os.getenv('GUNICORN_LOGLEVEL', 'info')
+
+
+def worker_exit(server, worker):
+    """Flush queued scans, stop render processes and close pooled connections before a worker exits"""
+    app = worker.wsgi
+    if app is None:
+        return
+
+    scan_writer = app.extensions.get('scan_writer')
+    if scan_writer is not None:
+        scan_writer.stop()
+
+    for name in ('label_workers', 'decode_workers'):
+        workers = app.extensions.get(name)
+        if workers is not None:
+            workers.shutdown()
+
+    pool = app.extensions.get('db_pool')
+    if pool is not None:
+        pool.close_all()
@@ -0,0 +1,11 @@
+-- Indexes backing keyset pagination of GET /jobs and GET /devices
+-- Apply to databases created from an older schema.sql:
+--   mysql -h tsunami-events.de -u root -p TS-Lager < database/migrations/001_keyset_pagination_indexes.sql
+
+USE `TS-Lager`;
+
+-- GET /jobs?status=... ORDER BY created_at DESC, id DESC
+ALTER TABLE `jobs` ADD INDEX `idx_status_created` (`status`, `created_at`);
+
+-- GET /devices ORDER BY name, id
+ALTER TABLE `devices` ADD INDEX `idx_name` (`name`);
@@ -0,0 +1,23 @@
+-- Per-day and per-device/per-day scan rollups read by the reports blueprint
+-- After applying, fill them from existing scans:
+--   mysql -h tsunami-events.de -u root -p TS-Lager < database/migrations/002_scan_rollups.sql
+--   flask rollups backfill
+
+USE `TS-Lager`;
+
+CREATE TABLE IF NOT EXISTS `scan_daily_stats` (
+    `scan_date` DATE PRIMARY KEY,
+    `scan_count` INT NOT NULL DEFAULT 0,
+    `unknown_count` INT NOT NULL DEFAULT 0,
+    `updated_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS `device_daily_stats` (
+    `device_id` INT NOT NULL,
+    `scan_date` DATE NOT NULL,
+    `scan_count` INT NOT NULL DEFAULT 0,
+    `last_scan` TIMESTAMP NULL,
+    PRIMARY KEY (`device_id`, `scan_date`),
+    FOREIGN KEY (`device_id`) REFERENCES `devices`(`id`) ON DELETE CASCADE,
+    INDEX `idx_scan_date` (`scan_date`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -0,0 +1,18 @@
+-- Per-day counters behind generated jobIDs (JOB{YYYYMMDD}{nnn}).
+-- Seeds each day from the highest number already issued, so IDs generated
+-- after the upgrade continue where the old COUNT(*)-based generator stopped.
+--   mysql -h tsunami-events.de -u root -p TS-Lager < database/migrations/003_job_sequences.sql
+
+USE `TS-Lager`;
+
+CREATE TABLE IF NOT EXISTS `job_sequences` (
+    `seq_date` DATE PRIMARY KEY,
+    `last_value` INT NOT NULL DEFAULT 0
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+INSERT INTO `job_sequences` (`seq_date`, `last_value`)
+SELECT STR_TO_DATE(SUBSTRING(`jobID`, 4, 8), '%Y%m%d'), MAX(CAST(SUBSTRING(`jobID`, 12) AS UNSIGNED))
+FROM `jobs`
+WHERE `jobID` REGEXP '^JOB[0-9]{11,}$'
+GROUP BY SUBSTRING(`jobID`, 4, 8)
+ON DUPLICATE KEY UPDATE `last_value` = GREATEST(`last_value`, VALUES(`last_value`));
@@ -0,0 +1,9 @@
+-- FULLTEXT index behind GET /devices/search (word-prefix matches on name,
+-- type and location; barcode prefixes use idx_barcode).
+-- The first FULLTEXT index on a table rebuilds it to add FTS_DOC_ID, so
+-- run this outside business hours on large inventories.
+--   mysql -h tsunami-events.de -u root -p TS-Lager < database/migrations/004_device_search_fulltext.sql
+
+USE `TS-Lager`;
+
+ALTER TABLE `devices` ADD FULLTEXT INDEX `ft_devices_search` (`name`, `type`, `location`);
@@ -0,0 +1,7 @@
+-- Per-assignment price override sent as customPrice by the job detail and
+-- scanner pages (POST /devices/job/<job_id>/device).
+--   mysql -h tsunami-events.de -u root -p TS-Lager < database/migrations/005_job_devices_custom_price.sql
+
+USE `TS-Lager`;
+
+ALTER TABLE `job_devices` ADD COLUMN `custom_price` DECIMAL(10, 2) NULL AFTER `status`;
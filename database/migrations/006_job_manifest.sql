@@ -0,0 +1,11 @@
+-- Job manifest (GET /reports/job/<job_id>/devices):
+-- * job_devices.updated_at drives the incremental ?since= refresh
+-- * idx_device_time answers "latest scan of this device" with one index probe
+--   mysql -h tsunami-events.de -u root -p TS-Lager < database/migrations/006_job_manifest.sql
+
+USE `TS-Lager`;
+
+ALTER TABLE `job_devices`
+    ADD COLUMN `updated_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP AFTER `notes`;
+
+ALTER TABLE `scans` ADD INDEX `idx_device_time` (`device_id`, `scan_timestamp`);
@@ -0,0 +1,112 @@
+-- Maintained per-device status replacing the GROUP BY over all scans in device_status_view
+-- Scans and job assignments keep it current; after applying, fill it from existing data
+-- (rerun any time to repair drift):
+--   mysql -h tsunami-events.de -u root -p TS-Lager < database/migrations/007_device_status.sql
+--   flask device-status repair
+
+USE `TS-Lager`;
+
+CREATE TABLE IF NOT EXISTS `device_status` (
+    `device_id` INT PRIMARY KEY,
+    `current_job_id` INT NULL,
+    `last_scan_time` TIMESTAMP NULL,
+    `scan_day` DATE NULL,
+    `scan_count_day` INT NOT NULL DEFAULT 0,
+    `updated_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (`device_id`) REFERENCES `devices`(`id`) ON DELETE CASCADE,
+    FOREIGN KEY (`current_job_id`) REFERENCES `jobs`(`id`) ON DELETE SET NULL,
+    INDEX `idx_current_job` (`current_job_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE OR REPLACE VIEW `device_status_view` AS
+SELECT
+    d.*,
+    COALESCE(j.jobID, '') as current_job,
+    COALESCE(j.kunde, '') as current_customer,
+    ds.last_scan_time,
+    IF(ds.scan_day = CURDATE(), ds.scan_count_day, 0) as scan_count_today
+FROM devices d
+LEFT JOIN device_status ds ON d.id = ds.device_id
+LEFT JOIN jobs j ON ds.current_job_id = j.id;
+
+-- The assignment procedures keep device_status current as well
+DELIMITER //
+
+DROP PROCEDURE IF EXISTS `AssignDeviceToJob` //
+DROP PROCEDURE IF EXISTS `ReturnDeviceFromJob` //
+
+CREATE PROCEDURE `AssignDeviceToJob`(
+    IN p_job_id INT,
+    IN p_device_id INT,
+    IN p_assigned_by VARCHAR(255)
+)
+BEGIN
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        ROLLBACK;
+        RESIGNAL;
+    END;
+    
+    START TRANSACTION;
+    
+    -- Check if device is available
+    IF (SELECT status FROM devices WHERE id = p_device_id) != 'available' THEN
+        SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'Device is not available for assignment';
+    END IF;
+    
+    -- Assign device to job
+    INSERT INTO job_devices (job_id, device_id, notes) 
+    VALUES (p_job_id, p_device_id, CONCAT('Assigned by ', p_assigned_by));
+    
+    -- Update device status
+    UPDATE devices SET status = 'in_use' WHERE id = p_device_id;
+    
+    -- Record the current job
+    INSERT INTO device_status (device_id, current_job_id) VALUES (p_device_id, p_job_id)
+    ON DUPLICATE KEY UPDATE current_job_id = p_job_id;
+    
+    -- Update job device count
+    UPDATE jobs SET device_count = (
+        SELECT COUNT(*) FROM job_devices WHERE job_id = p_job_id AND status = 'assigned'
+    ) WHERE id = p_job_id;
+    
+    COMMIT;
+END //
+
+CREATE PROCEDURE `ReturnDeviceFromJob`(
+    IN p_job_id INT,
+    IN p_device_id INT,
+    IN p_returned_by VARCHAR(255)
+)
+BEGIN
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        ROLLBACK;
+        RESIGNAL;
+    END;
+    
+    START TRANSACTION;
+    
+    -- Mark device as returned
+    UPDATE job_devices 
+    SET status = 'returned', 
+        returned_at = NOW(),
+        notes = CONCAT(COALESCE(notes, ''), ' - Returned by ', p_returned_by)
+    WHERE job_id = p_job_id AND device_id = p_device_id;
+    
+    -- Update device status
+    UPDATE devices SET status = 'available' WHERE id = p_device_id;
+    
+    -- Clear the current job
+    UPDATE device_status SET current_job_id = NULL
+    WHERE device_id = p_device_id AND current_job_id = p_job_id;
+    
+    -- Update job device count
+    UPDATE jobs SET device_count = (
+        SELECT COUNT(*) FROM job_devices WHERE job_id = p_job_id AND status = 'assigned'
+    ) WHERE id = p_job_id;
+    
+    COMMIT;
+END //
+
+DELIMITER ;
@@ -0,0 +1,37 @@
+-- Monthly RANGE partitions on scans.scan_timestamp plus the scan_archives table
+-- * Partitioned InnoDB tables cannot have foreign keys: the ON DELETE SET NULL
+--   of scans.job_id is done by DELETE /jobs/<id> now (devices are never deleted
+--   through the API). Check the constraint names with SHOW CREATE TABLE scans.
+-- * Every unique key must contain the partitioning column, so the primary key
+--   becomes (id, scan_timestamp); id stays AUTO_INCREMENT and unique in practice.
+--   scan_timestamp becomes NOT NULL (the API always sets it).
+-- After applying, split the history into months (rebuilds the table once, so
+-- run it in a quiet hour) and schedule the daily maintenance:
+--   mysql -h tsunami-events.de -u root -p TS-Lager < database/migrations/008_partition_scans.sql
+--   flask scans partitions
+--   cron: flask scans maintain
+
+USE `TS-Lager`;
+
+ALTER TABLE `scans`
+    DROP FOREIGN KEY `scans_ibfk_1`,
+    DROP FOREIGN KEY `scans_ibfk_2`;
+
+ALTER TABLE `scans`
+    MODIFY `scan_timestamp` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (`id`, `scan_timestamp`);
+
+ALTER TABLE `scans`
+    PARTITION BY RANGE (UNIX_TIMESTAMP(`scan_timestamp`)) (
+        PARTITION `p_future` VALUES LESS THAN MAXVALUE
+    );
+
+CREATE TABLE IF NOT EXISTS `scan_archives` (
+    `partition_name` VARCHAR(16) PRIMARY KEY,
+    `month` DATE NOT NULL,
+    `file_name` VARCHAR(255) NOT NULL,
+    `row_count` INT NOT NULL DEFAULT 0,
+    `archived_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX `idx_month` (`month`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
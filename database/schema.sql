@@ -20,9 +20,16 @@ CREATE TABLE IF NOT EXISTS `jobs` (
     INDEX `idx_status` (`status`),
     INDEX `idx_kunde` (`kunde`),
     INDEX `idx_created_at` (`created_at`),
+    INDEX `idx_status_created` (`status`, `created_at`),
     INDEX `idx_dates` (`startDate`, `endDate`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+-- Per-day counters behind generated jobIDs (JOB{YYYYMMDD}{nnn})
+CREATE TABLE IF NOT EXISTS `job_sequences` (
+    `seq_date` DATE PRIMARY KEY,
+    `last_value` INT NOT NULL DEFAULT 0
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
 -- Devices table for equipment/inventory management
 CREATE TABLE IF NOT EXISTS `devices` (
     `id` INT AUTO_INCREMENT PRIMARY KEY,
@@ -35,29 +42,66 @@ CREATE TABLE IF NOT EXISTS `devices` (
     `created_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     `updated_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     INDEX `idx_barcode` (`barcode`),
+    INDEX `idx_name` (`name`),
     INDEX `idx_status` (`status`),
     INDEX `idx_type` (`type`),
     INDEX `idx_location` (`location`),
-    INDEX `idx_last_scan` (`last_scan`)
+    INDEX `idx_last_scan` (`last_scan`),
+    FULLTEXT INDEX `ft_devices_search` (`name`, `type`, `location`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
--- Scans table for tracking barcode scan history
+-- Scans table for tracking barcode scan history, partitioned by month.
+-- Partitioned tables cannot have foreign keys, and every unique key must
+-- include scan_timestamp. `flask scans maintain` adds months ahead, archives
+-- old months to gzipped CSV files and enforces max_scan_history.
 CREATE TABLE IF NOT EXISTS `scans` (
-    `id` INT AUTO_INCREMENT PRIMARY KEY,
+    `id` INT AUTO_INCREMENT,
     `device_id` INT NULL,
     `job_id` INT NULL,
     `barcode` VARCHAR(255) NOT NULL,
     `scanned_by` VARCHAR(255) DEFAULT '',
-    `scan_timestamp` TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    `scan_timestamp` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     `location` VARCHAR(255) DEFAULT '',
     `notes` TEXT,
-    FOREIGN KEY (`device_id`) REFERENCES `devices`(`id`) ON DELETE SET NULL,
-    FOREIGN KEY (`job_id`) REFERENCES `jobs`(`id`) ON DELETE SET NULL,
+    PRIMARY KEY (`id`, `scan_timestamp`),
     INDEX `idx_device_id` (`device_id`),
+    INDEX `idx_device_time` (`device_id`, `scan_timestamp`),
     INDEX `idx_job_id` (`job_id`),
     INDEX `idx_barcode` (`barcode`),
     INDEX `idx_scan_timestamp` (`scan_timestamp`),
     INDEX `idx_scanned_by` (`scanned_by`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+PARTITION BY RANGE (UNIX_TIMESTAMP(`scan_timestamp`)) (
+    PARTITION `p_future` VALUES LESS THAN MAXVALUE
+);
+
+-- Months of scans moved out of MySQL (flask scans archive)
+CREATE TABLE IF NOT EXISTS `scan_archives` (
+    `partition_name` VARCHAR(16) PRIMARY KEY,
+    `month` DATE NOT NULL,
+    `file_name` VARCHAR(255) NOT NULL,
+    `row_count` INT NOT NULL DEFAULT 0,
+    `archived_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX `idx_month` (`month`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Scan rollups, maintained incrementally by the API as scans are recorded.
+-- Rebuild from raw scans with: flask rollups backfill [--start YYYY-MM-DD] [--end YYYY-MM-DD]
+CREATE TABLE IF NOT EXISTS `scan_daily_stats` (
+    `scan_date` DATE PRIMARY KEY,
+    `scan_count` INT NOT NULL DEFAULT 0,
+    `unknown_count` INT NOT NULL DEFAULT 0,
+    `updated_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS `device_daily_stats` (
+    `device_id` INT NOT NULL,
+    `scan_date` DATE NOT NULL,
+    `scan_count` INT NOT NULL DEFAULT 0,
+    `last_scan` TIMESTAMP NULL,
+    PRIMARY KEY (`device_id`, `scan_date`),
+    FOREIGN KEY (`device_id`) REFERENCES `devices`(`id`) ON DELETE CASCADE,
+    INDEX `idx_scan_date` (`scan_date`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Job-Device assignments (many-to-many relationship)
@@ -68,7 +112,9 @@ CREATE TABLE IF NOT EXISTS `job_devices` (
     `assigned_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     `returned_at` TIMESTAMP NULL,
     `status` ENUM('assigned', 'returned', 'missing') DEFAULT 'assigned',
+    `custom_price` DECIMAL(10, 2) NULL,
     `notes` TEXT,
+    `updated_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (`job_id`) REFERENCES `jobs`(`id`) ON DELETE CASCADE,
     FOREIGN KEY (`device_id`) REFERENCES `devices`(`id`) ON DELETE CASCADE,
     UNIQUE KEY `unique_job_device` (`job_id`, `device_id`),
@@ -77,6 +123,20 @@ CREATE TABLE IF NOT EXISTS `job_devices` (
     INDEX `idx_status` (`status`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+-- Current job and scan activity per device, maintained by the scan and
+-- assignment paths (repair with `flask device-status repair`)
+CREATE TABLE IF NOT EXISTS `device_status` (
+    `device_id` INT PRIMARY KEY,
+    `current_job_id` INT NULL,
+    `last_scan_time` TIMESTAMP NULL,
+    `scan_day` DATE NULL,
+    `scan_count_day` INT NOT NULL DEFAULT 0,
+    `updated_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (`device_id`) REFERENCES `devices`(`id`) ON DELETE CASCADE,
+    FOREIGN KEY (`current_job_id`) REFERENCES `jobs`(`id`) ON DELETE SET NULL,
+    INDEX `idx_current_job` (`current_job_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
 -- Device maintenance log
 CREATE TABLE IF NOT EXISTS `maintenance_log` (
     `id` INT AUTO_INCREMENT PRIMARY KEY,
@@ -128,23 +188,15 @@ WHERE j.status IN ('pending', 'active')
 GROUP BY j.id;
 
 CREATE OR REPLACE VIEW `device_status_view` AS
-SELECT 
+SELECT
     d.*,
     COALESCE(j.jobID, '') as current_job,
     COALESCE(j.kunde, '') as current_customer,
-    s.last_scan_time,
-    s.scan_count_today
+    ds.last_scan_time,
+    IF(ds.scan_day = CURDATE(), ds.scan_count_day, 0) as scan_count_today
 FROM devices d
-LEFT JOIN job_devices jd ON d.id = jd.device_id AND jd.status = 'assigned'
-LEFT JOIN jobs j ON jd.job_id = j.id
-LEFT JOIN (
-    SELECT 
-        device_id,
-        MAX(scan_timestamp) as last_scan_time,
-        COUNT(CASE WHEN DATE(scan_timestamp) = CURDATE() THEN 1 END) as scan_count_today
-    FROM scans 
-    GROUP BY device_id
-) s ON d.id = s.device_id;
+LEFT JOIN device_status ds ON d.id = ds.device_id
+LEFT JOIN jobs j ON ds.current_job_id = j.id;
 
 -- Create stored procedures for common operations
 DELIMITER //
@@ -175,6 +227,10 @@ BEGIN
     -- Update device status
     UPDATE devices SET status = 'in_use' WHERE id = p_device_id;
     
+    -- Record the current job
+    INSERT INTO device_status (device_id, current_job_id) VALUES (p_device_id, p_job_id)
+    ON DUPLICATE KEY UPDATE current_job_id = p_job_id;
+    
     -- Update job device count
     UPDATE jobs SET device_count = (
         SELECT COUNT(*) FROM job_devices WHERE job_id = p_job_id AND status = 'assigned'
@@ -207,6 +263,10 @@ BEGIN
     -- Update device status
     UPDATE devices SET status = 'available' WHERE id = p_device_id;
     
+    -- Clear the current job
+    UPDATE device_status SET current_job_id = NULL
+    WHERE device_id = p_device_id AND current_job_id = p_job_id;
+    
     -- Update job device count
     UPDATE jobs SET device_count = (
         SELECT COUNT(*) FROM job_devices WHERE job_id = p_job_id AND status = 'assigned'
@@ -260,4 +320,4 @@ SELECT
     COUNT(*) as Tables_Created
 FROM information_schema.tables 
 WHERE table_schema = 'TS-Lager' 
-AND table_name IN ('jobs', 'devices', 'scans', 'job_devices', 'maintenance_log', 'settings', 'audit_log');
\ No newline at end of file
+AND table_name IN ('jobs', 'job_sequences', 'devices', 'scans', 'scan_archives', 'scan_daily_stats', 'device_daily_stats', 'job_devices', 'device_status', 'maintenance_log', 'settings', 'audit_log');
\ No newline at end of file
@@ -42,8 +42,8 @@ function Dashboard() {
         });
 
         setStats({
-          activeJobs: jobsResponse.data.length,
-          recentJobs: jobsResponse.data,
+          activeJobs: jobsResponse.data.items.length,
+          recentJobs: jobsResponse.data.items,
         });
       } catch (error) {
         console.error('Error fetching dashboard data:', error);
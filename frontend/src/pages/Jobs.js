@@ -37,7 +37,9 @@ import axios from '../config/axios';
 function Jobs() {
   const navigate = useNavigate();
   const [jobs, setJobs] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState('');
   const [openDialog, setOpenDialog] = useState(false);
   
@@ -139,24 +141,33 @@ function Jobs() {
     }
   };
 
-  const fetchJobs = async () => {
+  // Without a cursor the list is reloaded, with one the next page is appended
+  const fetchJobs = async (cursor = null) => {
     try {
-      setLoading(true);
+      if (cursor) {
+        setLoadingMore(true);
+      } else {
+        setLoading(true);
+      }
       const params = {
         search: filters.search,
         status: filters.status,
         date_from: filters.dateFrom?.toISOString().split('T')[0],
         date_to: filters.dateTo?.toISOString().split('T')[0],
+        cursor: cursor || undefined,
       };
 
       const response = await axios.get('/api/v1/jobs', { params });
-      setJobs(response.data);
+      const { items, next_cursor: next } = response.data;
+      setJobs((previous) => (cursor ? [...previous, ...items] : items));
+      setNextCursor(next);
       setError('');
     } catch (error) {
       console.error('Error fetching jobs:', error);
       setError('Failed to load jobs');
     } finally {
       setLoading(false);
+      setLoadingMore(false);
     }
   };
 
@@ -300,6 +311,18 @@ function Jobs() {
         )}
       </Paper>
 
+      {!loading && nextCursor && (
+        <Box sx={{ display: 'flex', justifyContent: 'center', mt: 2 }}>
+          <Button
+            variant="outlined"
+            onClick={() => fetchJobs(nextCursor)}
+            disabled={loadingMore}
+          >
+            {loadingMore ? 'Loading...' : `Load more jobs (${jobs.length} shown)`}
+          </Button>
+        </Box>
+      )}
+
       {/* Create Job Dialog */}
       <Dialog open={openDialog} onClose={() => setOpenDialog(false)} maxWidth="sm" fullWidth>
         <DialogTitle>Create New Job</DialogTitle>
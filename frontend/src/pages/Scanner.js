@@ -114,7 +114,7 @@ function Scanner() {
       const response = await axios.get('/api/v1/jobs', {
         params: { status: 'active', limit: 50 }
       });
-      setJobs(response.data);
+      setJobs(response.data.items);
     } catch (error) {
       console.error('Error fetching jobs:', error);
     }